@@ -1,37 +1,116 @@
-from groq import Groq
-import os
+import math
+import logging
 from dotenv import load_dotenv
+from agents.llm_cache import get_response_cache, make_key
+from agents.llm_client import get_llm_client
+from agents.telemetry import log
+from context_builder import compact_context
 
 load_dotenv()
 
+# Live portfolio values within about this fraction of each other share cached answers
+# (the exact figure changes with every price tick, so keying on it never hits)
+LIVE_VALUE_STEP = 0.005
+
+
+def live_value_bucket(value, step=LIVE_VALUE_STEP):
+    """Coarse identity of a live portfolio value for cache keys (log-spaced buckets of ~step)."""
+    if not value or value <= 0:
+        return "0"
+    return str(round(math.log(value) / math.log1p(step)))
+
+
+def live_value_context(value, step=LIVE_VALUE_STEP):
+    """
+    Live-context line for a live portfolio value, rounded to the middle of its cache bucket:
+    every value in the bucket gets the same prompt, so a cached answer never quotes a stale figure.
+    """
+    if not value or value <= 0:
+        return "Current Live Portfolio Value: not available"
+    approx = (1 + step) ** int(live_value_bucket(value, step))
+    return f"Current Live Portfolio Value: about ₹{approx:,.0f} (rounded, within {step / 2:.2%})"
+
+
 class AnalyticsAgent:
-    def __init__(self, data_processor, model_name="openai/gpt-oss-120b"):
-        self.client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    def __init__(self, data_processor, model_name="openai/gpt-oss-120b", response_cache=None, llm_client=None,
+                 context_budget=2000, performance=None):
+        # Shared, pooled client (see agents/llm_client.py) unless one is injected
+        self.client = llm_client or get_llm_client()
+        # Used by the async orchestrator path (route_query_async)
+        self.async_client = self.client.aio
         self.model_name = model_name
-        self.df = data_processor.df
-        self.holdings = data_processor.holdings
+        self.temperature = 0.2
+        self.response_cache = response_cache or get_response_cache()
+        self.data = data_processor
+        # Token budget for holdings + recent trades in the system prompt
+        self.context_budget = context_budget
+        self._context_version = None
+        # Precomputed returns vs the benchmark (agents/performance_engine.py), if available
+        self.performance = performance
+        # Context strings are rendered on the first question (or prepare()), then again only
+        # when new orders are ingested
+        self.holdings_str = self.history_str = ""
+
+    @property
+    def df(self):
+        return self.data.df
+
+    @property
+    def holdings(self):
+        return self.data.holdings
+
+    @property
+    def portfolio(self):
         # We can also access portfolio_daily if needed
-        self.portfolio = data_processor.portfolio
-        
-        # Prepare context data once
-        self.holdings_str = self.holdings.to_string()
-        self.history_str = self.df.sort_values('Execution date and time').tail(50).to_string(index=False)
+        return self.data.portfolio
 
-    def analyze(self, query, live_context=""):
+    def _refresh_context(self):
+        version = getattr(self.data, "version", 0)
+        if version == self._context_version:
+            return
+        # Compact CSV within the token budget (largest holdings / newest trades first, the rest summarized)
+        self.holdings_str, self.history_str = compact_context(self.holdings, self.df, self.context_budget)
+        self._context_version = version
+
+    def _performance_context(self):
+        # Cached by the engine per data version / stored prices / day; missing prices just leave it out
+        if self.performance is None:
+            return ""
+        try:
+            return self.performance.context()
+        except Exception as e:
+            log("performance", f"Performance figures unavailable ({e})", error=str(e), level=logging.WARNING)
+            return ""
+
+    def prepare(self):
         """
-        Analyzes the portfolio based on the user query.
-        live_context: String containing live market data (provided by LiveDataAgent via Orchestrator)
+        Builds the prompt context and the data fingerprint ahead of a query
+        (lets the async orchestrator do it while prices are being fetched).
         """
+        self._refresh_context()
+        self._performance_context()
+        return self.data.fingerprint
+
+    def _messages(self, query, live_context, performance=None):
+        self._refresh_context()
+        if performance is None:
+            performance = self._performance_context()
+        performance = performance or "Not available"
+        benchmark = getattr(self.performance, "benchmark_name", "the benchmark")
         system_prompt = f"""
         You are a Portfolio Analytics Expert. Your role is to provide deep insights into the user's portfolio performance, composition, and behavior.
         
         Data Context:
-        - Holdings (Net Quantity & Avg Price):
+        - Holdings (CSV, INR; largest first):
         {self.holdings_str}
         
-        - Recent Transaction History (Last 50 trades):
+        - Recent Transaction History (CSV, INR, newest last; type B=BUY, S=SELL):
         {self.history_str}
         
+        - Performance vs {benchmark} (CSV, precomputed from daily market values; % figures; ann=Y means annualized;
+          twr = time-weighted, mwr = money-weighted/XIRR, te = tracking error, maxdd = maximum drawdown):
+        {performance}
+        
         - Live Market Context (if available):
         {live_context}
         
@@ -41,19 +120,84 @@ class AnalyticsAgent:
         - If asked about "Profitability", use the provided live context or calculate unrealized P&L if possible.
         - Be concise, professional, and data-driven.
         - Do NOT perform complex math yourself (like XIRR), assume the Math Agent handles that. Focus on qualitative analysis.
+        - For performance or comparisons with {benchmark}, quote the precomputed figures above; do not estimate returns.
         """
         
-        messages = [
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": query}
         ]
-        
+
+    def _cache_key(self, query, live_context, performance):
+        # Same question on the same data (and the same live context and performance figures) gets
+        # the same answer; the data fingerprint changes as soon as new orders are ingested
+        return make_key(query, self.model_name, self.temperature, fingerprint=self.data.fingerprint,
+                        context=live_context + performance)
+
+    def _prompt(self, query, live_context, live_value):
+        """Messages and cache key of one question, from a single read of the performance figures."""
+        if live_value is not None:
+            # Only the bucketed value goes into the prompt (and so into the cached answer)
+            live_context = live_value_context(live_value)
+        performance = self._performance_context()
+        return self._messages(query, live_context, performance), self._cache_key(query, live_context, performance)
+
+    def analyze(self, query, live_context="", live_value=None):
+        """
+        Analyzes the portfolio based on the user query.
+        live_context: String containing live market data (provided by LiveDataAgent via Orchestrator)
+        live_value: the live portfolio value, used instead of live_context; it is rounded to
+        LIVE_VALUE_STEP buckets, so cached answers are reused while it only ticks
+        """
+        messages, key = self._prompt(query, live_context, live_value)
+        try:
+            return self.response_cache.get_or_create(key, lambda: self._complete(messages))
+        except Exception as e:
+            return f"Error analyzing portfolio: {e}"
+
+    async def analyze_async(self, query, live_context="", live_value=None):
+        """
+        Same as analyze, on the async client.
+        """
+        messages, key = self._prompt(query, live_context, live_value)
         try:
-            completion = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=messages,
-                temperature=0.2
-            )
-            return completion.choices[0].message.content
+            return await self.response_cache.get_or_create_async(key, lambda: self._complete_async(messages))
         except Exception as e:
             return f"Error analyzing portfolio: {e}"
+
+    def analyze_stream(self, query, live_context="", live_value=None):
+        """
+        Same as analyze, but yields the answer as it is generated.
+        """
+        messages, key = self._prompt(query, live_context, live_value)
+        try:
+            yield from self.response_cache.stream_or_create(key, lambda: self._complete_stream(messages))
+        except Exception as e:
+            yield f"Error analyzing portfolio: {e}"
+
+    def _complete(self, messages):
+        completion = self.client.chat.completions.create(
+            model=self.model_name,
+            messages=messages,
+            temperature=self.temperature
+        )
+        return completion.choices[0].message.content
+
+    async def _complete_async(self, messages):
+        completion = await self.async_client.chat.completions.create(
+            model=self.model_name,
+            messages=messages,
+            temperature=self.temperature
+        )
+        return completion.choices[0].message.content
+
+    def _complete_stream(self, messages):
+        stream = self.client.chat.completions.create(
+            model=self.model_name,
+            messages=messages,
+            temperature=self.temperature,
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
@@ -1,13 +1,19 @@
-from groq import Groq
-import os
 from dotenv import load_dotenv
+from agents.llm_cache import get_response_cache, make_key
+from agents.llm_client import get_llm_client
 
 load_dotenv()
 
 class EducationAgent:
-    def __init__(self, model_name="openai/gpt-oss-120b"):
-        self.client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    def __init__(self, model_name="openai/gpt-oss-120b", response_cache=None, llm_client=None):
+        # Shared, pooled client (see agents/llm_client.py) unless one is injected
+        self.client = llm_client or get_llm_client()
+        # Used by the async orchestrator path (route_query_async)
+        self.async_client = self.client.aio
         self.model_name = model_name
+        self.temperature = 0.3
+        # Definitions don't depend on the portfolio, so answers are shared across users and restarts
+        self.response_cache = response_cache or get_response_cache()
         self.system_prompt = """
         You are a financial educator. Your goal is to explain complex stock market concepts in simple, easy-to-understand terms.
         
@@ -18,18 +24,66 @@ class EducationAgent:
         - Do NOT give financial advice (buy/sell). Only explain the concepts.
         """
 
-    def explain(self, query):
-        messages = [
+    def _messages(self, query):
+        return [
             {"role": "system", "content": self.system_prompt},
             {"role": "user", "content": f"Explain this concept: {query}"}
         ]
-        
+
+    def _cache_key(self, query):
+        # The system prompt is part of the key so that editing it invalidates old answers
+        return make_key(query, self.model_name, self.temperature, context=self.system_prompt)
+
+    def explain(self, query):
+        messages = self._messages(query)
         try:
-            completion = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=messages,
-                temperature=0.3
-            )
-            return completion.choices[0].message.content
+            return self.response_cache.get_or_create(self._cache_key(query), lambda: self._complete(messages))
         except Exception as e:
             return f"Sorry, I couldn't generate an explanation at this time. Error: {e}"
+
+    async def explain_async(self, query):
+        """
+        Same as explain, on the async client.
+        """
+        messages = self._messages(query)
+        try:
+            return await self.response_cache.get_or_create_async(self._cache_key(query), lambda: self._complete_async(messages))
+        except Exception as e:
+            return f"Sorry, I couldn't generate an explanation at this time. Error: {e}"
+
+    def explain_stream(self, query):
+        """
+        Same as explain, but yields the answer as it is generated.
+        """
+        messages = self._messages(query)
+        try:
+            yield from self.response_cache.stream_or_create(self._cache_key(query), lambda: self._complete_stream(messages))
+        except Exception as e:
+            yield f"Sorry, I couldn't generate an explanation at this time. Error: {e}"
+
+    def _complete(self, messages):
+        completion = self.client.chat.completions.create(
+            model=self.model_name,
+            messages=messages,
+            temperature=self.temperature
+        )
+        return completion.choices[0].message.content
+
+    async def _complete_async(self, messages):
+        completion = await self.async_client.chat.completions.create(
+            model=self.model_name,
+            messages=messages,
+            temperature=self.temperature
+        )
+        return completion.choices[0].message.content
+
+    def _complete_stream(self, messages):
+        stream = self.client.chat.completions.create(
+            model=self.model_name,
+            messages=messages,
+            temperature=self.temperature,
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+# Horizons in trading days: 1 week, 1 month, 3 months, 6 months, 1 year
+HORIZONS = {"1W": 5, "1M": 21, "3M": 63, "6M": 126, "1Y": 252}
+PERCENTILES = (5, 25, 50, 75, 95)
+# Fewer daily returns than this and a holding gets the typical drift/volatility of the others
+MIN_OBSERVATIONS = 60
+
+
+class ReturnModel:
+    """
+    Daily log-return model of the current holdings: per-holding drift and a covariance
+    matrix estimated from the stored closes over the lookback, shrunk towards its diagonal
+    and factored (Cholesky) once so simulations only need matrix products.
+    """
+
+    def __init__(self, symbols, quantities, prices, closes, shrinkage=0.1):
+        self.symbols = list(symbols)
+        self.quantities = np.asarray(quantities, dtype=float)
+        self.prices = np.asarray(prices, dtype=float)
+        # Value held in each holding today: the weights of the simulated price relatives
+        self.exposure = self.quantities * self.prices
+
+        log_returns = np.log(closes).diff().iloc[1:]
+        counts = log_returns.notna().sum().to_numpy()
+        fitted = counts >= MIN_OBSERVATIONS
+        mu = log_returns.mean().to_numpy()
+        cov = log_returns.cov(min_periods=MIN_OBSERVATIONS).to_numpy()
+        cov = np.nan_to_num(cov)
+
+        # Holdings without enough history: typical drift and variance, uncorrelated
+        variance = np.diag(cov).copy()
+        typical_mu = float(np.median(mu[fitted])) if fitted.any() else 0.0
+        typical_var = float(np.median(variance[fitted])) if fitted.any() else (0.02 ** 2)
+        mu = np.where(fitted, np.nan_to_num(mu), typical_mu)
+        cov[~fitted, :] = 0.0
+        cov[:, ~fitted] = 0.0
+        variance = np.where(fitted, variance, typical_var)
+        cov[np.diag_indices_from(cov)] = variance
+
+        # Shrink towards the diagonal, then clip what the pairwise estimates leave non-PSD
+        cov = (1 - shrinkage) * cov + shrinkage * np.diag(variance)
+        values, vectors = np.linalg.eigh(cov)
+        cov = (vectors * np.clip(values, 1e-12, None)) @ vectors.T
+
+        self.mu = mu
+        self.cov = cov
+        self.chol = np.linalg.cholesky(cov)
+        self.fitted = fitted
+        self.observations = counts
+
+    @property
+    def value(self):
+        return float(self.exposure.sum())
+
+
+class ForecastEngine:
+    """
+    Monte Carlo forecast of the portfolio's market value. Holdings follow correlated
+    geometric Brownian motions fitted to their stored daily closes (ReturnModel). The model is
+    fitted once per orders version / stored prices / day and reused for every question.
+
+    Daily log returns are i.i.d. normal under the model, so a path only has to be drawn at
+    the requested horizons: the increment between two horizons h1 < h2 is N((h2-h1) mu,
+    (h2-h1) cov), which keeps a simulation at paths x holdings x horizons numbers instead
+    of paths x holdings x days.
+    """
+
+    def __init__(self, data, price_history, lookback_years=3, shrinkage=0.1):
+        self.data = data
+        self.price_history = price_history
+        self.lookback_years = lookback_years
+        self.shrinkage = shrinkage
+        self._model = None
+        self.fits = 0
+
+    def _state(self):
+        store = self.price_history
+        return (self.data.version, id(store), store.version, store.today())
+
+    @property
+    def model(self):
+        """ReturnModel of the current holdings (None if nothing is held)."""
+        if self._model is None or self._model[0] != self._state():
+            model = self._fit()
+            # Keyed after the fit: it may have fetched missing closes
+            self._model = (self._state(), model)
+        return self._model[1]
+
+    def _fit(self):
+        holdings = self.data.holdings
+        if holdings.empty:
+            return None
+        symbols = holdings.index.get_level_values('Symbol').astype(str)
+        today = pd.Timestamp(self.price_history.today())
+        start = today - pd.DateOffset(years=self.lookback_years)
+        self.price_history.update(symbols, start)
+
+        # Trading days = days with a stored bar for any holding
+        columns = {}
+        for sym in dict.fromkeys(symbols):
+            close = self.price_history.history(sym)['Close']
+            columns[sym] = close.loc[start:today]
+        closes = pd.DataFrame(columns).reindex(columns=list(dict.fromkeys(symbols)))
+        closes = closes.where(closes > 0)
+
+        last = self.price_history.closes(symbols, today, today, update=False).iloc[-1]
+        prices = last.reindex(symbols).to_numpy(dtype=float)
+        # No close at all: the average cost stands in as today's price
+        prices = np.where(np.isfinite(prices) & (prices > 0), prices, holdings['Avg_Price'].to_numpy(dtype=float))
+        quantities = holdings['Quantity_Change'].to_numpy(dtype=float)
+
+        # Same symbol under two names: one holding
+        frame = pd.DataFrame({'qty': quantities, 'price': prices}, index=symbols)
+        frame = frame.groupby(level=0, sort=False).agg({'qty': 'sum', 'price': 'first'})
+        self.fits += 1
+        return ReturnModel(frame.index, frame['qty'], frame['price'], closes[frame.index], self.shrinkage)
+
+    def simulate(self, horizons=HORIZONS, n_paths=10_000, seed=None, model=None, chunk=20_000):
+        """
+        Simulated portfolio values, an (n_paths x len(horizons)) array with one column per
+        horizon (in trading days, ascending). Deterministic for a given seed. Paths are drawn
+        chunk at a time to bound memory.
+        """
+        model = model or self.model
+        days = np.asarray(list(horizons.values()) if isinstance(horizons, dict) else horizons, dtype=float)
+        steps = np.diff(days, prepend=0.0)
+        rng = np.random.default_rng(seed)
+        values = np.empty((n_paths, len(days)))
+        chol_t = model.chol.T
+
+        for lo in range(0, n_paths, chunk):
+            hi = min(lo + chunk, n_paths)
+            log_relative = np.zeros((hi - lo, len(model.mu)))
+            for k, step in enumerate(steps):
+                # Standard normals correlated through the Cholesky factor, scaled to the step
+                increment = rng.standard_normal((hi - lo, len(model.mu))) @ chol_t
+                increment *= np.sqrt(step)
+                increment += step * model.mu
+                log_relative += increment
+                # Value at the horizon: exposure-weighted price relatives
+                np.exp(log_relative, out=increment)
+                values[lo:hi, k] = increment @ model.exposure
+        return values
+
+    def forecast(self, horizons=HORIZONS, n_paths=10_000, seed=None, percentiles=PERCENTILES):
+        """
+        Percentile bands of the portfolio value per horizon, plus the mean and the probability
+        of ending below today's value. None if nothing is held.
+        """
+        model = self.model
+        if model is None:
+            return None
+        if not isinstance(horizons, dict):
+            horizons = {f"{h}d": h for h in horizons}
+        horizons = dict(sorted(horizons.items(), key=lambda item: item[1]))
+        values = self.simulate(horizons, n_paths, seed, model)
+        bands = np.percentile(values, percentiles, axis=0).T
+        table = pd.DataFrame(bands, columns=[f"p{p}" for p in percentiles],
+                             index=pd.Index(list(horizons), name='Horizon'))
+        table.insert(0, 'days', list(horizons.values()))
+        table['mean'] = values.mean(axis=0)
+        table['prob_loss'] = (values < model.value).mean(axis=0)
+        return table
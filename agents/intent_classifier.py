@@ -0,0 +1,205 @@
+import csv
+import os
+import re
+import threading
+import time
+import numpy as np
+
+LABELS = ["MATH", "LIVE", "PREDICT", "EDU", "ANALYTICS", "CHAT"]
+SAMPLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_samples.csv")
+
+# Keyword rules. A single matching label is evidence for it, weighed against the model
+# (its probability is multiplied by RULE_WEIGHT), never a verdict on its own: a hit the
+# model strongly disagrees with stays unsure. Overlapping matches (e.g. "what is" +
+# "right now") are left to the model.
+RULE_WEIGHT = 8.0
+_PERSONAL = r"\b(my|i|me|mine|i'm|i've)\b"
+RULES = {
+    "MATH": [
+        rf"{_PERSONAL}.*\b(xirr|cagr|irr|internal rate of return|annuali[sz]ed return|average (buy )?price|total invest\w*)\b",
+        r"\b(calculate|compute|average|total(?! (holdings|positions|stocks|portfolio)\b)|sum of)\b",
+        r"^how (many|much)\b(?!.*\b(will|worth|today|now)\b)",
+    ],
+    "LIVE": [
+        r"\b(right now|currently|today|today's|live|real[- ]?time|at this moment|trading at)\b",
+        r"\b(current|latest) (price|quote|market value|valuation|value)\b",
+    ],
+    "PREDICT": [
+        r"\b(predict\w*|forecast\w*|project\w*|extrapolat\w*|outlook|future|going forward|will(?! you\b))\b",
+        r"\b(next|in \d+) (year|month|quarter|week)s?\b",
+    ],
+    "EDU": [
+        rf"^(what is|what's|what are|what does|define|explain|meaning of|how does|how do \w+ work)\b(?!.*{_PERSONAL})(?!.*\b(price|quote|doing|trading)\b)",
+        r"\bdifference between\b",
+    ],
+    "ANALYTICS": [
+        r"\b(analy[sz]e|analysis|insights?|diversif\w*|composition|breakdown|concentrat\w*|overexposed|top holdings|patterns?|overview|review)\b",
+    ],
+    "CHAT": [
+        r"^\W*(hi|hello|hey|yo|thanks|thank you|ok|okay|cool|nice|bye|help|good (morning|evening|night))( (there|so much|thanks))?\W*$",
+        r"^\W*(who are you|what can you do|what is your name|how are you|what's up)\W*$",
+        r"\b(weather|joke)\b",
+    ],
+}
+_COMPILED_RULES = {label: [re.compile(p, re.IGNORECASE) for p in patterns] for label, patterns in RULES.items()}
+
+
+def load_samples(path=SAMPLES_PATH):
+    """Labelled sample queries as a list of (query, label)."""
+    with open(path, newline="", encoding="utf-8") as f:
+        return [(row["query"], row["label"]) for row in csv.DictReader(f)]
+
+
+def rule_matches(query):
+    return [label for label, patterns in _COMPILED_RULES.items() if any(p.search(query) for p in patterns)]
+
+
+class IntentClassifier:
+    """
+    Local intent classifier used ahead of the LLM:
+    keyword rules checked against a TF-IDF + logistic regression model trained on the
+    labelled sample set. Anything below `threshold` confidence is sent to the fallback
+    (the LLM classifier) and counted as a remote call.
+    """
+
+    def __init__(self, samples=None, threshold=0.6):
+        self.samples = samples
+        self.threshold = threshold
+        self._vectorizer = None
+        self._model = None
+        self._lock = threading.Lock()
+        # Separate from _lock: stats stay readable while the model is fitted in the background
+        self._fit_lock = threading.Lock()
+        self._counters = dict.fromkeys(("rule", "model", "remote", "remote_agree", "local_seconds"), 0)
+
+    def fit(self, samples=None):
+        # scikit-learn takes ~1 s to import: only on the first query (or in warm_up)
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+
+        samples = samples or self.samples or load_samples()
+        queries, labels = zip(*samples)
+        vectorizer = TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True, lowercase=True)
+        X = vectorizer.fit_transform(queries)
+        model = LogisticRegression(C=20, max_iter=2000)
+        model.fit(X, labels)
+
+        # Score single queries without going through sparse matrices: vocabulary lookups + a small dot product
+        self._vocab = vectorizer.vocabulary_
+        self._idf = vectorizer.idf_
+        self._analyzer = vectorizer.build_analyzer()
+        self._coef = model.coef_
+        self._intercept = model.intercept_
+        self._classes = [str(c) for c in model.classes_]
+        self._vectorizer, self._model = vectorizer, model
+        return self
+
+    def _ensure_fitted(self):
+        if self._model is None:
+            with self._fit_lock:
+                if self._model is None:
+                    self.fit()
+
+    def warm_up(self):
+        """Fits the model now (e.g. in a background thread) instead of on the first unsure query."""
+        self._ensure_fitted()
+        return self
+
+    def predict_proba(self, query):
+        """{label: probability} from the model alone."""
+        self._ensure_fitted()
+        counts = {}
+        for term in self._analyzer(query):
+            col = self._vocab.get(term)
+            if col is not None:
+                counts[col] = counts.get(col, 0) + 1
+        scores = self._intercept.copy()
+        if counts:
+            cols = np.fromiter(counts, dtype=np.intp, count=len(counts))
+            weights = (1.0 + np.log(np.fromiter(counts.values(), dtype=float, count=len(counts)))) * self._idf[cols]
+            weights /= np.sqrt(weights @ weights)
+            scores += self._coef[:, cols] @ weights
+        scores = np.exp(scores - scores.max())
+        scores /= scores.sum()
+        return dict(zip(self._classes, scores.tolist()))
+
+    def predict(self, query):
+        """
+        Local prediction only: (label, confidence, source) with source 'rule' or 'model'.
+        Source is 'rule' when a single rule hit decided the label; its confidence is below 1.0
+        and goes through the threshold like the model's.
+        """
+        matches = rule_matches(query)
+        proba = self.predict_proba(query)
+        if len(matches) == 1:
+            proba[matches[0]] *= RULE_WEIGHT
+        elif matches:
+            # Several rules fired: let the model choose among them
+            proba = {label: proba[label] for label in matches}
+        total = sum(proba.values())
+        label = max(proba, key=proba.get)
+        return label, proba[label] / total, "rule" if matches == [label] else "model"
+
+    def _local(self, query):
+        start = time.perf_counter()
+        label, confidence, source = self.predict(query)
+        with self._lock:
+            self._counters["local_seconds"] += time.perf_counter() - start
+        return label, confidence, source
+
+    def _answer_locally(self, source):
+        with self._lock:
+            self._counters[source] += 1
+
+    def _record_remote(self, local_label, remote_label):
+        with self._lock:
+            self._counters["remote"] += 1
+            self._counters["remote_agree"] += int(remote_label == local_label)
+
+    def classify(self, query, fallback=None):
+        """
+        Returns (intent label, source): the local answer ('rule' or 'model') when it is
+        confident enough, otherwise fallback(query) (if given) and 'remote'.
+        The classifier is shared, so the source is returned rather than kept on it.
+        """
+        label, confidence, source = self._local(query)
+        if confidence >= self.threshold or fallback is None:
+            self._answer_locally(source)
+            return label, source
+
+        remote_label = fallback(query)
+        self._record_remote(label, remote_label)
+        return remote_label, "remote"
+
+    async def classify_async(self, query, fallback=None):
+        """
+        Same as classify, with an async fallback (e.g. the AsyncGroq classifier).
+        """
+        label, confidence, source = self._local(query)
+        if confidence >= self.threshold or fallback is None:
+            self._answer_locally(source)
+            return label, source
+
+        remote_label = await fallback(query)
+        self._record_remote(label, remote_label)
+        return remote_label, "remote"
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        total = stats["rule"] + stats["model"] + stats["remote"]
+        local = stats["rule"] + stats["model"]
+        stats.update(
+            total=total,
+            local_share=local / total if total else 0.0,
+            # How often the local guess matched the LLM on the queries it was unsure about
+            remote_agreement=stats["remote_agree"] / stats["remote"] if stats["remote"] else None,
+            mean_local_ms=stats["local_seconds"] / total * 1000 if total else 0.0,
+        )
+        return stats
+
+
+if __name__ == "__main__":
+    classifier = IntentClassifier()
+    for q in ["What is my XIRR?", "What is XIRR?", "price of INFY now", "hello", "Where will my portfolio be in 2030?"]:
+        print(q, "->", classifier.predict(q))
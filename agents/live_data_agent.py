@@ -1,75 +1,111 @@
 import sys
 import os
+import time
+from collections import Counter
 
 # Add parent directory to path to import live_market
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "live-data"))
-from live_market import get_live_prices
+from live_market import STATUS_OK
+from price_cache import get_quote_cache
+from valuation import ValuationEngine, STATUS_LIVE
+from agents.telemetry import get_telemetry
+
+class ValuationSnapshot:
+    """
+    One live valuation of the holdings, tagged with when it was taken and what it cost.
+    """
+
+    def __init__(self, total, frame, details, taken_at, fetch_seconds, data_version=None):
+        self.total = total
+        self.frame = frame
+        self.details = details
+        self.taken_at = taken_at
+        self.fetch_seconds = fetch_seconds
+        self.data_version = data_version
+        self.turn = None  # set by the Orchestrator that owns the snapshot
+
+    @property
+    def age(self):
+        return time.time() - self.taken_at
+
+    @property
+    def live_prices(self):
+        # {symbol: price} for the holdings that got a live quote
+        live = self.frame[self.frame['status'] == STATUS_LIVE]
+        return dict(zip(live.index, live['price'].tolist()))
+
 
 class LiveDataAgent:
-    def __init__(self):
-        pass
+    def __init__(self, provider=None, quote_cache=None):
+        # None means the process-wide default provider (yfinance) / shared quote cache
+        self.provider = provider
+        self.quote_cache = quote_cache
+        # Per-symbol status of the most recent fetch ({symbol: {"price", "status", ...}})
+        self.last_quotes = {}
+        self.valuation = ValuationEngine()
 
     def get_latest_prices(self, symbols):
         """
-        Fetches live prices for the given symbols.
+        Fetches live prices for the given symbols through the shared quote cache.
         """
-        return get_live_prices(symbols)
+        cache = self.quote_cache or get_quote_cache()
+        telemetry = get_telemetry()
+        with telemetry.span("live_prices", symbols=len(symbols)):
+            try:
+                self.last_quotes = cache.get_quotes(symbols, provider=self.provider)
+            except Exception as e:
+                telemetry.count("price_fetch_errors_total", error=type(e).__name__)
+                raise
+        if telemetry.enabled:
+            # Quotes by outcome: status (ok / missing / error / timeout) and where they came from
+            outcomes = Counter((q["status"], q.get("cache", "none")) for q in self.last_quotes.values())
+            for (status, source), n in outcomes.items():
+                telemetry.count("price_quotes_total", n, status=status, cache=source)
+        return {sym: q["price"] for sym, q in self.last_quotes.items() if q["status"] == STATUS_OK}
 
-    def calculate_current_valuation(self, holdings_df):
+    def calculate_valuation_frame(self, holdings_df):
         """
-        Calculates current market value of the portfolio.
-        holdings_df: DataFrame with 'Symbol' and 'Quantity' (Net)
+        Columnar valuation: (total_value, frame indexed by Symbol with price/value/qty/status).
         """
         if holdings_df.empty:
-            return 0.0, {}
-
-        # Reset index if Symbol is the index
-        if 'Symbol' not in holdings_df.columns:
-            holdings = holdings_df.reset_index()
-        else:
-            holdings = holdings_df
+            return 0.0, self.valuation.value(holdings_df, {})[1]
 
-        unique_symbols = holdings['Symbol'].unique().tolist()
+        unique_symbols = self.valuation.symbol_table(holdings_df)['Symbol'].tolist()
         
         # Try to fetch prices
         prices = {}
         try:
             prices = self.get_latest_prices(unique_symbols)
-        except:
-            pass # prices remains empty
-            
-        total_value = 0.0
-        details = {}
-        
-        for index, row in holdings.iterrows():
-            sym = row['Symbol']
-            qty = row.get('Quantity_Change', row.get('Quantity', 0))
-            cost_value = row.get('Total_Value', 0) # This is the invested amount provided by processor
-            
-            # Heuristic for mapping
-            mapped_sym = f"{sym}.NS" if '.' not in sym else sym
-            
-            price = prices.get(sym, prices.get(mapped_sym, 0))
-            
-            if price > 0:
-                market_val = qty * price
-                details[sym] = {
-                    "price": price,
-                    "value": market_val,
-                    "qty": qty,
-                    "status": "Live"
-                }
-                total_value += market_val
-            else:
-                # Fallback to cost basis so we don't return 0 for everything
-                # This ensures the portfolio value is at least the invested value (conservative/flat view)
-                market_val = cost_value
-                total_value += market_val
-                details[sym] = {
-                    "price": 0, # Indieates missing
-                    "value": market_val,
-                    "qty": qty,
-                    "status": "Est. (Cost)"
-                }
-            
-        return total_value, details
+        except Exception:
+            pass # prices remains empty, everything falls back to cost
+
+        return self.valuation.value(holdings_df, prices)
+
+    @staticmethod
+    def _details(frame):
+        columns = [frame[c].tolist() for c in ('price', 'value', 'qty', 'status')]
+        return {
+            sym: {"price": price, "value": value, "qty": qty, "status": status}
+            for sym, price, value, qty, status in zip(frame.index, *columns)
+        }
+
+    def calculate_current_valuation(self, holdings_df):
+        """
+        Calculates current market value of the portfolio.
+        holdings_df: DataFrame with 'Symbol' and 'Quantity' (Net)
+        Returns (total_value, {symbol: {"price", "value", "qty", "status"}}).
+        """
+        if holdings_df.empty:
+            return 0.0, {}
+
+        total_value, frame = self.calculate_valuation_frame(holdings_df)
+        return total_value, self._details(frame)
+
+    def snapshot(self, holdings_df, data_version=None):
+        """
+        Values the holdings once and returns a timestamped ValuationSnapshot.
+        """
+        start = time.perf_counter()
+        total_value, frame = self.calculate_valuation_frame(holdings_df)
+        details = self._details(frame) if not holdings_df.empty else {}
+        return ValuationSnapshot(total_value, frame, details, time.time(), time.perf_counter() - start, data_version)
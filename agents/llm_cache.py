@@ -0,0 +1,186 @@
+import os
+import re
+import time
+import logging
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from agents.telemetry import log
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "portfolio-data", ".cache", "llm_responses.sqlite")
+
+
+def normalize_query(query):
+    # "What is XIRR?", "what is  xirr" and "WHAT IS XIRR ?" are the same question
+    query = re.sub(r"\s+", " ", query.strip().lower())
+    return query.rstrip(" ?.!")
+
+
+def make_key(query, model, temperature, fingerprint="", context=""):
+    """
+    Cache key for one chat completion: normalized query + model + temperature +
+    data fingerprint (+ any other prompt context that changes the answer).
+    """
+    parts = [normalize_query(query), model, repr(float(temperature)), fingerprint, context]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache of LLM responses: an in-memory LRU in front of an optional SQLite file
+    (path=None keeps it in memory only). Only successful completions should be stored.
+    Entries older than ttl seconds are ignored and pruned when the database is opened.
+    """
+
+    def __init__(self, max_entries=256, path=None, ttl=7 * 24 * 3600, clock=time.time):
+        self.max_entries = max_entries
+        self.path = path
+        self.ttl = ttl
+        self.clock = clock
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._counters = dict.fromkeys(("memory_hits", "disk_hits", "misses", "stores", "evictions"), 0)
+        if path:
+            self._open(path)
+
+    def _open(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        if self.ttl is not None:
+            self._db.execute("DELETE FROM responses WHERE created < ?", (self.clock() - self.ttl,))
+        self._db.commit()
+
+    def _expired(self, created):
+        return self.ttl is not None and self.clock() - created > self.ttl
+
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry[1]):
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return entry[0]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None and not self._expired(row[1]):
+                    self._remember(key, row[0], row[1])
+                    self._counters["disk_hits"] += 1
+                    return row[0]
+
+            self._counters["misses"] += 1
+            return None
+
+    def put(self, key, response):
+        created = self.clock()
+        with self._lock:
+            self._remember(key, response, created)
+            self._counters["stores"] += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created) VALUES (?, ?, ?)", (key, response, created)
+                )
+                self._db.commit()
+
+    def _remember(self, key, response, created):
+        self._memory[key] = (response, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def get_or_create(self, key, create):
+        """
+        Returns the cached response for key, or calls create() and stores its result.
+        Exceptions from create() propagate and nothing is stored.
+        """
+        response = self.get(key)
+        if response is None:
+            response = create()
+            if response:
+                self.put(key, response)
+        return response
+
+    async def get_or_create_async(self, key, create):
+        """
+        Same as get_or_create for an async create() (the lookup itself is local and fast).
+        """
+        response = self.get(key)
+        if response is None:
+            response = await create()
+            if response:
+                self.put(key, response)
+        return response
+
+    def stream_or_create(self, key, create_stream):
+        """
+        Streaming variant of get_or_create: yields the cached response as a single chunk,
+        or yields the chunks of create_stream() and stores the full text once the stream finishes.
+        A stream that fails or is abandoned part-way is not stored.
+        """
+        response = self.get(key)
+        if response is not None:
+            yield response
+            return
+        parts = []
+        for chunk in create_stream():
+            parts.append(chunk)
+            yield chunk
+        if parts:
+            self.put(key, "".join(parts))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_size"] = len(self._memory)
+            stats["disk_size"] = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] if self._db else 0
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_response_cache():
+    """
+    The process-wide ResponseCache used by the agents. Persists to DEFAULT_DB_PATH
+    unless LLM_CACHE_PATH is set (an empty value keeps it in memory only).
+    """
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            path = os.getenv("LLM_CACHE_PATH", DEFAULT_DB_PATH)
+            try:
+                _shared_cache = ResponseCache(path=path or None)
+            except (OSError, sqlite3.Error) as e:
+                log("llm_cache", f"LLM cache on disk unavailable ({e}), using memory only", path=path, error=str(e), level=logging.WARNING)
+                _shared_cache = ResponseCache()
+        return _shared_cache
+
+
+def set_response_cache(cache):
+    global _shared_cache
+    with _shared_lock:
+        _shared_cache = cache
@@ -0,0 +1,278 @@
+import os
+import ssl
+import time
+import logging
+import random
+import asyncio
+import threading
+import weakref
+import httpx
+import certifi
+from dotenv import load_dotenv
+from agents.telemetry import get_telemetry, logger
+
+load_dotenv()
+
+_transient_errors = None
+
+
+def transient_errors():
+    """
+    Errors worth retrying: the request may well succeed a moment later.
+    groq is only imported here (on the first request), it adds ~150 ms to startup otherwise.
+    """
+    global _transient_errors
+    if _transient_errors is None:
+        import groq
+        _transient_errors = (groq.APIConnectionError, groq.APITimeoutError, groq.RateLimitError, groq.InternalServerError)
+    return _transient_errors
+
+
+def _verify():
+    # SSL certificate handling for Windows/Corporate environments (previously in StockAgent)
+    # An SSLContext (httpx deprecates passing the CA bundle path as verify=); one context
+    # is shared by the sync client and the per-loop async clients
+    try:
+        return ssl.create_default_context(cafile=certifi.where())
+    except Exception:
+        logger.warning("SSL verification disabled due to environment issues")
+        return False
+
+
+class _Completions:
+    def __init__(self, create):
+        self.create = create
+
+
+class _Chat:
+    def __init__(self, create):
+        self.completions = _Completions(create)
+
+
+class LLMClient:
+    """
+    Process-wide LLM client shared by all agents.
+
+    - One httpx connection pool (keep-alive) for the sync client and one per event loop for the async client.
+    - Per-call timeout (override with timeout=... on a call).
+    - Transient errors (connection, timeout, 429, 5xx) are retried with jittered exponential backoff.
+    - At most max_concurrency requests are in flight at once (a stream counts from its first chunk
+      until it is consumed or closed; a stream that is never iterated holds nothing).
+    - The async clients are closed with their event loop (asyncio.run) or by close().
+
+    Drop-in for groq.Groq: client.chat.completions.create(**kwargs); the async variant is
+    client.aio.chat.completions.create(**kwargs).
+    """
+
+    def __init__(self, api_key=None, base_url=None, timeout=60.0, connect_timeout=5.0, max_retries=3,
+                 backoff_base=0.5, backoff_max=8.0, max_concurrency=8, max_connections=20,
+                 keepalive_expiry=60.0):
+        self.api_key = api_key or os.getenv("GROQ_API_KEY")
+        self.base_url = base_url
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_concurrency = max_concurrency
+        self._limits = httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections, keepalive_expiry=keepalive_expiry
+        )
+        self._verify = _verify()
+
+        # Retries are done here (with jitter and stats), not inside the Groq client
+        self._http = httpx.Client(verify=self._verify, limits=self._limits, timeout=self.timeout)
+        # The Groq client is created on the first request (see groq_client)
+        self._groq = None
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(("requests", "retries", "failures", "in_flight", "max_in_flight"), 0)
+        self._latency_sum = 0.0
+
+        self.chat = _Chat(self._create)
+        self.aio = _AsyncFacade(self)
+
+    @property
+    def groq_client(self):
+        if self._groq is None:
+            from groq import Groq
+            with self._lock:
+                if self._groq is None:
+                    self._groq = Groq(api_key=self.api_key, base_url=self.base_url, http_client=self._http,
+                                      timeout=self.timeout, max_retries=0)
+        return self._groq
+
+    def _backoff(self, attempt, error):
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        # Honour Retry-After on 429s when the server sends one
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.backoff_max))
+            except ValueError:
+                pass
+        return delay
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._counters[key] += amount
+            if key == "in_flight":
+                self._counters["max_in_flight"] = max(self._counters["max_in_flight"], self._counters["in_flight"])
+
+    def _create(self, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        if kwargs.get("stream", False):
+            # The request is sent (and its slot taken) when the stream is first iterated
+            return self._stream(kwargs)
+        self._slots.acquire()
+        self._count("in_flight")
+        start = time.perf_counter()
+        try:
+            response = self._request(kwargs)
+        except BaseException:
+            get_telemetry().record_llm(kwargs.get("model"), time.perf_counter() - start, status="error")
+            self._release(start)
+            raise
+        get_telemetry().record_llm(kwargs.get("model"), time.perf_counter() - start, getattr(response, "usage", None))
+        self._release(start)
+        return response
+
+    def _request(self, kwargs):
+        client, retryable = self.groq_client, transient_errors()
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._count("requests")
+                return client.chat.completions.create(**kwargs)
+            except retryable as e:
+                if attempt == self.max_retries:
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                time.sleep(self._backoff(attempt, e))
+
+    def _stream(self, kwargs):
+        # Everything happens inside the generator, so the slot is released by the finally below
+        # whether the stream is consumed, closed early or garbage collected
+        self._slots.acquire()
+        self._count("in_flight")
+        start = time.perf_counter()
+        response, usage, status = None, None, "ok"
+        try:
+            response = self._request(kwargs)
+            for chunk in response:
+                # Groq sends the token usage with the last chunk (under x_groq)
+                x_groq = getattr(chunk, "x_groq", None)
+                usage = getattr(x_groq, "usage", None) or getattr(chunk, "usage", None) or usage
+                yield chunk
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            if response is not None:
+                response.close()
+            get_telemetry().record_llm(kwargs.get("model"), time.perf_counter() - start, usage, status=status, stream=True)
+            self._release(start)
+
+    def _release(self, start):
+        with self._lock:
+            self._latency_sum += time.perf_counter() - start
+            self._counters["in_flight"] -= 1
+        self._slots.release()
+
+    async def _async_state(self):
+        # httpx.AsyncClient and asyncio.Semaphore are bound to the running event loop
+        loop = asyncio.get_running_loop()
+        state = self._async_clients.get(loop)
+        if state is None:
+            from groq import AsyncGroq
+            http = httpx.AsyncClient(verify=self._verify, limits=self._limits, timeout=self.timeout)
+            client = AsyncGroq(api_key=self.api_key, base_url=self.base_url, http_client=http,
+                               timeout=self.timeout, max_retries=0)
+            closer = self._close_with_loop(weakref.ref(loop), http)
+            # Started here, so the loop's shutdown_asyncgens() (run by asyncio.run) finishes it
+            await closer.__anext__()
+            state = (client, asyncio.Semaphore(self.max_concurrency), http, closer)
+            self._async_clients[loop] = state
+        return state
+
+    async def _close_with_loop(self, loop_ref, http):
+        try:
+            yield
+        finally:
+            loop = loop_ref()
+            if loop is not None:
+                self._async_clients.pop(loop, None)
+            await http.aclose()
+
+    async def _create_async(self, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        client, slots = (await self._async_state())[:2]
+        retryable = transient_errors()
+        async with slots:
+            self._count("in_flight")
+            start = time.perf_counter()
+            try:
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        self._count("requests")
+                        response = await client.chat.completions.create(**kwargs)
+                        get_telemetry().record_llm(kwargs.get("model"), time.perf_counter() - start,
+                                                   getattr(response, "usage", None))
+                        return response
+                    except retryable as e:
+                        if attempt == self.max_retries:
+                            self._count("failures")
+                            raise
+                        self._count("retries")
+                        await asyncio.sleep(self._backoff(attempt, e))
+            except BaseException:
+                get_telemetry().record_llm(kwargs.get("model"), time.perf_counter() - start, status="error")
+                raise
+            finally:
+                with self._lock:
+                    self._latency_sum += time.perf_counter() - start
+                    self._counters["in_flight"] -= 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            calls = stats["requests"] - stats["retries"]
+            stats["mean_latency"] = self._latency_sum / calls if calls else 0.0
+        return stats
+
+    def close(self):
+        """Closes the sync connection pool and the async clients of event loops still open."""
+        self._http.close()
+        for loop, state in list(self._async_clients.items()):
+            if loop.is_closed():
+                continue
+            if loop.is_running():
+                asyncio.run_coroutine_threadsafe(state[2].aclose(), loop)
+            else:
+                loop.run_until_complete(state[2].aclose())
+        self._async_clients.clear()
+
+
+class _AsyncFacade:
+    def __init__(self, client):
+        self.chat = _Chat(client._create_async)
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_llm_client():
+    """The process-wide LLMClient injected into the agents by default."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = LLMClient()
+        return _shared_client
+
+
+def set_llm_client(client):
+    global _shared_client
+    with _shared_lock:
+        _shared_client = client
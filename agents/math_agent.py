@@ -1,79 +1,63 @@
-import pandas as pd
-from pyxirr import xirr
-from datetime import date
+import numpy as np
+from agents.xirr_engine import XirrEngine
+from lot_engine import LotEngine
 
 class MathAgent:
     def __init__(self, data_processor):
         """
         data_processor: Instance of DataProcessor or similar that holds the dataframe
         """
-        self.df = data_processor.df
+        self.data = data_processor
+        # Cash flows grouped by symbol once per data version; results cached until data/prices change
+        self.xirr_engine = XirrEngine(self.data)
+        self._lots = None
         # We need a reference to the processed portfolio data for cash flows
         # Assuming data_processor has 'portfolio_daily' or we can derive cash flows from df
+
+    @property
+    def df(self):
+        # Always read through the data context so incrementally ingested orders are included
+        return self.data.df
+
+    @property
+    def lots(self):
+        # FIFO lots, replayed once per data version
+        if self._lots is None or self._lots[0] != self.data.version:
+            self._lots = (self.data.version, LotEngine(self.df))
+        return self._lots[1]
         
     def calculate_xirr(self):
         """
-        Calculates the XIRR for the entire portfolio.
-        Cash Flows:
-        - Dates: Transaction Dates
-        - Amounts: 
-            - Negative for BUY (Outflow)
-            - Positive for SELL (Inflow)
-            - Positive Current Value for "Today" (Terminal Value)
+        XIRR of the entire portfolio needs its current value as the terminal cash flow:
+        use compute_xirr_with_terminal_value (the cash flows themselves live in xirr_engine).
         """
-        try:
-            # 1. Get realized cash flows from transactions
-            cash_flows = self.df[['Execution date and time', 'Value', 'Type']].copy()
-            cash_flows['Amount'] = cash_flows.apply(
-                lambda x: -x['Value'] if x['Type'] == 'BUY' else x['Value'], axis=1
-            )
-            
-            # Prepare format for pyxirr (date, amount)
-            dates = cash_flows['Execution date and time'].dt.date.tolist()
-            amounts = cash_flows['Amount'].tolist()
-            
-            # 2. Add Terminal Value (Current Portfolio Value)
-            # We need to calculate current value. 
-            # Ideally this comes from the Live Data agent or the internal accounting.
-            # For accurate XIRR, we need the CURRENT live value of holdings.
-            # If not available, we use the cost basis (which makes XIRR == 0 roughly), so we strongly prefer live value.
-            # For now, let's rely on the passed data_processor to give us 'current_holdings'
-            
-            # Re-calculate or fetch current value
-            # Note: This agent assumes it gets the LATEST value somehow. 
-            # To keep it simple, we will ask the orchestrator to pass the 'current_terminal_value' 
-            # But here we are independent. Let's calculate purely realized XIRR? No, XIRR needs terminal value.
-            
-            return "XIRR requires current portfolio value. Please invoke with terminal value."
-
-        except Exception as e:
-            return f"Error calculating XIRR: {e}"
+        return "XIRR requires current portfolio value. Please invoke with terminal value."
 
     def compute_xirr_with_terminal_value(self, current_value):
         try:
-            # 1. Cash flows from history
-            cash_flows = self.df[['Execution date and time', 'Value', 'Type']].copy()
-            # BUY is Outflow (-), SELL is Inflow (+)
-            cash_flows['Amount'] = cash_flows.apply(
-                lambda x: -x['Value'] if x['Type'] == 'BUY' else x['Value'], axis=1
-            )
-            
-            dates = cash_flows['Execution date and time'].dt.date.tolist()
-            amounts = cash_flows['Amount'].tolist()
-            
-            # 2. Add Terminal Value
-            dates.append(date.today())
-            amounts.append(current_value)
-            
-            # 3. Calculate
-            result = xirr(dates, amounts)
-            if result is None:
+            # Cash flows from history (prebuilt by the engine) + terminal value today
+            result = self.xirr_engine.portfolio(terminal_value=current_value)
+            if np.isnan(result):
                 return 0.0
-            return result * 100 # Return as percentage
+            return result # Already a percentage
             
         except Exception as e:
             return f"Error accounting XIRR: {e}"
 
+    def xirr_by_holding(self, prices):
+        """
+        XIRR (%) of every current holding, marked at the given live prices
+        (last traded price where there is no quote). Highest first.
+        """
+        frame = self.xirr_engine.by_symbol(prices)
+        return frame[frame['closing_value'] > 0].sort_values('xirr', ascending=False)
+
+    def rolling_xirr(self, prices, spec=("1Y", "3Y")):
+        """
+        Portfolio XIRR (%) per window: "1Y"/"3Y"/"5Y" trailing, "Q" per calendar quarter.
+        """
+        return self.xirr_engine.rolling(prices, spec)
+
     def get_summary_stats(self):
         """
         Returns basic math stats like Total Invested, Total Realized, etc.
@@ -81,8 +65,18 @@ class MathAgent:
         total_invested = self.df[self.df['Type'] == 'BUY']['Value'].sum()
         total_sold = self.df[self.df['Type'] == 'SELL']['Value'].sum()
         
-        return {
+        stats = {
             "Total Capital Deployed": total_invested,
             "Total Capital Realized": total_sold,
             "Net Invested Capital": total_invested - total_sold
         }
+        # Realized P&L on a FIFO cost basis, split by holding period
+        stats.update(self.lots.summary())
+        return stats
+
+    def fifo_holdings(self):
+        """
+        Current holdings with their FIFO average price and cost (what is left of the oldest-first lots),
+        unlike the net-cash Avg_Price in the processed holdings, which partial sells distort.
+        """
+        return self.lots.holdings()
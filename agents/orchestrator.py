@@ -1,52 +1,30 @@
-from groq import Groq
 import os
 import pandas as pd
 import json
+import logging
+import copy
+import time
+import asyncio
+import threading
+import weakref
+import contextvars
+from contextlib import contextmanager
+from functools import cached_property
 from dotenv import load_dotenv
 
-# Import sub-agents
-from agents.math_agent import MathAgent
-from agents.analytics_agent import AnalyticsAgent
-from agents.live_data_agent import LiveDataAgent
-from agents.prediction_agent import PredictionAgent
-from agents.education_agent import EducationAgent
-from data_processor import process_stock_data
+# Sub-agents are imported and built on first use (see the properties below), so that
+# importing this module and creating an Orchestrator stay cheap
+from agents.llm_client import get_llm_client
+from agents.telemetry import get_telemetry, span, log
+from data_context import DataContext
+from data_processor import trailing_return
 
 load_dotenv()
 
-class Orchestrator:
-    def __init__(self, model_name="openai/gpt-oss-120b"):
-        self.api_key = os.getenv("GROQ_API_KEY")
-        self.client = Groq(api_key=self.api_key)
-        self.model_name = model_name
-        
-        # Load data once
-        # Using absolute path logic similar to before
-        file_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "portfolio-data", "stock_order_history.xlsx")
-        self.data_processor_result = process_stock_data(file_path) # Returns tuple
-        
-        # Wrap result in a simple object for agents to consume consistently
-        class DataContext:
-            def __init__(self, data_tuple):
-                self.df = data_tuple[0]
-                self.portfolio = data_tuple[1]
-                self.holdings = data_tuple[2]
-        
-        self.data_context = DataContext(self.data_processor_result)
-        
-        # Initialize Agents
-        self.math_agent = MathAgent(self.data_context)
-        self.analytics_agent = AnalyticsAgent(self.data_context)
-        self.live_agent = LiveDataAgent()
-        self.prediction_agent = PredictionAgent(self.data_context)
-        self.edu_agent = EducationAgent()
-        
-    def _classify_intent(self, query):
-        """
-        Uses LLM to classify the user query into one of the agent categories.
-        Categories: MATH, ANALYTICS, LIVE, PREDICT, EDU, CHAT (General)
-        """
-        system_prompt = """
+DEFAULT_ORDER_HISTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "portfolio-data", "stock_order_history.xlsx")
+
+# System prompt of the LLM intent classifier (used when the local classifier is unsure)
+INTENT_SYSTEM_PROMPT = """
         You are an Intent Classifier. Classify the user's finance query into exactly one of these categories:
         
         - MATH: Questions about XIRR, CAGR, Averages, Totals, precise calculations.
@@ -58,45 +36,540 @@ class Orchestrator:
         
         Output ONLY the category name. Do not explain.
         """
+
+# Intents answered without an LLM call (by the math, live-data and prediction agents or a canned reply)
+NON_LLM_INTENTS = ("MATH", "LIVE", "PREDICT", "CHAT")
+
+# Agent answering each intent (labels the "answer" span and its LLM metrics); anything else goes to analytics
+AGENT_BY_INTENT = {"MATH": "math", "LIVE": "live", "PREDICT": "prediction", "EDU": "education", "CHAT": "chat"}
+
+# Turn state of the interaction running in the current context (see Orchestrator.begin_turn)
+_current_turn_state = contextvars.ContextVar("orchestrator_turn_state", default=None)
+
+
+class TurnState:
+    """
+    Bookkeeping of one conversation's current interaction: turn number, stats, telemetry
+    trace, valuation snapshot and profile report. An Orchestrator shared by several
+    conversations (e.g. the Streamlit sessions of one account) gets each one's own state
+    through begin_turn(state=...); without one it uses its own.
+    """
+
+    def __init__(self):
+        self._owner = None
+        self._reset()
+
+    def _reset(self):
+        self.turn = 0
+        self.open = False
+        self.stats = {}
+        self.last_stats = {}
+        self.trace = None
+        self.snapshot = None
+        self.profile = None
+
+    def bind(self, orchestrator):
+        # A state follows one orchestrator (weakly: the registry may evict it); another one
+        # (a different account, or the same one rebuilt) starts afresh
+        if self._owner is None or self._owner() is not orchestrator:
+            self._reset()
+            self._owner = weakref.ref(orchestrator)
+        return self
+
+    def belongs_to(self, orchestrator):
+        return self._owner is not None and self._owner() is orchestrator
+
+
+# Lazily built sub-agents (in the order warm_up builds them)
+AGENTS = ("intent_classifier", "math_agent", "live_agent", "price_history", "performance", "analytics_agent",
+          "prediction_agent", "edu_agent")
+
+class Orchestrator:
+    def __init__(self, model_name="openai/gpt-oss-120b", file_path=None, memoize_valuation=True, snapshot_max_age=60,
+                 llm_client=None, price_history=None, data_context=None, edu_agent=None, intent_classifier=None):
+        # One pooled LLM client (keep-alive, timeouts, retries) shared with every agent
+        self.llm_client = llm_client or get_llm_client()
+        self.client = self.llm_client
+        self.async_client = self.llm_client.aio
+        self.model_name = model_name
+        
+        # Load data once (unless the caller, e.g. the PortfolioRegistry, already did)
+        # Using absolute path logic similar to before
+        if data_context is None:
+            if file_path is None:
+                file_path = DEFAULT_ORDER_HISTORY
+            # Shared, incrementally updatable view of the processed data (cached after first parse)
+            with span("load_orders"):
+                data_context = DataContext.from_file(file_path)
+        self.data_context = data_context
+        
+        # Agents are built lazily (cached_property) on the first query that needs them;
+        # whatever is passed in here simply takes the place of the lazy default
+        if price_history is not None:
+            self.price_history = price_history
+        if edu_agent is not None:
+            self.edu_agent = edu_agent
+        if intent_classifier is not None:
+            self.intent_classifier = intent_classifier
+        self._warm_up_thread = None
+        # Background valuation (see start_price_refresher); None until started
+        self.price_refresher = None
+        if get_telemetry().enabled:
+            self._register_collectors()
+
+        # One live valuation per interaction, shared by every branch of route_query and the sidebar
+        self.memoize_valuation = memoize_valuation
+        self.snapshot_max_age = snapshot_max_age
+        # Turn state when no conversation brings its own (scripts, benchmarks, a single user)
+        self._own_turn_state = TurnState().bind(self)
+
+    @property
+    def turn_state(self):
+        """The TurnState of the interaction running in this context (see begin_turn)."""
+        state = _current_turn_state.get()
+        if state is not None and state.belongs_to(self):
+            return state
+        return self._own_turn_state
+
+    @property
+    def turn_stats(self):
+        return self.turn_state.stats
+
+    @property
+    def last_turn_stats(self):
+        return self.turn_state.last_stats
+
+    @property
+    def last_profile(self):
+        """Report of the last profiled request (see route_query's profile argument)."""
+        return self.turn_state.profile
         
+    @cached_property
+    def price_history(self):
+        # Local daily price history (downloaded once, then only the missing days) for the market-value series
+        from price_history import get_price_history
+        return get_price_history()
+
+    @cached_property
+    def performance(self):
+        # Returns vs Nifty 50 over standard windows, handed to the analytics agent as context
+        from agents.performance_engine import PerformanceEngine
+        return PerformanceEngine(self.data_context, self.price_history)
+
+    @cached_property
+    def math_agent(self):
+        from agents.math_agent import MathAgent
+        return MathAgent(self.data_context)
+
+    @cached_property
+    def analytics_agent(self):
+        from agents.analytics_agent import AnalyticsAgent
+        return AnalyticsAgent(self.data_context, llm_client=self.llm_client, performance=self.performance)
+
+    @cached_property
+    def live_agent(self):
+        from agents.live_data_agent import LiveDataAgent
+        return LiveDataAgent()
+
+    @cached_property
+    def prediction_agent(self):
+        from agents.prediction_agent import PredictionAgent
+        return PredictionAgent(self.data_context, price_history=self.price_history)
+
+    @cached_property
+    def edu_agent(self):
+        # Doesn't depend on the portfolio, so a registry of tenants passes in one shared instance
+        from agents.education_agent import EducationAgent
+        return EducationAgent(llm_client=self.llm_client)
+
+    @cached_property
+    def intent_classifier(self):
+        # Answers confident cases locally; the LLM classifier is only asked below the threshold
+        from agents.intent_classifier import IntentClassifier
+        return IntentClassifier()
+
+    def warm_up(self, background=True):
+        """
+        Builds every agent and does the one-off work of the first questions ahead of time:
+        fitting the intent model (scikit-learn), rendering the analytics context, importing groq.
+        background=True runs it once in a daemon thread (e.g. after the first page render) and
+        returns the thread; a question that comes in meanwhile just builds what it needs itself.
+        """
+        if background:
+            if self._warm_up_thread is None:
+                self._warm_up_thread = threading.Thread(target=self.warm_up, kwargs={"background": False},
+                                                        name="orchestrator-warm-up", daemon=True)
+                self._warm_up_thread.start()
+            return self._warm_up_thread
+        start = time.perf_counter()
         try:
-            completion = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": query}
-                ],
-                temperature=0,
-                max_tokens=10
-            )
-            intent = completion.choices[0].message.content.strip().upper()
-            # Clean up potentially messy output (e.g. "CATEGORY: MATH")
-            if "MATH" in intent: intent = "MATH"
-            elif "LIVE" in intent: intent = "LIVE"
-            elif "PREDICT" in intent: intent = "PREDICT"
-            elif "EDU" in intent: intent = "EDU"
-            elif "ANALYTICS" in intent: intent = "ANALYTICS"
-            elif "CHAT" in intent: intent = "CHAT"
-            
-            return intent
+            for name in AGENTS:
+                getattr(self, name)
+            self.intent_classifier.warm_up()
+            self.analytics_agent.prepare()
+            getattr(self.llm_client, "groq_client", None)
         except Exception as e:
-            print(f"Intent Classification Error: {e}")
+            log("warm_up", f"Warm-up stopped early ({e})", error=str(e), level=logging.WARNING)
+        seconds = time.perf_counter() - start
+        log("warm_up", f"Warm-up done in {seconds:.2f} s", seconds=seconds)
+
+    def _register_collectors(self):
+        # Counters the shared caches and clients keep anyway, exported as gauges
+        from price_cache import get_quote_cache
+        from agents.llm_cache import get_response_cache
+        telemetry = get_telemetry()
+        telemetry.register_collector("quote_cache", lambda: get_quote_cache().stats())
+        telemetry.register_collector("response_cache", lambda: get_response_cache().stats())
+        if hasattr(self.llm_client, "stats"):
+            telemetry.register_collector("llm_client", self.llm_client.stats)
+        # Weak: the registry may evict this orchestrator, the collector must not keep it alive
+        orchestrator = weakref.ref(self)
+        telemetry.register_collector("intent", lambda: orchestrator().intent_classifier.stats() if orchestrator() else {})
+
+    @contextmanager
+    def _profiled(self, profile):
+        """Profiles the block when profile is truthy ("cprofile", "pyinstrument" or True)."""
+        if not profile:
+            yield
+            return
+        kind = profile if isinstance(profile, str) else "cprofile"
+        with get_telemetry().profile(kind) as result:
+            yield
+        state = self.turn_state
+        state.profile = result["report"]
+        log("profile", f"Profile of turn {state.turn} ({result['kind']}):\n{result['report']}",
+            turn=state.turn, kind=result["kind"], report=result["report"])
+
+    def begin_turn(self, state=None):
+        """
+        Starts a new interaction (e.g. one Streamlit rerun). Everything until the end of the
+        next route_query shares a single valuation snapshot. state (a TurnState kept per
+        conversation, e.g. in st.session_state) keeps concurrent conversations on this
+        orchestrator apart: it is used by everything run from the current context afterwards.
+        """
+        if state is not None:
+            _current_turn_state.set(state.bind(self))
+        state = self.turn_state
+        telemetry = get_telemetry()
+        if state.trace is not None:
+            # The previous interaction ended without a question (e.g. a sidebar-only rerun)
+            telemetry.finish_trace(state.trace, intent=None)
+        state.turn += 1
+        state.open = True
+        state.stats = {"turn": state.turn, "price_fetches": 0, "price_fetch_seconds": 0.0, "intent_source": None, "started": time.perf_counter()}
+        state.trace = telemetry.start_trace("turn", turn=state.turn)
+
+    def _end_turn(self, intent=None):
+        state = self.turn_state
+        stats = dict(state.stats)
+        stats["intent"] = intent
+        stats["total_seconds"] = time.perf_counter() - stats.pop("started")
+        state.last_stats = stats
+        state.open = False
+        telemetry = get_telemetry()
+        if telemetry.enabled:
+            telemetry.count("turns_total", intent=intent, source=stats["intent_source"])
+            telemetry.finish_trace(state.trace, **stats)
+        else:
+            log("turn", f"Turn stats {stats}")
+        state.trace = None
+        return stats
+
+    def get_valuation(self, refresh=False, block=True):
+        """
+        Live valuation snapshot for the current interaction (computed at most once per turn,
+        and never reused after snapshot_max_age seconds or once new orders are ingested).
+        With the price refresher running, its snapshot is used whenever it is recent enough;
+        block=False never fetches and returns the refresher's latest snapshot for the current
+        orders, whatever its age (None until the first one is ready).
+        """
+        if not self.turn_state.open:
+            self.begin_turn()
+        state = self.turn_state
+
+        snapshot = state.snapshot
+        if not refresh and self._reusable(snapshot):
+            return snapshot
+
+        background = self._background_snapshot()
+        if not refresh and background is not None and (not block or background.age < self.snapshot_max_age):
+            state.snapshot = self._for_turn(background)
+            return state.snapshot
+        if not block:
+            return None
+        return self._install_snapshot(self._take_snapshot())
+
+    def _background_snapshot(self):
+        refresher = self.price_refresher
+        snapshot = refresher.latest if refresher is not None else None
+        if snapshot is None or snapshot.data_version != self.data_context.version:
+            return None
+        return snapshot
+
+    def start_price_refresher(self, **kwargs):
+        """
+        Starts (once) a daemon thread that keeps a valuation snapshot current on a
+        market-hours-aware schedule (see live-data/price_refresher.py), along with the stored
+        daily closes behind the market-value figures. The sidebar then reads it instantly.
+        """
+        if self.price_refresher is None:
+            from price_refresher import PriceRefresher
+            self.price_refresher = PriceRefresher(self._refresh_in_background, **kwargs).start()
+        return self.price_refresher
+
+    def _refresh_in_background(self):
+        with span("background_refresh") as stage:
+            snapshot = self.live_agent.snapshot(self.data_context.holdings, data_version=self.data_context.version)
+            # Fetches today's missing daily bars here rather than in the next render
+            self.market_value_history()
+            stage.set(symbols=len(snapshot.details))
+        return snapshot
+
+    def refresh_prices(self, wait=10.0):
+        """
+        Explicit refresh (e.g. the sidebar button): new prices now. With the refresher running
+        it waits up to `wait` seconds for its next snapshot; otherwise fetches synchronously.
+        """
+        if self.price_refresher is not None and self.price_refresher.running:
+            self.price_refresher.refresh_now(wait=wait)
+            # Not in time: the next render picks it up
+            snapshot = self._background_snapshot()
+            if snapshot is not None:
+                snapshot = self.turn_state.snapshot = self._for_turn(snapshot)
+            return snapshot
+        return self.get_valuation(refresh=True)
+
+    def close(self, wait=None):
+        """Stops the background work owned by this orchestrator (the price refresher)."""
+        if self.price_refresher is not None:
+            self.price_refresher.stop(timeout=wait)
+
+    def _reusable(self, snapshot):
+        return (
+            self.memoize_valuation and snapshot is not None
+            and snapshot.turn == self.turn_state.turn
+            and snapshot.data_version == self.data_context.version
+            and snapshot.age < self.snapshot_max_age
+        )
+
+    def _take_snapshot(self):
+        # Safe to run on a worker thread: only reads the data context
+        with span("valuation"):
+            snapshot = self.live_agent.snapshot(self.data_context.holdings, data_version=self.data_context.version)
+        snapshot.turn = self.turn_state.turn
+        return snapshot
+
+    def _for_turn(self, snapshot):
+        # The refresher's snapshot is shared by every conversation: each one tags its own copy
+        snapshot = copy.copy(snapshot)
+        snapshot.turn = self.turn_state.turn
+        return snapshot
+
+    def _install_snapshot(self, snapshot):
+        state = self.turn_state
+        state.snapshot = snapshot
+        state.stats["price_fetches"] += 1
+        state.stats["price_fetch_seconds"] += snapshot.fetch_seconds
+        return snapshot
+
+    def ingest_orders(self, new_orders):
+        """
+        Adds new order rows (broker export layout) without reloading the history.
+        Agents read through data_context, so they see the update immediately.
+        """
+        new = self.data_context.append_orders(new_orders)
+        # The background snapshot valued the old holdings
+        if self.price_refresher is not None:
+            self.price_refresher.refresh_now()
+        return new
+
+    def _classify_intent(self, query):
+        """
+        Local classifier first (keyword rules + small model), LLM only when it is unsure.
+        """
+        start = time.perf_counter()
+        with span("classify_intent") as stage:
+            intent, source = self.intent_classifier.classify(query, fallback=self._classify_intent_llm)
+            stage.set(intent=intent, source=source)
+        self.turn_stats["intent_source"] = source
+        self.turn_stats["intent_seconds"] = time.perf_counter() - start
+        return intent
+
+    def _classify_intent_llm(self, query):
+        """
+        Uses LLM to classify the user query into one of the agent categories.
+        Categories: MATH, ANALYTICS, LIVE, PREDICT, EDU, CHAT (General)
+        """
+        try:
+            with span("classify_intent_llm", agent="intent"):
+                completion = self.client.chat.completions.create(**self._intent_request(query))
+            return self._parse_intent(completion.choices[0].message.content)
+        except Exception as e:
+            log("intent", f"Intent classification failed ({e}), defaulting to ANALYTICS", error=str(e), level=logging.WARNING)
             return "ANALYTICS" # Default fallback
 
-    def route_query(self, user_query):
-        intent = self._classify_intent(user_query)
-        print(f"DEBUG: Routing '{user_query}' to {intent}")
-        
+    async def _classify_intent_llm_async(self, query):
+        try:
+            with span("classify_intent_llm", agent="intent"):
+                completion = await self.async_client.chat.completions.create(**self._intent_request(query))
+            return self._parse_intent(completion.choices[0].message.content)
+        except Exception as e:
+            log("intent", f"Intent classification failed ({e}), defaulting to ANALYTICS", error=str(e), level=logging.WARNING)
+            return "ANALYTICS" # Default fallback
+
+    def _intent_request(self, query):
+        return dict(
+            model=self.model_name,
+            messages=[
+                {"role": "system", "content": INTENT_SYSTEM_PROMPT},
+                {"role": "user", "content": query}
+            ],
+            temperature=0,
+            max_tokens=10
+        )
+
+    @staticmethod
+    def _parse_intent(content):
+        intent = content.strip().upper()
+        # Clean up potentially messy output (e.g. "CATEGORY: MATH")
+        if "MATH" in intent: intent = "MATH"
+        elif "LIVE" in intent: intent = "LIVE"
+        elif "PREDICT" in intent: intent = "PREDICT"
+        elif "EDU" in intent: intent = "EDU"
+        elif "ANALYTICS" in intent: intent = "ANALYTICS"
+        elif "CHAT" in intent: intent = "CHAT"
+        return intent
+
+    def route_query(self, user_query, profile=None):
+        """
+        Answers one question. profile ("cprofile", "pyinstrument" or True) profiles this request;
+        the report is kept in last_profile and logged.
+        """
+        if not self.turn_state.open:
+            self.begin_turn()
+        with self._profiled(profile):
+            intent = self._classify_intent(user_query)
+            log("route", f"Routing '{user_query}' to {intent}", turn=self.turn_state.turn, intent=intent)
+            try:
+                with span("answer", intent=intent, agent=AGENT_BY_INTENT.get(intent, "analytics")):
+                    return self._route(intent, user_query)
+            finally:
+                self._end_turn(intent)
+
+    def route_query_stream(self, user_query, profile=None):
+        """
+        Streaming variant of route_query: yields the answer in pieces as soon as they are available.
+        LLM-backed answers (ANALYTICS, EDU and the fallback) are streamed token by token;
+        the others are computed locally and yielded in one piece.
+        """
+        if not self.turn_state.open:
+            self.begin_turn()
+        with self._profiled(profile):
+            intent = self._classify_intent(user_query)
+            log("route", f"Routing '{user_query}' (streaming) to {intent}", turn=self.turn_state.turn, intent=intent, stream=True)
+            first_token = None
+            try:
+                with span("answer", intent=intent, agent=AGENT_BY_INTENT.get(intent, "analytics"), stream=True):
+                    for piece in self._route_stream(intent, user_query):
+                        if first_token is None:
+                            first_token = time.perf_counter() - self.turn_stats["started"]
+                            self.turn_stats["first_token_seconds"] = first_token
+                        yield piece
+            finally:
+                self._end_turn(intent)
+
+    async def route_query_async(self, user_query):
+        """
+        Async variant of route_query for asyncio hosts.
+        The live valuation is fetched speculatively (on a worker thread) while the intent is
+        being classified, and discarded if the intent turns out not to need it. LLM calls go
+        through the async Groq clients; local work runs on worker threads.
+        """
+        if not self.turn_state.open:
+            self.begin_turn()
+
+        prefetch = None
+        if not self._reusable(self.turn_state.snapshot):
+            prefetch = asyncio.ensure_future(asyncio.to_thread(self._take_snapshot))
+
+        start = time.perf_counter()
+        with span("classify_intent") as stage:
+            intent, source = await self.intent_classifier.classify_async(user_query, fallback=self._classify_intent_llm_async)
+            stage.set(intent=intent, source=source)
+        self.turn_stats["intent_source"] = source
+        self.turn_stats["intent_seconds"] = time.perf_counter() - start
+        log("route", f"Routing '{user_query}' (async) to {intent}", turn=self.turn_state.turn, intent=intent, mode="async")
+
+        if intent == "MATH":
+            needs_valuation = "xirr" in user_query.lower()
+        else:
+            # LIVE, ANALYTICS and the analytics fallback for unknown intents use the live value
+            needs_valuation = intent not in ("PREDICT", "CHAT", "EDU")
+        try:
+            if prefetch is not None:
+                if needs_valuation and intent not in NON_LLM_INTENTS:
+                    # Analytics answer: build its prompt context while the prices are still coming in
+                    snapshot, _ = await asyncio.gather(prefetch, asyncio.to_thread(self.analytics_agent.prepare))
+                    self._install_snapshot(snapshot)
+                    self.turn_stats["speculative_valuation"] = "used"
+                elif needs_valuation:
+                    self._install_snapshot(await prefetch)
+                    self.turn_stats["speculative_valuation"] = "used"
+                else:
+                    # The thread cannot be interrupted; its result (and any error) is simply dropped
+                    prefetch.cancel()
+                    self.turn_stats["speculative_valuation"] = "discarded"
+            with span("answer", intent=intent, agent=AGENT_BY_INTENT.get(intent, "analytics"), mode="async"):
+                return await self._route_async(intent, user_query)
+        finally:
+            self._end_turn(intent)
+
+    async def _route_async(self, intent, user_query):
+        try:
+            if intent == "EDU":
+                return await self.edu_agent.explain_async(user_query)
+            if intent in NON_LLM_INTENTS:
+                return await asyncio.to_thread(self._route, intent, user_query)
+
+            if intent != "ANALYTICS":
+                log("unknown_intent", f"Unknown intent '{intent}', defaulting to ANALYTICS", intent=intent)
+            curr_val = self.get_valuation().total
+            return await self.analytics_agent.analyze_async(user_query, live_value=curr_val)
+        except Exception as e:
+            return f"An error occurred while processing your request: {e}"
+
+    def _route_stream(self, intent, user_query):
+        try:
+            if intent == "EDU":
+                yield from self.edu_agent.explain_stream(user_query)
+            elif intent in NON_LLM_INTENTS:
+                yield self._route(intent, user_query)
+            else:
+                if intent != "ANALYTICS":
+                    log("unknown_intent", f"Unknown intent '{intent}', defaulting to ANALYTICS", intent=intent)
+                curr_val = self.get_valuation().total
+                yield from self.analytics_agent.analyze_stream(user_query, live_value=curr_val)
+        except Exception as e:
+            yield f"An error occurred while processing your request: {e}"
+
+    def _route(self, intent, user_query):
         try:
             if intent == "MATH":
                 if "xirr" in user_query.lower():
+                    query = user_query.lower()
+                    if any(w in query for w in ("each", "per stock", "by stock", "holding", "stocks", "symbol")):
+                        return self._xirr_by_holding()
+                    if any(w in query for w in ("quarter", "trailing", "rolling", "1y", "3y", "year")):
+                        return self._rolling_xirr(query)
                     # Check if we can get current value from live agent
-                    curr_val, _ = self.live_agent.calculate_current_valuation(self.data_context.holdings)
+                    curr_val = self.get_valuation().total
                     if curr_val > 0:
                         xirr_val = self.math_agent.compute_xirr_with_terminal_value(curr_val)
                         return f"**XIRR Calculation**\n\nBased on your realized cash flows and a current portfolio value of ₹{curr_val:,.2f}:\n\nYour Portfolio XIRR is **{xirr_val:.2f}%**."
                     else:
                         return self.math_agent.calculate_xirr() # Will throw specific message
+                elif any(w in user_query.lower() for w in ("average price", "avg price", "cost basis", "average cost")):
+                    return self._fifo_cost_basis()
                 else:
                     # Provide stats summary
                     # For simple math queries like averages which aren't yet implemented in MathAgent specific methods
@@ -109,7 +582,8 @@ class Orchestrator:
 
             elif intent == "LIVE":
                 # User wants live data
-                val, details = self.live_agent.calculate_current_valuation(self.data_context.holdings)
+                snapshot = self.get_valuation()
+                val, details = snapshot.total, snapshot.details
                 if not details:
                      return "Could not fetch live data at the moment."
                 
@@ -126,9 +600,8 @@ class Orchestrator:
             
             elif intent == "ANALYTICS":
                 # Enrich with live context if possible
-                curr_val, _ = self.live_agent.calculate_current_valuation(self.data_context.holdings)
-                live_context = f"Current Live Portfolio Value: ₹{curr_val:,.2f}"
-                return self.analytics_agent.analyze(user_query, live_context)
+                curr_val = self.get_valuation().total
+                return self.analytics_agent.analyze(user_query, live_value=curr_val)
                 
             elif intent == "CHAT":
                 # Fallback / CHAT
@@ -136,10 +609,9 @@ class Orchestrator:
             
             else:
                  # If classification failed to match key categories but returned something else, default to Analytics
-                 print(f"DEBUG: Unknown intent '{intent}', defaulting to ANALYTICS")
-                 curr_val, _ = self.live_agent.calculate_current_valuation(self.data_context.holdings)
-                 live_context = f"Current Live Portfolio Value: ₹{curr_val:,.2f}"
-                 return self.analytics_agent.analyze(user_query, live_context)
+                 log("unknown_intent", f"Unknown intent '{intent}', defaulting to ANALYTICS", intent=intent)
+                 curr_val = self.get_valuation().total
+                 return self.analytics_agent.analyze(user_query, live_value=curr_val)
                  
         except Exception as e:
             return f"An error occurred while processing your request: {e}"
@@ -147,6 +619,50 @@ class Orchestrator:
         except Exception as e:
             return f"An error occurred while processing your request: {e}"
 
+    def _xirr_by_holding(self):
+        frame = self.math_agent.xirr_by_holding(self.get_valuation().live_prices)
+        if frame.empty:
+            return "No open holdings to calculate XIRR for."
+        response = "**XIRR by Holding**\n\nBased on each stock's cash flows and its current value:\n\n"
+        for sym, row in frame.iterrows():
+            rate = "n/a" if pd.isna(row['xirr']) else f"{row['xirr']:.2f}%"
+            response += f"- **{sym}**: {rate} (current value ₹{row['closing_value']:,.2f})\n"
+        return response
+
+    def _fifo_cost_basis(self):
+        frame = self.math_agent.fifo_holdings()
+        if frame.empty:
+            return "No open holdings."
+        response = "**Cost Basis (FIFO)**\n\nAverage price of the shares you still hold (oldest lots are sold first):\n\n"
+        for (sym, name), row in frame.sort_values('Total_Value', ascending=False).iterrows():
+            response += (f"- **{sym}** ({name}): {row['Quantity_Change']:,.0f} shares @ ₹{row['Avg_Price']:,.2f} "
+                         f"= ₹{row['Total_Value']:,.2f}\n")
+        return response
+
+    def _rolling_xirr(self, query):
+        # Last 8 quarters for quarterly questions, trailing 1Y/3Y otherwise
+        if "quarter" in query:
+            rates = self.math_agent.rolling_xirr(self.get_valuation().live_prices, ("Q",)).tail(8)
+        else:
+            rates = self.math_agent.rolling_xirr(self.get_valuation().live_prices, ("1Y", "3Y"))
+        response = ("**Rolling XIRR**\n\nPositions at the start/end of each window are valued at their last traded price "
+                    "(live price for the current one); quarters show the return over the quarter, not annualized:\n\n")
+        for window, rate in rates.items():
+            response += f"- **{window}**: {'n/a' if pd.isna(rate) else f'{rate:.2f}%'}\n"
+        return response
+
+    def market_value_history(self, update=True):
+        """
+        Daily market value series (see DataContext.market_value), None if it can't be built.
+        update=False only reads the stored closes (never the network).
+        """
+        try:
+            with span("market_value_history"):
+                return self.data_context.market_value(self.price_history, update=update)
+        except Exception as e:
+            log("market_value_history", f"Market value history unavailable ({e})", error=str(e), level=logging.WARNING)
+            return None
+
     def get_portfolio_stats(self):
         """
         Helper to return stats for the sidebar (similar to old Agent)
@@ -158,21 +674,32 @@ class Orchestrator:
         current_invested = self.data_context.portfolio['Cumulative_Investment'].iloc[-1]
         total_orders = len(self.data_context.df)
         
-        # 2. Live Stats
-        curr_market_val, _ = self.live_agent.calculate_current_valuation(self.data_context.holdings)
+        # 2. Live Stats (shares the current interaction's snapshot with route_query).
+        # With the background refresher the sidebar never waits for the price source.
+        background = self.price_refresher is not None and self.price_refresher.running
+        snapshot = self.get_valuation(block=not background)
+        if snapshot is None:
+            # First background snapshot not ready yet (it also brings the daily closes up to date)
+            return {
+                "current_value": current_invested,
+                "market_value": None,
+                "unrealized_pnl": None,
+                "pnl_percentage": None,
+                "total_orders": total_orders,
+                "six_month_growth": "Loading prices...",
+                "valuation_taken_at": None,
+                "valuation_age": None,
+            }
+        curr_market_val = snapshot.total
         
         # 3. Growth
         unrealized_pnl = curr_market_val - current_invested
         pnl_pct = (unrealized_pnl / current_invested * 100) if current_invested != 0 else 0
         
-        # 4. 6 Month Growth (Historical)
-        latest_date = self.data_context.portfolio.index.max()
-        six_months_ago = latest_date - pd.DateOffset(months=6)
-        if six_months_ago in self.data_context.portfolio.index:
-            val_now = self.data_context.portfolio.loc[latest_date, 'Cumulative_Investment']
-            val_then = self.data_context.portfolio.loc[six_months_ago, 'Cumulative_Investment']
-            six_month_growth = ((val_now - val_then) / val_then) * 100 if val_then != 0 else 0
-        else:
+        # 4. 6 Month Growth: return on the market value of the holdings, net of new money.
+        # The refresher keeps the stored closes current, so the render only reads them
+        six_month_growth = trailing_return(self.market_value_history(update=not background), months=6)
+        if six_month_growth is None:
             six_month_growth = "Insufficient data"
 
         return {
@@ -181,5 +708,7 @@ class Orchestrator:
             "unrealized_pnl": unrealized_pnl,
             "pnl_percentage": pnl_pct,
             "total_orders": total_orders,
-            "six_month_growth": six_month_growth
+            "six_month_growth": six_month_growth,
+            "valuation_age": snapshot.age,
+            "valuation_taken_at": snapshot.taken_at
         }
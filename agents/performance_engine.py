@@ -0,0 +1,246 @@
+import numpy as np
+import pandas as pd
+
+from agents.xirr_engine import WINDOW_YEARS, _rate
+
+# Benchmark index on Yahoo Finance, kept in the same local price store as the holdings
+BENCHMARK = "^NSEI"
+BENCHMARK_NAME = "Nifty 50"
+TRADING_DAYS = 252
+WINDOW_MONTHS = {"1M": 1, "3M": 3, "6M": 6}
+
+
+class DailyReturns:
+    """
+    The portfolio's market value and cash flows sampled on the benchmark's trading days, as
+    daily time-weighted returns next to the benchmark's, plus running sums of every quantity
+    the window statistics need. Any window's return, mean, variance and covariance are then
+    differences of two entries of these sums.
+    """
+
+    def __init__(self, series, benchmark_close):
+        first, last = series.index[0], series.index[-1]
+        bench = benchmark_close.loc[first:last]
+        if len(bench) >= 2:
+            days = bench.index
+        else:
+            # No benchmark history: weekdays, with the benchmark figures left as NaN
+            days = series.index[series.index.dayofweek < 5]
+            bench = pd.Series(np.nan, index=days)
+        pos = series.index.get_indexer(days)
+        self.days = days
+        self.market_value = series['Market_Value'].to_numpy(dtype=float)[pos]
+
+        # Cash in/out since the previous trading day (weekend/holiday trades land on the next one)
+        def since_previous(column):
+            return np.diff(series[column].to_numpy(dtype=float).cumsum()[pos], prepend=0.0)
+
+        bought, sold = since_previous('Bought'), since_previous('Sold')
+        self.flows = bought - sold
+        self.benchmark = bench.to_numpy(dtype=float)
+
+        # Purchases at the start of the day, proceeds at the end:
+        # r_t = (MV_t + sold_t) / (MV_t-1 + bought_t) - 1, 0 while nothing is invested
+        base = np.r_[0.0, self.market_value[:-1]] + bought
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = np.where(base > 0, (self.market_value + sold) / base - 1, 0.0)
+        b = np.r_[0.0, self.benchmark[1:] / self.benchmark[:-1] - 1]
+        self.r = np.clip(np.nan_to_num(r), -0.99, None)
+        self.b = b
+        d = self.r - b
+
+        self.growth = np.cumsum(np.log1p(self.r))
+        self.bench_growth = np.cumsum(np.log1p(b))
+        self.sums = {name: np.cumsum(x) for name, x in (
+            ("r", self.r), ("b", b), ("rb", self.r * b), ("bb", b * b), ("d", d), ("dd", d * d),
+        )}
+
+    def locate(self, day):
+        """Index of the last trading day on or before day (0 if before the first one)."""
+        return max(int(self.days.searchsorted(pd.Timestamp(day), side="right")) - 1, 0)
+
+
+def _drawdown(growth):
+    """Deepest fall (%) from a running peak of a log-growth path."""
+    if len(growth) < 2:
+        return 0.0
+    wealth = np.exp(growth - growth[0])
+    return float((wealth / np.maximum.accumulate(wealth) - 1).min() * 100)
+
+
+class PerformanceEngine:
+    """
+    Portfolio performance against a benchmark index (Nifty 50) over arbitrary windows:
+    time-weighted return (TWR, what the holdings earned regardless of when money came in),
+    money-weighted return (MWR, XIRR of the actual cash flows), Jensen's alpha and beta on
+    daily returns, annualized tracking error and maximum drawdown.
+
+    Built on DataContext.market_value and the local PriceHistoryStore: the daily series are
+    prepared once per orders version / stored prices / day, and every window is then a few
+    array lookups. Windows of a year or more report annualized returns.
+    """
+
+    def __init__(self, data, price_history, benchmark=BENCHMARK, benchmark_name=BENCHMARK_NAME, risk_free=0.0):
+        self.data = data
+        self.price_history = price_history
+        self.benchmark = benchmark
+        self.benchmark_name = benchmark_name
+        # Annual risk-free rate used for alpha
+        self.risk_free = risk_free
+        self._returns = None
+        self._cache_key = None
+        self._cache = {}
+
+    def _state(self):
+        store = self.price_history
+        return (self.data.version, id(store), store.version, store.today())
+
+    @property
+    def returns(self):
+        """DailyReturns for the current data and prices (None without orders)."""
+        if self._returns is None or self._returns[0] != self._state():
+            series = self.data.market_value(self.price_history)
+            returns = None
+            if series is not None and len(series) >= 2:
+                self.price_history.update([self.benchmark], series.index[0])
+                returns = DailyReturns(series, self.price_history.history(self.benchmark)['Close'])
+            # Read the state after the updates above so the next call is a hit
+            self._returns = (self._state(), returns)
+        return self._returns[1]
+
+    def windows(self, spec=("LQ", "6M", "YTD", "1Y", "3Y", "5Y", "ALL"), as_of=None):
+        """
+        [(label, start, end)] for trailing windows ("1M", "3M", "6M", "1Y", "3Y", "5Y", "10Y"),
+        "YTD", "LQ" (last complete quarter), "ALL" (since the first trade), "Q" (every calendar
+        quarter) and "Y" (every calendar year), ending as_of (default: the last day of the series).
+        Trailing windows longer than the history are left out; the first quarter/year starts
+        at the first trade.
+        """
+        returns = self.returns
+        if returns is None:
+            return []
+        first = returns.days[0]
+        as_of = pd.Timestamp(as_of).normalize() if as_of is not None else returns.days[-1]
+        result = []
+        for item in spec:
+            if item in WINDOW_YEARS or item in WINDOW_MONTHS:
+                offset = (pd.DateOffset(years=WINDOW_YEARS[item]) if item in WINDOW_YEARS
+                          else pd.DateOffset(months=WINDOW_MONTHS[item]))
+                if as_of - offset >= first:
+                    result.append((f"Trailing {item}", as_of - offset, as_of))
+            elif item == "ALL":
+                result.append((f"Since inception ({first.date()})", first, as_of))
+            elif item == "YTD":
+                result.append(("YTD", max(pd.Timestamp(year=as_of.year, month=1, day=1) - pd.Timedelta(days=1), first), as_of))
+            elif item == "LQ":
+                quarter = as_of.to_period('Q') - 1
+                result.append((f"Last quarter ({quarter})", max(quarter.start_time - pd.Timedelta(days=1), first),
+                               quarter.end_time.normalize()))
+            elif item in ("Q", "Y"):
+                for period in pd.period_range(first, as_of, freq=item.replace("Y", "Y-DEC")):
+                    start = max(period.start_time - pd.Timedelta(days=1), first)
+                    result.append((str(period), start, min(period.end_time.normalize(), as_of)))
+            else:
+                raise ValueError(f"Unknown performance window '{item}'")
+        return result
+
+    def metrics(self, spec=("LQ", "6M", "YTD", "1Y", "3Y", "5Y", "ALL"), as_of=None):
+        """One row per window (see windows()); returns and drawdowns in %."""
+        key = (tuple(spec), as_of)
+        state = self._state()
+        if state != self._cache_key:
+            self._cache_key, self._cache = state, {}
+        if key not in self._cache:
+            self._cache[key] = self._metrics(self.windows(spec, as_of))
+            # windows() may have refreshed the prices; keep the entry under the state it was computed for
+            self._cache_key = self._state()
+        return self._cache[key]
+
+    def _metrics(self, windows):
+        returns = self.returns
+        labels = [label for label, _, _ in windows]
+        if returns is None or not windows:
+            return pd.DataFrame(index=pd.Index(labels, name='Window'))
+
+        a = np.array([returns.locate(start) for _, start, _ in windows])
+        b = np.array([returns.locate(end) for _, _, end in windows])
+        n = b - a
+        span = (returns.days[b] - returns.days[a]).days.to_numpy()
+        annualized = span >= 365
+
+        def window_sum(name):
+            sums = returns.sums[name]
+            return sums[b] - sums[a]
+
+        # Returns compound as differences of the cumulative log growth
+        twr = np.exp(returns.growth[b] - returns.growth[a])
+        bench = np.exp(returns.bench_growth[b] - returns.bench_growth[a])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            years = span / 365
+            twr = np.where(annualized, twr ** (1 / years), twr) - 1
+            bench = np.where(annualized, bench ** (1 / years), bench) - 1
+
+            # Moments of the daily returns inside each window
+            mean_r, mean_b, mean_d = window_sum("r") / n, window_sum("b") / n, window_sum("d") / n
+            cov = (window_sum("rb") - n * mean_r * mean_b) / (n - 1)
+            var_b = (window_sum("bb") - n * mean_b ** 2) / (n - 1)
+            var_d = (window_sum("dd") - n * mean_d ** 2) / (n - 1)
+            beta = np.where(var_b > 0, cov / var_b, np.nan)
+            rf = self.risk_free / TRADING_DAYS
+            alpha = ((mean_r - rf) - beta * (mean_b - rf)) * TRADING_DAYS
+            tracking_error = np.sqrt(np.clip(var_d, 0, None)) * np.sqrt(TRADING_DAYS)
+        short = n < 2
+        beta[short] = alpha[short] = tracking_error[short] = np.nan
+
+        mwr = np.full(len(windows), np.nan)
+        drawdown = np.full(len(windows), np.nan)
+        bench_drawdown = np.full(len(windows), np.nan)
+        dates = returns.days.to_numpy().astype('datetime64[D]')
+        for i, (lo, hi) in enumerate(zip(a, b)):
+            if hi <= lo:
+                continue
+            drawdown[i] = _drawdown(returns.growth[lo:hi + 1])
+            bench_drawdown[i] = _drawdown(returns.bench_growth[lo:hi + 1])
+            # Investor's view: opening value paid in, each day's net investment, closing value received
+            amounts = np.concatenate([[-returns.market_value[lo]], -returns.flows[lo + 1:hi + 1],
+                                      [returns.market_value[hi]]])
+            flow_dates = np.concatenate([dates[lo:hi + 1], dates[hi:hi + 1]])
+            if np.any(amounts < 0) and np.any(amounts > 0):
+                mwr[i] = _rate(flow_dates, amounts, None if annualized[i] else int(span[i]))
+
+        return pd.DataFrame({
+            'start': returns.days[a],
+            'end': returns.days[b],
+            'annualized': annualized,
+            'twr': twr * 100,
+            'benchmark': bench * 100,
+            'excess': (twr - bench) * 100,
+            'mwr': mwr,
+            'alpha': alpha * 100,
+            'beta': beta,
+            'tracking_error': tracking_error * 100,
+            'max_drawdown': drawdown,
+            'benchmark_drawdown': bench_drawdown,
+        }, index=pd.Index(labels, name='Window'))
+
+    def context(self, spec=("LQ", "6M", "YTD", "1Y", "3Y", "5Y", "ALL"), as_of=None, quarters=4):
+        """
+        Compact CSV of the metrics for an LLM prompt: the given windows plus the last few
+        calendar quarters. Empty string when nothing can be computed.
+        """
+        table = self.metrics(spec, as_of)
+        if quarters:
+            table = pd.concat([table, self.metrics(("Q",), as_of).tail(quarters)])
+        if table.empty:
+            return ""
+        out = pd.DataFrame({
+            'window': table.index,
+            'from': table['start'].dt.strftime('%Y-%m-%d'),
+            'to': table['end'].dt.strftime('%Y-%m-%d'),
+            'ann': np.where(table['annualized'], 'Y', 'N'),
+        })
+        for column, name in (('twr', 'twr%'), ('benchmark', 'bench%'), ('excess', 'excess%'), ('mwr', 'mwr%'),
+                             ('alpha', 'alpha%'), ('beta', 'beta'), ('tracking_error', 'te%'),
+                             ('max_drawdown', 'maxdd%'), ('benchmark_drawdown', 'bench_maxdd%')):
+            out[name] = table[column].round(2).to_numpy()
+        return out.to_csv(index=False, na_rep='').strip()
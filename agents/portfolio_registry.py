@@ -0,0 +1,271 @@
+import os
+import sys
+import json
+import threading
+import functools
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+
+# The shared price history store lives in live-data
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "live-data"))
+from agents.orchestrator import Orchestrator, DEFAULT_ORDER_HISTORY
+from agents.education_agent import EducationAgent
+from agents.intent_classifier import IntentClassifier
+from agents.llm_client import get_llm_client
+from agents.llm_cache import get_response_cache
+from data_context import DataContext
+from price_history import get_price_history
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TENANT = "default"
+# Order-history exports a tenant directory may contain
+SOURCE_EXTENSIONS = (".xlsx", ".csv")
+# Identity whose accounts (in an access map) are open to everyone, signed in or not
+PUBLIC = "*"
+
+
+@functools.lru_cache(maxsize=None)
+def _is_repo_module(name):
+    # Built-in modules have no file (and must not resolve to the working directory)
+    path = getattr(sys.modules.get(name), "__file__", None)
+    return bool(path) and os.path.abspath(path).startswith(ROOT)
+
+
+def _is_repo_object(obj):
+    """True for instances of classes defined in this repo (agents, engines, DataContext, ...)."""
+    return _is_repo_module(type(obj).__module__)
+
+
+def estimate_footprint(obj, skip=()):
+    """
+    Approximate bytes held by an Orchestrator and everything it caches: pandas objects
+    (deep), numpy arrays and strings, found by walking the attributes of this repo's
+    objects and the containers they hold. Objects in skip (shared across tenants) and
+    anything they reference are not counted.
+    """
+    seen = {id(o) for o in skip}
+    stack, total = [obj], 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if isinstance(item, (pd.DataFrame, pd.Series)):
+            total += int(np.sum(item.memory_usage(deep=True, index=True)))
+        elif isinstance(item, pd.Index):
+            total += item.memory_usage(deep=True)
+        elif isinstance(item, np.ndarray):
+            total += item.nbytes
+        elif isinstance(item, (str, bytes)):
+            total += sys.getsizeof(item)
+        elif isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif _is_repo_object(item) and hasattr(item, "__dict__"):
+            stack.extend(vars(item).values())
+    return total
+
+
+class PortfolioRegistry:
+    """
+    One Orchestrator per user/account id, built on first access from that tenant's order
+    history (an .xlsx/.csv export, or a callable returning a DataContext).
+
+    Only a bounded working set is kept: tenants are sized with estimate_footprint when they
+    are visited and again at the next visit to any tenant (their caches grow while they answer),
+    and the least recently used ones are dropped until the total fits max_bytes. An evicted tenant is simply rebuilt on its
+    next visit, from the Parquet data cache when its export hasn't changed.
+
+    What doesn't depend on the portfolio is built once and shared by every tenant: the pooled
+    LLM client, the education agent, the fitted intent classifier and the local price history.
+
+    access maps an identity (e.g. a signed-in user's email) to the tenant ids it may open, with
+    PUBLIC ("*") for accounts open to everyone; without one only DEFAULT_TENANT is served.
+    """
+
+    def __init__(self, sources=None, max_bytes=512 * 2 ** 20, max_tenants=None, llm_client=None,
+                 price_history=None, cache_dir=None, access=None, **orchestrator_kwargs):
+        self.sources = dict(sources or {})
+        self.access = None if access is None else {identity: list(ids) for identity, ids in access.items()}
+        self.max_bytes = max_bytes
+        self.max_tenants = max_tenants
+        self.cache_dir = cache_dir
+        self.orchestrator_kwargs = orchestrator_kwargs
+
+        self.llm_client = llm_client or get_llm_client()
+        self.price_history = price_history or get_price_history()
+        self.edu_agent = EducationAgent(llm_client=self.llm_client)
+        self.intent_classifier = IntentClassifier()
+        # Not counted in any tenant's footprint (the response cache is process-wide already)
+        self._shared = (self.llm_client, self.llm_client.aio, self.price_history, self.edu_agent,
+                        self.intent_classifier, get_response_cache())
+
+        # tenant -> [orchestrator, footprint], least recently used first
+        self._resident = OrderedDict()
+        self._building = {}
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(("hits", "loads", "evictions"), 0)
+
+    @classmethod
+    def from_directory(cls, directory, **kwargs):
+        """Every order-history export in directory, keyed by its file name without extension."""
+        sources = {}
+        for name in sorted(os.listdir(directory)):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() in SOURCE_EXTENSIONS:
+                sources.setdefault(stem, os.path.join(directory, name))
+        return cls(sources, **kwargs)
+
+    def register(self, tenant_id, source):
+        """Maps tenant_id to an order-history path (or a callable returning a DataContext)."""
+        with self._lock:
+            self.sources[tenant_id] = source
+            # A new source replaces whatever was built from the old one
+            self._close(self._resident.pop(tenant_id, None))
+
+    def tenants(self):
+        return list(self.sources)
+
+    def __contains__(self, tenant_id):
+        return tenant_id in self.sources
+
+    def accounts_for(self, identity=None):
+        """Tenant ids identity (None when not signed in) may open, in registration order."""
+        if self.access is None:
+            allowed = {DEFAULT_TENANT}
+        else:
+            allowed = set(self.access.get(PUBLIC, ()))
+            if identity:
+                allowed.update(self.access.get(identity, ()))
+        return [tenant_id for tenant_id in self.sources if tenant_id in allowed]
+
+    @property
+    def requires_login(self):
+        """True when some accounts are only open to signed-in identities."""
+        return self.access is not None and any(identity != PUBLIC for identity in self.access)
+
+    def get(self, tenant_id):
+        """The tenant's Orchestrator, built on first access (KeyError for unknown tenants)."""
+        with self._lock:
+            # The previous visit has (probably) finished its turn: its caches are sized again below
+            previous = next(reversed(self._resident), None)
+            entry = self._resident.get(tenant_id)
+            if entry is not None:
+                self._resident.move_to_end(tenant_id)
+                self._counters["hits"] += 1
+                orchestrator = entry[0]
+            elif tenant_id not in self.sources:
+                raise KeyError(f"Unknown portfolio '{tenant_id}'")
+            else:
+                # One build per tenant; concurrent first visits wait for it outside the registry lock
+                building = self._building.get(tenant_id)
+                owner = building is None
+                if owner:
+                    building = self._building[tenant_id] = threading.Lock()
+                    building.acquire()
+                orchestrator = None
+
+        if orchestrator is None:
+            if not owner:
+                with building:
+                    pass
+                return self.get(tenant_id)
+            try:
+                orchestrator = self._build(tenant_id)
+                with self._lock:
+                    self._resident[tenant_id] = [orchestrator, 0]
+                    self._counters["loads"] += 1
+            finally:
+                with self._lock:
+                    del self._building[tenant_id]
+                building.release()
+
+        self._enforce(tenant_id, previous)
+        return orchestrator
+
+    def _build(self, tenant_id):
+        source = self.sources[tenant_id]
+        data = source() if callable(source) else DataContext.from_file(source, cache_dir=self.cache_dir)
+        return Orchestrator(data_context=data, llm_client=self.llm_client, price_history=self.price_history,
+                            edu_agent=self.edu_agent, intent_classifier=self.intent_classifier,
+                            **self.orchestrator_kwargs)
+
+    def _enforce(self, keep, previous=None):
+        with self._lock:
+            # Only the tenants in use can have grown; the others keep the size measured on their last visit
+            for tenant_id in dict.fromkeys((previous, keep)):
+                entry = self._resident.get(tenant_id)
+                if entry is not None:
+                    entry[1] = estimate_footprint(entry[0], skip=self._shared)
+            total = sum(footprint for _, footprint in self._resident.values())
+            for tenant_id in list(self._resident):
+                over_tenants = self.max_tenants is not None and len(self._resident) > self.max_tenants
+                if total <= self.max_bytes and not over_tenants:
+                    break
+                if tenant_id == keep:
+                    continue
+                entry = self._resident.pop(tenant_id)
+                self._close(entry)
+                total -= entry[1]
+                self._counters["evictions"] += 1
+
+    @staticmethod
+    def _close(entry):
+        # Evicted tenants stop their background price refresher (without waiting for it)
+        if entry is not None:
+            entry[0].close(wait=0)
+
+    def evict(self, tenant_id):
+        with self._lock:
+            entry = self._resident.pop(tenant_id, None)
+        self._close(entry)
+        return entry is not None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["tenants"] = len(self.sources)
+            stats["resident"] = len(self._resident)
+            stats["resident_bytes"] = sum(footprint for _, footprint in self._resident.values())
+            stats["max_bytes"] = self.max_bytes
+            return stats
+
+
+_shared_registry = None
+_shared_lock = threading.Lock()
+
+
+def get_portfolio_registry():
+    """
+    The process-wide PortfolioRegistry: the bundled stock_order_history.xlsx as "default",
+    plus every export in PORTFOLIO_DIR (if set). PORTFOLIO_REGISTRY_MB bounds the working set.
+    PORTFOLIO_ACCESS is a JSON file mapping identities to the tenant ids they may open,
+    e.g. {"alice@example.com": ["alice"], "*": ["demo"]}; without it only "default" is served.
+    """
+    global _shared_registry
+    with _shared_lock:
+        if _shared_registry is None:
+            max_bytes = int(float(os.getenv("PORTFOLIO_REGISTRY_MB", "512")) * 2 ** 20)
+            access = None
+            access_path = os.getenv("PORTFOLIO_ACCESS")
+            if access_path:
+                with open(access_path, "r", encoding="utf-8") as f:
+                    access = json.load(f)
+            directory = os.getenv("PORTFOLIO_DIR")
+            if directory and os.path.isdir(directory):
+                registry = PortfolioRegistry.from_directory(directory, max_bytes=max_bytes, access=access)
+            else:
+                registry = PortfolioRegistry(max_bytes=max_bytes, access=access)
+            if DEFAULT_TENANT not in registry and os.path.exists(DEFAULT_ORDER_HISTORY):
+                registry.sources[DEFAULT_TENANT] = DEFAULT_ORDER_HISTORY
+            _shared_registry = registry
+        return _shared_registry
+
+
+def set_portfolio_registry(registry):
+    global _shared_registry
+    with _shared_lock:
+        _shared_registry = registry
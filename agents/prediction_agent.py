@@ -1,49 +1,51 @@
-import numpy as np
-import pandas as pd
-from sklearn.linear_model import LinearRegression
 import sys
 import os
 
-# Add wrapper to fetch history if needed. 
-# For now we might assume we predict on Portfolio Value history or a specific stock
-# If specific stock, we need to fetch history.
-# Let's rely on LiveDataAgent (live_market) to fetch history or use portfolio history.
+# Daily closes come from the local price history store (live-data)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "live-data"))
+from price_history import get_price_history
+from agents.forecast_engine import ForecastEngine, HORIZONS, TRADING_DAYS
 
 class PredictionAgent:
-    def __init__(self, data_processor):
-        self.portfolio_history = data_processor.portfolio
-        
+    def __init__(self, data_processor, price_history=None, n_paths=10_000, seed=None):
+        self.data = data_processor
+        # Correlated Monte Carlo over the holdings, fitted to their stored daily closes
+        self.forecast_engine = ForecastEngine(data_processor, price_history or get_price_history())
+        self.n_paths = n_paths
+        self.seed = seed
+
+    @property
+    def portfolio_history(self):
+        return self.data.portfolio
+
     def predict_portfolio_trend(self, days=30):
         """
-        Predicts future portfolio value based on historical cumulative investment trend.
-        Uses simple Linear Regression.
+        Forecasts the portfolio's market value as percentile bands (Monte Carlo over the
+        holdings' fitted daily returns), for the standard horizons plus `days` calendar days.
         """
         try:
-            # Prepare data: X = Days since start, Y = Cumulative Value
-            df = self.portfolio.copy()
-            if df.empty:
+            horizons = dict(HORIZONS)
+            trading_days = max(1, round(days * TRADING_DAYS / 365))
+            if trading_days not in horizons.values():
+                horizons[f"{days} days"] = trading_days
+            table = self.forecast_engine.forecast(horizons, n_paths=self.n_paths, seed=self.seed)
+            if table is None:
                 return "Not enough data to predict."
-                
-            df['Days'] = (df.index - df.index[0]).days
-            
-            X = df[['Days']].values
-            y = df['Cumulative_Investment'].values
-            
-            # Train Model
-            model = LinearRegression()
-            model.fit(X, y)
-            
-            # Predict
-            last_day = X[-1][0]
-            future_days = np.array([[last_day + i] for i in range(1, days + 1)])
-            predictions = model.predict(future_days)
-            
-            # Format result
-            start_pred = predictions[0]
-            end_pred = predictions[-1]
-            trend = "Upward" if end_pred > start_pred else "Downward"
-            
-            return f"Based on historical trend (Linear Regression), your portfolio is projected to trend **{trend}**. \nExpected Value in 30 days: ₹{end_pred:,.2f}"
-            
+
+            model = self.forecast_engine.model
+            response = (f"**Portfolio Forecast** (Monte Carlo, {self.n_paths:,} simulated paths of correlated daily returns "
+                        f"fitted to the last {self.forecast_engine.lookback_years} years of prices)\n\n"
+                        f"Current market value: ₹{model.value:,.2f}\n\n"
+                        "| Horizon | Pessimistic (5%) | Lower (25%) | Median | Upper (75%) | Optimistic (95%) | Chance of loss |\n"
+                        "|---|---|---|---|---|---|---|\n")
+            for horizon, row in table.iterrows():
+                response += (f"| {horizon} | ₹{row['p5']:,.0f} | ₹{row['p25']:,.0f} | ₹{row['p50']:,.0f} | "
+                             f"₹{row['p75']:,.0f} | ₹{row['p95']:,.0f} | {row['prob_loss']:.0%} |\n")
+            unfitted = int((~model.fitted).sum())
+            if unfitted:
+                response += f"\n_{unfitted} holding(s) have too little price history and use typical market behaviour._\n"
+            response += "\n_Ranges come from past volatility and correlations; they are not guarantees._"
+            return response
+
         except Exception as e:
             return f"Error predicting trend: {e}"
@@ -0,0 +1,399 @@
+import os
+import sys
+import json
+import logging
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histograms
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PREFIX = "portfolio_"
+
+# Trace of the current interaction and the agent whose work is running (labels LLM metrics)
+_current_trace = contextvars.ContextVar("telemetry_trace", default=None)
+_current_agent = contextvars.ContextVar("telemetry_agent", default=None)
+
+# Where log() goes while telemetry is disabled
+logger = logging.getLogger("portfolio")
+
+
+class _NoopSpan:
+    """What span() returns while telemetry is disabled: does nothing, allocates nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """Times one stage; recorded into the stage histogram and the current trace (if any)."""
+
+    __slots__ = ("telemetry", "name", "attrs", "trace", "depth", "start", "seconds", "_agent_token")
+
+    def __init__(self, telemetry, name, attrs):
+        self.telemetry = telemetry
+        self.name = name
+        self.attrs = attrs
+        self.trace = _current_trace.get()
+        self.depth = 0
+        self._agent_token = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        if "agent" in self.attrs:
+            self._agent_token = _current_agent.set(self.attrs["agent"])
+        if self.trace is not None:
+            self.depth = self.trace.enter()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+            self.telemetry.count("stage_errors_total", stage=self.name, error=exc_type.__name__)
+        if self._agent_token is not None:
+            _reset(_current_agent, self._agent_token)
+        if self.trace is not None:
+            self.trace.exit(self)
+        self.telemetry.observe("stage_seconds", self.seconds, stage=self.name)
+        return False
+
+
+def _reset(var, token):
+    try:
+        var.reset(token)
+    except ValueError:
+        # Ended in another context (e.g. a stream closed by the garbage collector)
+        var.set(None)
+
+
+class Trace:
+    """The spans of one interaction, in completion order, with their nesting depth."""
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.spans = []
+        self._depth = 0
+        self._lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            self._depth += 1
+            return self._depth
+
+    def exit(self, span):
+        record = {"name": span.name, "ms": round(span.seconds * 1000, 3), "depth": span.depth}
+        record.update(span.attrs)
+        with self._lock:
+            self._depth -= 1
+            self.spans.append(record)
+
+
+class Telemetry:
+    """
+    Lightweight instrumentation of the query pipeline:
+
+    - span(name, **attrs): times a stage (classification, live prices, loading orders, the
+      answering agent, LLM calls); spans inside a trace (one per interaction) are logged with it.
+    - count / observe: labelled counters and latency histograms (LLM requests, tokens and
+      latency per agent and model, price quotes by status and cache outcome, turns by intent).
+    - Structured JSON log lines (one per interaction and per event) to log_path ("-" = stdout).
+    - Prometheus text format: prometheus(), written to prom_path after each interaction
+      and/or served on http://<host>:<port>/metrics by serve().
+    - profile(): a cProfile (or pyinstrument) report around any block, e.g. one request.
+
+    Disabled (the default), span() returns a shared no-op object and count/observe return at
+    once; log() goes to the "portfolio" logger at the given level (DEBUG by default, which
+    is silent unless configured; failures are logged at WARNING so they always show).
+    """
+
+    def __init__(self, enabled=False, log_path="-", prom_path=None, prom_interval=1.0):
+        self.enabled = enabled
+        self.log_path = log_path
+        self.prom_path = prom_path
+        self.prom_interval = prom_interval
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+        self._log_file = None
+        self._prom_written = 0.0
+        self._server = None
+
+    @classmethod
+    def from_env(cls):
+        """TELEMETRY=1 enables it; TELEMETRY_LOG (path or "-") and TELEMETRY_PROM_FILE set the sinks."""
+        enabled = os.getenv("TELEMETRY", "").lower() in ("1", "true", "yes", "on")
+        return cls(enabled, log_path=os.getenv("TELEMETRY_LOG", "-"), prom_path=os.getenv("TELEMETRY_PROM_FILE") or None)
+
+    # --- spans and traces -------------------------------------------------------------
+
+    def span(self, name, **attrs):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def start_trace(self, name, **attrs):
+        """Starts the trace of an interaction in the current context (replacing any open one)."""
+        if not self.enabled:
+            return None
+        trace = Trace(name, attrs)
+        _current_trace.set(trace)
+        return trace
+
+    def finish_trace(self, trace, **fields):
+        """Logs the trace with its spans, then writes the Prometheus file (if configured)."""
+        if trace is None:
+            return
+        if _current_trace.get() is trace:
+            _current_trace.set(None)
+        seconds = time.perf_counter() - trace.start
+        self.observe("trace_seconds", seconds, trace=trace.name)
+        record = {"ts": trace.started, "event": trace.name, "ms": round(seconds * 1000, 3)}
+        record.update(trace.attrs)
+        record.update(fields)
+        record["spans"] = trace.spans
+        self._write(record)
+        self.write_prometheus()
+
+    # --- metrics ----------------------------------------------------------------------
+
+    def count(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [[0] * len(BUCKETS), 0, 0.0]
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    hist[0][i] += 1
+                    break
+            hist[1] += 1
+            hist[2] += seconds
+
+    def record_llm(self, model, seconds, usage=None, status="ok", stream=False):
+        """One LLM request, labelled with the agent of the enclosing span."""
+        if not self.enabled:
+            return
+        agent = _current_agent.get() or "unknown"
+        self.count("llm_requests_total", agent=agent, model=model, status=status, stream=str(stream).lower())
+        self.observe("llm_seconds", seconds, agent=agent, model=model)
+        for kind in ("prompt_tokens", "completion_tokens"):
+            tokens = getattr(usage, kind, None) if usage is not None else None
+            if tokens:
+                self.count("llm_tokens_total", tokens, agent=agent, model=model, kind=kind.split("_")[0])
+
+    def register_collector(self, name, collect):
+        """collect() -> {metric: number}, exported as gauges <name>_<metric> (e.g. cache stats)."""
+        with self._lock:
+            self._collectors[name] = collect
+
+    # --- export -----------------------------------------------------------------------
+
+    def snapshot(self):
+        """{counters, histograms} as plain dicts keyed by 'name{labels}'."""
+        with self._lock:
+            counters = {_series(name, labels): value for (name, labels), value in self._counters.items()}
+            histograms = {_series(name, labels): {"count": h[1], "sum": h[2]}
+                          for (name, labels), h in self._histograms.items()}
+        return {"counters": counters, "histograms": histograms}
+
+    def prometheus(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (list(h[0]), h[1], h[2])) for key, h in self._histograms.items())
+            collectors = list(self._collectors.items())
+
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {PREFIX}{name} counter")
+            lines.append(f"{PREFIX}{_series(name, labels)} {value}")
+        for (name, labels), (buckets, count, total) in histograms:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {PREFIX}{name} histogram")
+            cumulative = 0
+            for bound, n in zip(BUCKETS, buckets):
+                cumulative += n
+                lines.append(f"{PREFIX}{_series(name + '_bucket', labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{PREFIX}{_series(name + '_bucket', labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{PREFIX}{_series(name + '_sum', labels)} {total:.6f}")
+            lines.append(f"{PREFIX}{_series(name + '_count', labels)} {count}")
+        for source, collect in collectors:
+            try:
+                values = collect()
+            except Exception as e:
+                lines.append(f"# {source} unavailable: {e}")
+                continue
+            for key, value in sorted(values.items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"# TYPE {PREFIX}{source}_{key} gauge")
+                    lines.append(f"{PREFIX}{source}_{key} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path=None, force=False):
+        path = path or self.prom_path
+        if not path or not self.enabled:
+            return
+        now = time.monotonic()
+        if not force and now - self._prom_written < self.prom_interval:
+            return
+        self._prom_written = now
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(tmp_path, path)
+
+    def serve(self, port=9464, host="127.0.0.1"):
+        """Serves prometheus() on /metrics from a daemon thread (once); returns the server."""
+        if self._server is None:
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+            telemetry = self
+
+            class MetricsHandler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split("?")[0] != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = telemetry.prometheus().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass
+
+            self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+            threading.Thread(target=self._server.serve_forever, name="telemetry-metrics", daemon=True).start()
+        return self._server
+
+    # --- logs -------------------------------------------------------------------------
+
+    def log(self, event, message, level=logging.DEBUG, **fields):
+        """A structured JSON log line when enabled, a record on the "portfolio" logger otherwise."""
+        if not self.enabled:
+            logger.log(level, "%s: %s", event, message)
+            return
+        record = {"ts": time.time(), "event": event, "level": logging.getLevelName(level), "message": message}
+        record.update(fields)
+        self._write(record)
+
+    def _write(self, record):
+        line = json.dumps(record, default=str)
+        with self._log_lock:
+            if self.log_path in (None, "-"):
+                sys.stdout.write(line + "\n")
+                return
+            if self._log_file is None:
+                self._log_file = open(self.log_path, "a", encoding="utf-8")
+            self._log_file.write(line + "\n")
+            self._log_file.flush()
+
+    # --- profiling --------------------------------------------------------------------
+
+    @contextmanager
+    def profile(self, kind="cprofile", limit=25):
+        """
+        Profiles the block; the yielded dict gets "report" (text) when it exits. Works whether
+        or not telemetry is enabled. kind="pyinstrument" needs pyinstrument installed and
+        falls back to cProfile without it.
+        """
+        result = {"kind": kind, "report": None}
+        if kind == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                result["kind"] = kind = "cprofile"
+        if kind == "pyinstrument":
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield result
+            finally:
+                profiler.stop()
+                result["report"] = profiler.output_text(unicode=True)
+        else:
+            import cProfile
+            import io
+            import pstats
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield result
+            finally:
+                profiler.disable()
+                out = io.StringIO()
+                pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+                result["report"] = out.getvalue()
+
+
+def _series(name, labels):
+    if not labels:
+        return name
+    body = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+    return f"{name}{{{body}}}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_shared = Telemetry.from_env()
+
+
+def get_telemetry():
+    """The process-wide Telemetry (configured from the environment, see Telemetry.from_env)."""
+    return _shared
+
+
+def set_telemetry(telemetry):
+    global _shared
+    _shared = telemetry
+
+
+# Shortcuts used at the instrumentation points: one global lookup, no lock
+def span(name, **attrs):
+    if not _shared.enabled:
+        return NOOP_SPAN
+    return Span(_shared, name, attrs)
+
+
+def count(name, value=1, **labels):
+    if _shared.enabled:
+        _shared.count(name, value, **labels)
+
+
+def log(event, message, level=logging.DEBUG, **fields):
+    _shared.log(event, message, level, **fields)
@@ -0,0 +1,251 @@
+from datetime import date
+import numpy as np
+import pandas as pd
+from pyxirr import xirr
+
+WINDOW_YEARS = {"1Y": 1, "3Y": 3, "5Y": 5, "10Y": 10}
+
+
+class CashFlows:
+    """
+    The order history as cash flows, grouped once by symbol (each group in date order)
+    and once in plain date order for portfolio-level XIRR.
+    Amounts are signed like Value_Change: BUY is an outflow (-), SELL an inflow (+).
+    """
+
+    def __init__(self, df):
+        codes, symbols = pd.factorize(df['Symbol'].astype(str), sort=False)
+        self.symbols = pd.Index(symbols, name='Symbol')
+        days = df['Execution date and time'].to_numpy().astype('datetime64[D]').astype(np.int64)
+        amounts = df['Value_Change'].to_numpy(dtype=float)
+        qty = df['Quantity_Change'].to_numpy(dtype=float)
+        unit_price = (df['Value'].to_numpy(dtype=float) / df['Quantity'].to_numpy(dtype=float))
+
+        # Portfolio level (df is already in date order)
+        self.all_days = days
+        self.all_amounts = amounts
+
+        # Per symbol: contiguous, date-ordered groups
+        order = np.lexsort((days, codes))
+        self.codes = codes[order]
+        self.days = days[order]
+        self.dates = self.days.astype('datetime64[D]')
+        self.amounts = amounts[order]
+        self.unit_price = unit_price[order]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(symbols)))])
+        # Position held after each trade (running quantity within the symbol)
+        cum = np.concatenate([[0.0], np.cumsum(qty[order])])
+        self.position = cum[1:] - np.repeat(cum[self.offsets[:-1]], np.diff(self.offsets))
+        # Running sum of the flows, for the net flows of any slice
+        self.cum_amounts = np.concatenate([[0.0], np.cumsum(self.amounts)])
+        # (symbol code, day) keys so all group boundaries come from one searchsorted
+        self._keys = self.codes * (1 << 32) + self.days
+
+    def bounds(self, day, side="left"):
+        """Per symbol, the first flow position on/after day (left) or after day (right)."""
+        targets = np.arange(len(self.symbols), dtype=np.int64) * (1 << 32) + day
+        return np.searchsorted(self._keys, targets, side=side)
+
+    def state_at(self, end):
+        """
+        Per symbol, the position held and the last traded price just before flow position end
+        (0 and NaN where the symbol had no trades yet).
+        """
+        first = self.offsets[:-1]
+        traded = end > first
+        last = np.where(traded, end - 1, 0)
+        if not len(self.position):
+            return np.zeros(len(first)), np.full(len(first), np.nan)
+        position = np.where(traded, self.position[last], 0.0)
+        price = np.where(traded, self.unit_price[last], np.nan)
+        return position, price
+
+
+def _as_day(value):
+    return int(np.datetime64(pd.Timestamp(value).date(), 'D').astype(np.int64))
+
+
+def _rate(dates, amounts, period_days=None):
+    """
+    XIRR in percent; with period_days, the money-weighted return over that period instead
+    (not annualized, which would blow short windows out of proportion).
+    """
+    try:
+        result = xirr(dates, amounts)
+    except Exception:
+        return np.nan
+    if result is None:
+        return np.nan
+    if period_days is not None:
+        result = (1 + result) ** (period_days / 365) - 1
+    return result * 100
+
+
+class XirrEngine:
+    """
+    Batch XIRR over the order history: every symbol in one pass, trailing (1Y/3Y) and
+    quarterly windows, and the portfolio as a whole.
+
+    A window [start, end] is valued like a fund: the position held at the start is bought
+    at the start date, trades in the window are the flows, and the position held at the end
+    is sold on the end date. Positions are marked at the live price (current windows, when one
+    is passed) or else at the symbol's last traded price from the order history, since the
+    sheet has no historical prices.
+
+    Cash flows are rebuilt only when the data context changes; results are cached until
+    the data, the prices or the as-of date change.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self._flows = None
+        self._cache_key = None
+        self._cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def flows(self):
+        if self._flows is None or self._flows[0] != self.data.version:
+            self._flows = (self.data.version, CashFlows(self.data.df))
+        return self._flows[1]
+
+    def _cached(self, key, prices, as_of, compute):
+        state = (self.data.version, tuple(sorted((prices or {}).items())), as_of)
+        if state != self._cache_key:
+            self._cache_key, self._cache = state, {}
+        if key in self._cache:
+            self.hits += 1
+            return self._cache[key]
+        self.misses += 1
+        self._cache[key] = result = compute()
+        return result
+
+    @staticmethod
+    def _as_of(as_of):
+        return _as_day(as_of if as_of is not None else date.today())
+
+    def _marks(self, flows, price, prices, live):
+        if not live or not prices:
+            return price
+        live_price = pd.Series(prices, dtype=float).reindex(flows.symbols).to_numpy()
+        return np.where(live_price > 0, live_price, price)
+
+    def by_symbol(self, prices=None, start=None, end=None, as_of=None, annualize=True):
+        """
+        XIRR (%) per symbol over [start, end] (whole history / as_of when None), with the opening
+        value, net trade flows and closing value that went into it. NaN where the symbol had
+        no position and no trades in the window. annualize=False gives the return over the
+        window instead.
+        """
+        as_of = self._as_of(as_of)
+        key = ("symbols", start, end, annualize)
+        return self._cached(key, prices, as_of, lambda: self._by_symbol(prices, start, end, as_of, annualize))
+
+    def _by_symbol(self, prices, start, end, as_of, annualize):
+        flows = self.flows
+        start_day = _as_day(start) if start is not None else None
+        end_day = min(_as_day(end), as_of) if end is not None else as_of
+        live = end_day == as_of
+        period = None if annualize or start_day is None else end_day - start_day
+
+        a = flows.bounds(start_day) if start_day is not None else flows.offsets[:-1]
+        b = flows.bounds(end_day, side="right")
+        open_qty, open_price = flows.state_at(a)
+        close_qty, close_price = flows.state_at(b)
+        close_price = self._marks(flows, close_price, prices, live)
+        opening = np.where(open_qty != 0, open_qty * open_price, 0.0)
+        closing = np.where(close_qty != 0, close_qty * close_price, 0.0)
+
+        rates = np.full(len(flows.symbols), np.nan)
+        start_date = np.array([start_day if start_day is not None else 0], dtype='datetime64[D]')
+        end_date = np.array([end_day], dtype='datetime64[D]')
+        for code in np.flatnonzero((b > a) | (opening != 0)):
+            dates, amounts = flows.dates[a[code]:b[code]], flows.amounts[a[code]:b[code]]
+            if opening[code]:
+                dates = np.concatenate([start_date, dates])
+                amounts = np.concatenate([[-opening[code]], amounts])
+            if closing[code]:
+                dates = np.concatenate([dates, end_date])
+                amounts = np.concatenate([amounts, [closing[code]]])
+            rates[code] = _rate(dates, amounts, period)
+
+        return pd.DataFrame({
+            'xirr': rates,
+            'opening_value': opening,
+            'net_flows': flows.cum_amounts[b] - flows.cum_amounts[a],
+            'closing_value': closing,
+            'trades': b - a,
+        }, index=flows.symbols)
+
+    def portfolio(self, prices=None, start=None, end=None, as_of=None, terminal_value=None, annualize=True):
+        """
+        Portfolio XIRR (%) over [start, end]. terminal_value overrides the closing value
+        (e.g. the live valuation the Orchestrator already has).
+        """
+        as_of = self._as_of(as_of)
+        key = ("portfolio", start, end, terminal_value, annualize)
+        return self._cached(
+            key, prices, as_of, lambda: self._portfolio(prices, start, end, as_of, terminal_value, annualize)
+        )
+
+    def _portfolio(self, prices, start, end, as_of, terminal_value, annualize):
+        flows = self.flows
+        start_day = _as_day(start) if start is not None else None
+        end_day = min(_as_day(end), as_of) if end is not None else as_of
+
+        a = np.searchsorted(flows.all_days, start_day) if start_day is not None else 0
+        b = np.searchsorted(flows.all_days, end_day, side="right")
+        dates = flows.all_days[a:b].astype('datetime64[D]')
+        amounts = flows.all_amounts[a:b]
+
+        if start_day is not None:
+            open_qty, open_price = flows.state_at(flows.bounds(start_day))
+            opening = np.nansum(np.where(open_qty != 0, open_qty * open_price, 0.0))
+            if opening:
+                dates = np.concatenate([np.array([start_day], dtype='datetime64[D]'), dates])
+                amounts = np.concatenate([[-opening], amounts])
+        if terminal_value is None:
+            close_qty, close_price = flows.state_at(flows.bounds(end_day, side="right"))
+            close_price = self._marks(flows, close_price, prices, end_day == as_of)
+            terminal_value = np.nansum(np.where(close_qty != 0, close_qty * close_price, 0.0))
+        if terminal_value:
+            dates = np.concatenate([dates, np.array([end_day], dtype='datetime64[D]')])
+            amounts = np.concatenate([amounts, [terminal_value]])
+        period = None if annualize or start_day is None else end_day - start_day
+        return _rate(dates, amounts, period) if len(amounts) > 1 else np.nan
+
+    def windows(self, spec=("1Y", "3Y", "Q"), as_of=None):
+        """
+        [(label, start, end)] for trailing windows ("1Y", "3Y", "5Y", "10Y", ending as_of) and
+        "Q" (every calendar quarter of the history, the current one up to as_of).
+        """
+        as_of = pd.Timestamp(np.datetime64(self._as_of(as_of), 'D'))
+        result = []
+        for item in spec:
+            if item in WINDOW_YEARS:
+                result.append((f"Trailing {item}", as_of - pd.DateOffset(years=WINDOW_YEARS[item]), as_of))
+            elif item == "Q":
+                first = pd.Timestamp(np.datetime64(int(self.flows.all_days.min()), 'D')) if len(self.flows.all_days) else as_of
+                for quarter in pd.period_range(first, as_of, freq='Q'):
+                    result.append((str(quarter), quarter.start_time, min(quarter.end_time.normalize(), as_of)))
+            else:
+                raise ValueError(f"Unknown XIRR window '{item}'")
+        return result
+
+    def rolling(self, prices=None, spec=("1Y", "3Y", "Q"), as_of=None, per_symbol=False):
+        """
+        Portfolio XIRR (%) per window, or with per_symbol a (window, Symbol) indexed frame.
+        Windows shorter than a year (quarters) report the return over the window, not annualized.
+        """
+        windows = [(label, start, end, end - start >= pd.Timedelta(days=365)) for label, start, end in self.windows(spec, as_of)]
+        if not per_symbol:
+            return pd.Series(
+                [self.portfolio(prices, start, end, as_of, annualize=annualize) for _, start, end, annualize in windows],
+                index=pd.Index([label for label, _, _, _ in windows], name='Window'), name='xirr',
+            )
+        frames = [self.by_symbol(prices, start, end, as_of, annualize) for _, start, end, annualize in windows]
+        return pd.concat(frames, keys=[label for label, _, _, _ in windows], names=['Window'])
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "cached": len(self._cache)}
@@ -0,0 +1,100 @@
+"""
+End-to-end latency of Orchestrator.route_query (sequential: classify -> prices -> answer)
+vs route_query_async (speculative valuation overlapping classification, async LLM calls),
+against the stub LLM server and a stub price source.
+
+Run once with the LLM intent classifier forced on every query (the original path) and
+once with the local classifier in front of it.
+
+    python benchmarks/bench_async_route.py [llm_first_token_delay] [price_latency]
+"""
+import os
+import sys
+import asyncio
+import tempfile
+import time
+
+from synthetic import make_orders, write_order_history_csv
+from stubs import StubPriceProvider, StubHistoryProvider
+from stub_llm_server import StubLLMServer
+from live_market import set_price_provider
+from price_cache import QuoteCache, set_quote_cache
+from price_history import PriceHistoryStore, set_price_history
+
+os.environ.setdefault("GROQ_API_KEY", "stub")
+os.environ["LLM_CACHE_PATH"] = ""
+from agents.llm_cache import ResponseCache
+from agents.llm_client import LLMClient
+from agents.orchestrator import Orchestrator
+
+QUERIES = {
+    "What is my XIRR?": "MATH",
+    "What is my portfolio worth right now?": "LIVE",
+    "Which sector dominates my portfolio?": "ANALYTICS",
+    "What is a stop loss?": "EDU",
+    "Predict my portfolio value next year": "PREDICT",
+}
+
+
+def reply(body):
+    system = body["messages"][0]["content"]
+    if "Intent Classifier" in system:
+        return QUERIES[body["messages"][-1]["content"]]
+    return " ".join(["answer"] * 20)
+
+
+def make_orchestrator(file_path, base_url, local_classifier):
+    orchestrator = Orchestrator(file_path=file_path, llm_client=LLMClient(api_key="stub", base_url=base_url))
+    for agent in (orchestrator.analytics_agent, orchestrator.edu_agent):
+        agent.response_cache = ResponseCache(max_entries=0)
+    if not local_classifier:
+        orchestrator.intent_classifier.threshold = 2.0  # never confident: always ask the LLM
+    return orchestrator
+
+
+async def compare(orchestrator, price_latency, repeat=3):
+    rows = []
+    for query, intent in QUERIES.items():
+        sync_times, async_times = [], []
+        for _ in range(repeat):
+            orchestrator.begin_turn()
+            start = time.perf_counter()
+            orchestrator.route_query(query)
+            sync_times.append(time.perf_counter() - start)
+
+            orchestrator.begin_turn()
+            start = time.perf_counter()
+            await orchestrator.route_query_async(query)
+            async_times.append(time.perf_counter() - start)
+            speculative = orchestrator.last_turn_stats.get("speculative_valuation")
+            await asyncio.sleep(price_latency)  # let a discarded prefetch finish outside the timings
+        rows.append((intent, min(sync_times), min(async_times), speculative))
+    return rows
+
+
+async def main(first_token_delay, price_latency):
+    server = StubLLMServer(token_delay=0.005, first_token_delay=first_token_delay, reply=reply).start()
+    set_price_provider(StubPriceProvider(latency=price_latency, batch=True))
+    set_quote_cache(QuoteCache(market_ttl=0, off_hours_ttl=0, stale_ttl=0))  # every valuation hits the source
+    print(f"stub LLM {first_token_delay * 1000:.0f} ms to first token, price source {price_latency * 1000:.0f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, "orders.csv")
+        write_order_history_csv(make_orders(5_000, n_symbols=40, seed=12), file_path)
+        set_price_history(PriceHistoryStore(os.path.join(tmp, "prices"), StubHistoryProvider()))
+        for local in (False, True):
+            orchestrator = make_orchestrator(file_path, server.base_url, local)
+            rows = await compare(orchestrator, price_latency)
+            print(f"\n{'local classifier' if local else 'LLM classifier on every query'}")
+            for intent, t_sync, t_async, speculative in rows:
+                print(f"  {intent:<10} sync {t_sync * 1000:6.0f} ms | async {t_async * 1000:6.0f} ms "
+                      f"({t_sync / t_async:4.2f}x)  prefetch {speculative}")
+            total_sync, total_async = sum(r[1] for r in rows), sum(r[2] for r in rows)
+            print(f"  {'all':<10} sync {total_sync * 1000:6.0f} ms | async {total_async * 1000:6.0f} ms")
+    server.stop()
+
+
+if __name__ == "__main__":
+    first_token_delay = float(sys.argv[1]) if len(sys.argv) > 1 else 0.3
+    price_latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.3
+    asyncio.run(main(first_token_delay, price_latency))
@@ -0,0 +1,66 @@
+"""
+Prompt size before/after the compact context builder, for the AnalyticsAgent and StockAgent
+system prompts on realistic order histories.
+
+Token counts are estimates: chars/4 (what the builder budgets with) and a word-piece count
+(words, numbers and punctuation marks counted separately), which is closer to how BPE
+tokenizers treat runs of padding spaces.
+
+    python benchmarks/bench_context.py
+"""
+import os
+import re
+import time
+
+from synthetic import make_orders
+from data_processor import process_orders
+from data_context import DataContext
+from context_builder import compact_context, estimate_tokens
+
+os.environ.setdefault("GROQ_API_KEY", "stub")
+os.environ["LLM_CACHE_PATH"] = ""
+from agents.analytics_agent import AnalyticsAgent
+
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+def word_pieces(text):
+    return len(_PIECES.findall(text))
+
+
+def old_analytics_sections(df, holdings):
+    return holdings.to_string(), df.sort_values('Execution date and time').tail(50).to_string(index=False)
+
+
+def old_stock_agent_sections(df, holdings):
+    history = df[['Execution date and time', 'Stock name', 'Symbol', 'Type', 'Quantity', 'Value']].tail(200)
+    return holdings.to_string(), history.to_string(index=False)
+
+
+def report(label, before, after):
+    b, a = "\n".join(before), "\n".join(after)
+    print(f"  {label:<28} chars/4 {estimate_tokens(b):7,} -> {estimate_tokens(a):6,} "
+          f"({1 - estimate_tokens(a) / estimate_tokens(b):4.0%} less) | "
+          f"word pieces {word_pieces(b):7,} -> {word_pieces(a):6,}")
+
+
+if __name__ == "__main__":
+    for n_rows, n_symbols in ((3_000, 40), (20_000, 150), (100_000, 400)):
+        df, portfolio, holdings = process_orders(make_orders(n_rows, n_symbols=n_symbols, seed=14))
+        print(f"{n_rows:,} orders, {len(holdings)} open holdings")
+
+        # AnalyticsAgent: sections and the full system prompt
+        agent = AnalyticsAgent(DataContext(df, portfolio, holdings))
+        start = time.perf_counter()
+        new_sections = compact_context(holdings, df, agent.context_budget)
+        t_build = time.perf_counter() - start
+        old_sections = old_analytics_sections(df, holdings)
+        report("analytics holdings+trades", old_sections, new_sections)
+        prompt = agent._messages("Analyze my portfolio", "Current Live Portfolio Value: ₹1,000.00")[0]["content"]
+        old_prompt = prompt.replace(agent.holdings_str, old_sections[0]).replace(agent.history_str, old_sections[1])
+        report("analytics system prompt", [old_prompt], [prompt])
+
+        # StockAgent: same builder call as StockAgent._build_system_prompt
+        new_sections = compact_context(holdings, df, 2400, holdings_share=0.65, max_trades=30, with_names=True)
+        report("stock agent holdings+trades", old_stock_agent_sections(df, holdings), new_sections)
+        print(f"  build time {t_build * 1000:.1f} ms")
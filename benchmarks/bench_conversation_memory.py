@@ -0,0 +1,81 @@
+"""
+200-turn StockAgent session with bounded conversation memory vs the previous unbounded
+message list: prompt tokens per turn, and chat latency while summaries are produced in
+the background by a deliberately slow summarizer. The memory's guarantees (budget, verbatim
+latest turn, non-blocking summaries) are checked in tests/test_conversation_memory.py.
+
+    python benchmarks/bench_conversation_memory.py [turns]
+"""
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+from synthetic import make_orders, write_order_history_csv
+from stubs import StubPriceProvider, StubChatClient, StubHistoryProvider
+from live_market import set_price_provider
+from price_history import PriceHistoryStore, set_price_history
+from context_builder import estimate_tokens
+
+os.environ.setdefault("GROQ_API_KEY", "stub")
+from agent import StockAgent
+
+ANSWER_LATENCY = 0.02
+SUMMARY_LATENCY = 0.3
+ANSWER = ("Your current Valuation on SYM0001 in INR is as follows, quantity 120 at an average price of 1,204.50 "
+          "for a total of 1,44,540. Over the last quarter you added 40 shares in three buys. ") * 3
+
+
+def reply(request):
+    system = request["messages"][0]["content"]
+    if system.startswith("You maintain a running summary"):
+        time.sleep(SUMMARY_LATENCY)  # summaries are slow; chat turns must not wait for them
+        turns = request["messages"][1]["content"].count("\nuser: ") + 1
+        return f"The user asked about holdings, trades and growth ({turns} more turns folded in). " * 4
+    time.sleep(ANSWER_LATENCY)
+    return ANSWER
+
+
+if __name__ == "__main__":
+    n_turns = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    set_price_provider(StubPriceProvider(latency=0.0, batch=True))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, "orders.csv")
+        write_order_history_csv(make_orders(20_000, n_symbols=150, seed=15), file_path)
+        set_price_history(PriceHistoryStore(os.path.join(tmp, "prices"), StubHistoryProvider()))
+        client = StubChatClient(reply=reply)
+        agent = StockAgent(file_path=file_path, llm_client=client, memory_budget=8000)
+
+    system_tokens = estimate_tokens(agent.memory.system["content"])
+    unbounded_tokens = system_tokens
+    bounded, unbounded, turn_times = [], [], []
+    for turn in range(n_turns):
+        query = f"Question {turn}: how did SYM{turn % 150:04d} do this quarter and should I look at my average price?"
+        chat_calls = sum(1 for r in client.requests if not r["messages"][0]["content"].startswith("You maintain"))
+        start = time.perf_counter()
+        agent.chat(query)
+        turn_times.append(time.perf_counter() - start)
+
+        # The request that just went out for this turn
+        sent = [r for r in client.requests if not r["messages"][0]["content"].startswith("You maintain")][chat_calls]
+        bounded.append(sum(estimate_tokens(m["content"]) for m in sent["messages"]))
+        unbounded_tokens += estimate_tokens(query)
+        unbounded.append(unbounded_tokens)          # previous behaviour: everything so far
+        unbounded_tokens += estimate_tokens(ANSWER)
+
+    agent.memory.wait()
+    stats = agent.memory.stats()
+    summaries = sum(1 for r in client.requests if r["messages"][0]["content"].startswith("You maintain"))
+    turn_times = np.array(turn_times) * 1000
+
+    print(f"{n_turns} turns, system prompt {system_tokens} tokens, memory budget {agent.memory_budget}")
+    for t in (1, 10, 50, 100, 200):
+        if t <= n_turns:
+            print(f"  turn {t:>3}: unbounded {unbounded[t - 1]:7,} tokens | bounded {bounded[t - 1]:6,} tokens")
+    print(f"  max bounded prompt {max(bounded):,} tokens; {summaries} background summaries, "
+          f"{stats['summarized_messages']} messages folded in")
+    print(f"  chat turn latency (stub answers in {ANSWER_LATENCY * 1000:.0f} ms, summaries take {SUMMARY_LATENCY * 1000:.0f} ms): "
+          f"mean {turn_times.mean():.2f} ms, max {turn_times.max():.2f} ms")
+    print(f"  memory {stats}")
@@ -0,0 +1,53 @@
+"""
+Cold vs warm start of the order-history load.
+
+    python benchmarks/bench_data_cache.py [rows ...]
+"""
+import os
+import sys
+import time
+import tempfile
+import pandas as pd
+
+from synthetic import make_orders, write_order_history_xlsx
+from data_processor import process_stock_data
+from data_cache import load_stock_data
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def run(n_rows, tmp_dir):
+    source = os.path.join(tmp_dir, f"orders_{n_rows}.xlsx")
+    cache_dir = os.path.join(tmp_dir, "cache")
+    write_order_history_xlsx(make_orders(n_rows), source)
+
+    eager, cold = timed(process_stock_data, source)
+    _, first = timed(load_stock_data, source, cache_dir=cache_dir)   # parse + write cache
+    cached, warm = timed(load_stock_data, source, cache_dir=cache_dir)
+
+    for expected, actual in zip(eager, cached):
+        pd.testing.assert_frame_equal(expected, actual, check_freq=False)
+
+    # Touch without changing content: stat differs, hash matches, still a hit
+    os.utime(source)
+    _, touched = timed(load_stock_data, source, cache_dir=cache_dir)
+
+    # Real change: the cache must be rebuilt
+    write_order_history_xlsx(make_orders(n_rows, seed=7), source)
+    rebuilt, changed = timed(load_stock_data, source, cache_dir=cache_dir)
+    pd.testing.assert_frame_equal(rebuilt[2], process_stock_data(source)[2])
+
+    print(f"{n_rows:>8} rows | cold {cold * 1000:8.1f} ms | first load+write {first * 1000:8.1f} ms | "
+          f"warm {warm * 1000:6.1f} ms | touched {touched * 1000:6.1f} ms | changed {changed * 1000:8.1f} ms | "
+          f"speed-up {cold / warm:5.1f}x")
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [1_000, 10_000, 50_000]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n in sizes:
+            run(n, tmp_dir)
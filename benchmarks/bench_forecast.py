@@ -0,0 +1,108 @@
+"""
+Monte Carlo forecaster for a 50-holding portfolio: model fit, 10k paths over five horizons
+(seeded, deterministic), agreement with a day-by-day simulation of the same model and with
+the closed-form lognormal quantiles, and the PredictionAgent answer.
+
+    python benchmarks/bench_forecast.py [n_paths]
+"""
+import os
+import sys
+import time
+import tempfile
+from datetime import date
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+from synthetic import make_orders
+from stubs import StubHistoryProvider
+from data_processor import process_orders
+from data_context import DataContext
+from price_history import PriceHistoryStore
+from live_market import map_symbol
+from agents.forecast_engine import ForecastEngine, ReturnModel, HORIZONS
+from agents.prediction_agent import PredictionAgent
+
+TODAY = date(2024, 6, 28)
+
+
+def daily_steps(model, days, n_paths, seed):
+    """Reference: every path stepped one trading day at a time (paths x holdings per step)."""
+    rng = np.random.default_rng(seed)
+    log_relative = np.zeros((n_paths, len(model.mu)))
+    values, horizon = [], iter(days)
+    target = next(horizon)
+    for day in range(1, days[-1] + 1):
+        log_relative += rng.standard_normal((n_paths, len(model.mu))) @ model.chol.T + model.mu
+        if day == target:
+            values.append(np.exp(log_relative) @ model.exposure)
+            target = next(horizon, None)
+    return np.column_stack(values)
+
+
+def check_closed_form():
+    # One holding: the value is lognormal, so its quantiles are known exactly
+    days = pd.bdate_range("2021-01-01", periods=800)
+    rng = np.random.default_rng(1)
+    closes = pd.DataFrame({"ONE": 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.015, len(days))))}, index=days)
+    model = ReturnModel(["ONE"], [10], [100.0], closes, shrinkage=0.0)
+    engine = ForecastEngine(None, None)
+    values = engine.simulate({"1Y": 252}, n_paths=200_000, seed=3, model=model)[:, 0]
+    mu, sigma = model.mu[0] * 252, np.sqrt(model.cov[0, 0] * 252)
+    for p in (5, 50, 95):
+        expected = 1000 * np.exp(mu + sigma * norm.ppf(p / 100))
+        assert abs(np.percentile(values, p) / expected - 1) < 0.01, (p, np.percentile(values, p), expected)
+    print("single holding vs closed-form lognormal quantiles (5/50/95%): within 1%")
+
+
+if __name__ == "__main__":
+    n_paths = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    check_closed_form()
+    df, portfolio, holdings = process_orders(make_orders(20_000, n_symbols=50, start="2021-06-01", years=3, seed=21))
+    data = DataContext(df, portfolio, holdings)
+    levels = (df['Value'] / df['Quantity']).groupby(df['Symbol']).median()
+    provider = StubHistoryProvider(levels={map_symbol(k): v for k, v in levels.items()}, volatility=0.015)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PriceHistoryStore(os.path.join(tmp, "prices"), provider, today=lambda: TODAY)
+        store.update(holdings.index.get_level_values('Symbol'), "2021-06-01")
+        engine = ForecastEngine(data, store)
+
+        start = time.perf_counter()
+        model = engine.model
+        t_fit = time.perf_counter() - start
+        engine.model
+        assert engine.fits == 1
+        corr = model.cov / np.sqrt(np.outer(np.diag(model.cov), np.diag(model.cov)))
+        off_diagonal = corr[~np.eye(len(corr), dtype=bool)]
+        print(f"{len(model.symbols)} holdings, ₹{model.value:,.0f}; model fitted in {t_fit * 1000:.0f} ms "
+              f"(mean pairwise correlation {off_diagonal.mean():.2f}; the stub noise has 0.36 on top of per-symbol waves)")
+
+        days = list(HORIZONS.values())
+        start = time.perf_counter()
+        table = engine.forecast(n_paths=n_paths, seed=7)
+        t_forecast = time.perf_counter() - start
+        again = engine.forecast(n_paths=n_paths, seed=7)
+        assert table.equals(again), "seeded forecast is not deterministic"
+        assert not table.equals(engine.forecast(n_paths=n_paths, seed=8))
+        assert t_forecast < 1.0, f"{n_paths:,} paths took {t_forecast:.2f} s"
+
+        start = time.perf_counter()
+        reference = daily_steps(model, days, n_paths, seed=7)
+        t_daily = time.perf_counter() - start
+        bands = np.percentile(reference, (5, 50, 95), axis=0).T
+        drift = np.abs(bands / table[['p5', 'p50', 'p95']].to_numpy() - 1).max()
+        assert drift < 0.02, drift
+
+        start = time.perf_counter()
+        engine.forecast(n_paths=100_000, seed=7)
+        t_100k = time.perf_counter() - start
+
+        print(f"{n_paths:,} paths x {len(days)} horizons: {t_forecast * 1000:.0f} ms (deterministic per seed) | "
+              f"stepping every trading day: {t_daily:.2f} s; bands agree within {drift:.2%} | "
+              f"100,000 paths: {t_100k * 1000:.0f} ms")
+        print(table.round(2).to_string())
+
+        agent = PredictionAgent(data, price_history=store, seed=7)
+        print()
+        print(agent.predict_portfolio_trend())
@@ -0,0 +1,113 @@
+"""
+Local intent classifier: accuracy against the labelled set (cross-validated and on
+held-out paraphrases), confidence threshold vs share of queries that skip the LLM,
+and per-query latency.
+
+    python benchmarks/bench_intent.py [llm_latency_seconds]
+"""
+import sys
+import time
+import numpy as np
+from sklearn.model_selection import StratifiedKFold
+
+import synthetic  # noqa: F401  (repo paths)
+from agents.intent_classifier import IntentClassifier, load_samples
+
+# Queries not in the training set, labelled the way the LLM classifier labels them
+HELD_OUT = [
+    ("whats my overall xirr", "MATH"), ("compute my CAGR since 2020", "MATH"),
+    ("how much money have i put into stocks", "MATH"), ("average cost of my ITC shares", "MATH"),
+    ("total number of trades in 2022", "MATH"), ("my total investment in HDFC", "MATH"),
+    ("what is infosys trading at", "LIVE"), ("live price of my top stock", "LIVE"),
+    ("how much is my portfolio worth today", "LIVE"), ("current value of all holdings", "LIVE"),
+    ("latest price for reliance industries", "LIVE"), ("are markets open right now", "LIVE"),
+    ("forecast my portfolio for 2027", "PREDICT"), ("what will my investments look like next year", "PREDICT"),
+    ("predict the next 6 months", "PREDICT"), ("future value of my holdings", "PREDICT"),
+    ("will tata motors go up", "PREDICT"), ("project my savings trajectory", "PREDICT"),
+    ("what is a P/E ratio", "EDU"), ("explain beta and alpha", "EDU"), ("define XIRR", "EDU"),
+    ("what are small cap stocks", "EDU"), ("how do dividends work", "EDU"), ("meaning of a bear market", "EDU"),
+    ("give me an analysis of my portfolio", "ANALYTICS"), ("which stocks dominate my holdings", "ANALYTICS"),
+    ("am I diversified enough", "ANALYTICS"), ("what are my largest positions", "ANALYTICS"),
+    ("show my portfolio breakdown", "ANALYTICS"), ("insights about my trading habits", "ANALYTICS"),
+    ("hello!", "CHAT"), ("thanks a lot", "CHAT"), ("who made you", "CHAT"), ("hey there", "CHAT"),
+    ("what can you help with", "CHAT"), ("good evening", "CHAT"),
+    # Keyword traps: each of these hits a single rule for another intent
+    ("What is the price of Reliance?", "LIVE"), ("What is Nifty doing?", "LIVE"), ("what is sensex doing this week", "LIVE"),
+    ("Will you help me?", "CHAT"), ("will you analyse my portfolio", "ANALYTICS"), ("Show my total holdings", "ANALYTICS"),
+]
+THRESHOLDS = [0.0, 0.4, 0.5, 0.6, 0.7, 0.8]
+
+
+def evaluate(classifier, items):
+    predictions = [classifier.predict(q) for q, _ in items]
+    correct = np.array([p[0] == label for p, (_, label) in zip(predictions, items)])
+    confidence = np.array([p[1] for p in predictions])
+    return correct, confidence
+
+
+def report(name, correct, confidence):
+    print(f"{name}: local accuracy (no LLM at all) {correct.mean():.1%} on {len(correct)} queries")
+    for t in THRESHOLDS:
+        local = confidence >= t
+        acc = correct[local].mean() if local.any() else float("nan")
+        print(f"  threshold {t:.1f}: {local.mean():6.1%} skip the LLM, local accuracy on those {acc:6.1%}")
+
+
+if __name__ == "__main__":
+    llm_latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.4
+    samples = load_samples()
+    labels = [label for _, label in samples]
+
+    # 1. 5-fold cross-validation on the labelled sample set
+    correct, confidence = [], []
+    for train, test in StratifiedKFold(5, shuffle=True, random_state=0).split(samples, labels):
+        classifier = IntentClassifier().fit([samples[i] for i in train])
+        c, conf = evaluate(classifier, [samples[i] for i in test])
+        correct.append(c)
+        confidence.append(conf)
+    report("5-fold CV", np.concatenate(correct), np.concatenate(confidence))
+
+    # 2. Held-out paraphrases, model trained on the full sample set
+    classifier = IntentClassifier().fit()
+    c, conf = evaluate(classifier, HELD_OUT)
+    report("held-out", c, conf)
+    for (q, label), ok in zip(HELD_OUT, c):
+        if not ok:
+            print(f"    miss: {q!r} expected {label}, got {classifier.predict(q)[:2]}")
+
+    # 3. Fast scorer matches sklearn and is cheap
+    queries = [q for q, _ in samples + HELD_OUT]
+    for q in queries:
+        fast = classifier.predict_proba(q)
+        ref = dict(zip(classifier._model.classes_, classifier._model.predict_proba(classifier._vectorizer.transform([q]))[0]))
+        assert all(abs(fast[k] - ref[k]) < 1e-9 for k in fast)
+    timings = []
+    for q in queries * 20:
+        start = time.perf_counter()
+        classifier.predict(q)
+        timings.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    for q in queries:
+        classifier._model.predict_proba(classifier._vectorizer.transform([q]))
+    t_sklearn = (time.perf_counter() - start) / len(queries)
+    timings = np.array(timings) * 1e6
+    print(f"latency: local predict mean {timings.mean():.0f} us, p99 {np.percentile(timings, 99):.0f} us "
+          f"(sklearn transform+predict_proba {t_sklearn * 1e6:.0f} us)")
+
+    # 4. Turn latency with a simulated LLM classifier (answers with the expected label)
+    expected = dict(samples + HELD_OUT)
+
+    def llm(query):
+        time.sleep(llm_latency)
+        return expected[query]
+
+    classifier = IntentClassifier().fit()
+    start = time.perf_counter()
+    answers = [classifier.classify(q, fallback=llm)[0] for q, _ in HELD_OUT]
+    t_local = time.perf_counter() - start
+    stats = classifier.stats()
+    accuracy = np.mean([a == label for a, (_, label) in zip(answers, HELD_OUT)])
+    print(f"held-out with LLM fallback (threshold {classifier.threshold}, LLM {llm_latency:.1f} s): "
+          f"{stats['local_share']:.0%} skipped the LLM, accuracy {accuracy:.1%}, "
+          f"{t_local / len(HELD_OUT) * 1000:.0f} ms/query vs {llm_latency * 1000:.0f} ms always-remote")
+    print(f"stats {stats}")
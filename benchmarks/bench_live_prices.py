@@ -0,0 +1,58 @@
+"""
+Sequential per-symbol fetching (previous get_live_prices) vs the concurrent/batched engine,
+against a local stub provider with injected latency. Statuses, deadlines and partial
+results are checked in tests/test_live_prices.py.
+
+    python benchmarks/bench_live_prices.py [n_symbols] [latency_seconds]
+"""
+import sys
+import time
+from collections import Counter
+
+from synthetic import make_symbols
+from stubs import StubPriceProvider
+from live_market import fetch_live_quotes, map_symbol
+
+
+def sequential(symbols, provider):
+    """The old loop: one symbol at a time, failures silently skipped."""
+    prices = {}
+    for sym in symbols:
+        try:
+            price = provider.fetch_one(map_symbol(sym))
+            if price is not None:
+                prices[sym] = price
+        except Exception:
+            pass
+    return prices
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    n_symbols = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+    symbols, _ = make_symbols(n_symbols)
+
+    prices, t_seq = timed(sequential, symbols, StubPriceProvider(latency=latency))
+    print(f"{n_symbols} symbols @ {latency * 1000:.0f} ms/request")
+    print(f"  sequential              {t_seq:6.2f} s  ({len(prices)} priced)")
+
+    for workers in (8, 16):
+        quotes, t = timed(fetch_live_quotes, symbols, provider=StubPriceProvider(latency=latency), max_workers=workers)
+        print(f"  pool of {workers:<2} (per symbol) {t:6.2f} s  speed-up {t_seq / t:5.1f}x")
+
+    provider = StubPriceProvider(latency=latency, batch=True)
+    quotes, t = timed(fetch_live_quotes, symbols, provider=provider, batch_size=25)
+    print(f"  batched (25/request)    {t:6.2f} s  speed-up {t_seq / t:5.1f}x  ({provider.calls} requests)")
+
+    # Partial results: some symbols missing, failing or hanging past the per-symbol deadline
+    mapped = [map_symbol(s) for s in symbols]
+    provider = StubPriceProvider(latency=latency, batch=True, missing=mapped[:3], failing=mapped[3:6],
+                                 hanging=mapped[6:9], hang_seconds=3.0)
+    quotes, t = timed(fetch_live_quotes, symbols, provider=provider, symbol_timeout=0.5, overall_timeout=2.0)
+    print(f"  degraded source         {t:6.2f} s  statuses {dict(Counter(q['status'] for q in quotes.values()))}")
@@ -0,0 +1,114 @@
+"""
+LLM response cache in front of EducationAgent / AnalyticsAgent, against a stub chat client:
+hit rate and LLM calls for a repetitive workload, survival across a restart (SQLite tier),
+invalidation when new orders are ingested, and the cost of the data fingerprint.
+
+    python benchmarks/bench_llm_cache.py [llm_latency_seconds]
+"""
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+from synthetic import make_orders
+from stubs import StubChatClient
+from data_processor import process_orders
+from data_context import DataContext
+
+os.environ.setdefault("GROQ_API_KEY", "stub")
+from agents.llm_cache import ResponseCache
+from agents.education_agent import EducationAgent
+from agents.analytics_agent import AnalyticsAgent, LIVE_VALUE_STEP
+
+TERMS = ["XIRR", "CAGR", "P/E ratio", "beta", "alpha", "dividend yield", "an ETF", "a stop loss",
+         "market capitalisation", "an index fund", "NAV", "the Sharpe ratio", "a demat account",
+         "rupee cost averaging", "short term capital gains", "volatility", "a bull market", "liquidity"]
+VARIANTS = ["What is {}?", "what is {}", "WHAT IS {} ?", "What is  {}?"]
+
+
+def workload(n, seed=0):
+    # Popular terms are asked far more often (Zipf-like), with cosmetic variations
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, len(TERMS) + 1)
+    terms = rng.choice(TERMS, size=n, p=weights / weights.sum())
+    return [VARIANTS[rng.integers(len(VARIANTS))].format(t) for t in terms]
+
+
+def run_education(agent, queries):
+    start = time.perf_counter()
+    for q in queries:
+        agent.explain(q)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.05
+    queries = workload(300)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "llm.sqlite")
+
+        # 1. Education: no cache vs two-tier cache
+        agent = EducationAgent(response_cache=ResponseCache(max_entries=0, ttl=0))  # every lookup misses
+        agent.client = StubChatClient(latency=latency)
+        t_uncached = run_education(agent, queries)
+        uncached_calls = agent.client.calls
+
+        cache = ResponseCache(max_entries=64, path=db_path)
+        agent = EducationAgent(response_cache=cache)
+        agent.client = StubChatClient(latency=latency)
+        t_cached = run_education(agent, queries)
+        print(f"education, {len(queries)} questions, LLM {latency * 1000:.0f} ms: "
+              f"uncached {uncached_calls} calls / {t_uncached:.2f} s | cached {agent.client.calls} calls / {t_cached:.2f} s")
+        print(f"  stats {cache.stats()}")
+        cache.close()
+
+        # 2. Restart: a fresh process only has the SQLite tier
+        cache = ResponseCache(max_entries=64, path=db_path)
+        agent = EducationAgent(response_cache=cache)
+        agent.client = StubChatClient(latency=latency)
+        run_education(agent, queries[:50])
+        stats = cache.stats()
+        print(f"after restart, 50 questions: {agent.client.calls} LLM calls, {stats['disk_hits']} disk hits, "
+              f"{stats['memory_hits']} memory hits")
+        assert agent.client.calls == 0
+        cache.close()
+
+        # 3. Analytics: repeated questions hit while the live value only ticks, until the order history changes
+        raw = make_orders(20_000, n_symbols=80, seed=5)
+        context = DataContext(*process_orders(raw.iloc[:19_000]))
+        cache = ResponseCache(path=db_path)
+        agent = AnalyticsAgent(context, response_cache=cache)
+        agent.client = StubChatClient(latency=latency)
+        questions = ["Which sector dominates my portfolio?", "How diversified am I?", "What are my top holdings?"]
+        value = (1 + LIVE_VALUE_STEP) ** 2800
+        ticks = value * (1 + np.random.default_rng(0).uniform(-0.002, 0.002, 3))
+
+        def ask(q, live):
+            agent.analyze(q, live_value=live)
+
+        for live in ticks:
+            for q in questions:
+                ask(q, live)
+        calls_before = agent.client.calls
+        for q in questions:
+            ask(q, value * 1.03)
+        moved = agent.client.calls - calls_before
+        context.append_orders(raw.iloc[19_000:])
+        for q in questions:
+            ask(q, value)
+        print(f"analytics: 9 questions on unchanged data, live value within 0.2% -> {calls_before} LLM calls; "
+              f"value up 3% -> {moved} new calls; after append_orders -> {agent.client.calls - calls_before - moved} new calls")
+        cache.close()
+
+    # 4. Fingerprint cost (computed once per data version)
+    for n in (100_000, 1_000_000):
+        context = DataContext(*process_orders(make_orders(n, n_symbols=300, seed=9)))
+        start = time.perf_counter()
+        context.fingerprint
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        context.fingerprint
+        again = time.perf_counter() - start
+        print(f"fingerprint, {n:>9,} orders: first {first * 1000:7.1f} ms, memoized {again * 1e6:5.1f} us")
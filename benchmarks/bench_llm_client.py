@@ -0,0 +1,90 @@
+"""
+Shared LLMClient vs one Groq client per agent, against the stub LLM server:
+connections opened, per-call latency, concurrency limit, retries on transient 503s
+and bounded time on a hung server.
+
+    python benchmarks/bench_llm_client.py
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import synthetic  # noqa: F401  (repo paths)
+from stub_llm_server import StubLLMServer
+from groq import Groq
+import groq
+from agents.llm_client import LLMClient
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def call(client, **kwargs):
+    return client.chat.completions.create(model="stub", messages=MESSAGES, **kwargs)
+
+
+def run_calls(clients, n):
+    start = time.perf_counter()
+    for i in range(n):
+        call(clients[i % len(clients)])
+    return (time.perf_counter() - start) / n
+
+
+if __name__ == "__main__":
+    # 1. Connection reuse: four agents (orchestrator, analytics, education, stock agent), 40 calls
+    server = StubLLMServer(n_tokens=5, token_delay=0.0, first_token_delay=0.0).start()
+    per_agent = [Groq(api_key="stub", base_url=server.base_url) for _ in range(4)]
+    t_separate = run_calls(per_agent, 40)
+    separate = server.counters["connections"]
+    server.stop()
+
+    server = StubLLMServer(n_tokens=5, token_delay=0.0, first_token_delay=0.0).start()
+    shared = LLMClient(api_key="stub", base_url=server.base_url)
+    t_shared = run_calls([shared] * 4, 40)
+    print(f"40 sequential calls from 4 agents: one client per agent {separate} connections "
+          f"({t_separate * 1000:.2f} ms/call) | shared client {server.counters['connections']} connection "
+          f"({t_shared * 1000:.2f} ms/call)")
+    server.stop()
+
+    # 2. Concurrency limit: 24 callers at once, at most max_concurrency requests in flight
+    server = StubLLMServer(n_tokens=5, token_delay=0.01, first_token_delay=0.05).start()
+    client = LLMClient(api_key="stub", base_url=server.base_url, max_concurrency=4)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(24) as pool:
+        list(pool.map(lambda _: call(client), range(48)))
+        # Streams hold their slot until consumed
+        list(pool.map(lambda _: "".join(c.choices[0].delta.content or "" for c in call(client, stream=True)), range(24)))
+    print(f"72 calls from 24 threads, max_concurrency=4: server saw at most {server.max_active} at once, "
+          f"{server.counters['connections']} connections, {time.perf_counter() - start:.2f} s")
+    assert server.max_active <= 4
+    server.stop()
+
+    # 3. Transient errors: 30% of requests answered with 503
+    server = StubLLMServer(n_tokens=5, token_delay=0.0, first_token_delay=0.0, fail_rate=0.3, seed=1).start()
+    plain = Groq(api_key="stub", base_url=server.base_url, max_retries=0)
+    failed = 0
+    for _ in range(100):
+        try:
+            call(plain)
+        except groq.InternalServerError:
+            failed += 1
+    client = LLMClient(api_key="stub", base_url=server.base_url, max_retries=3, backoff_base=0.01)
+    failed_shared = 0
+    for _ in range(100):
+        try:
+            call(client)
+        except groq.InternalServerError:
+            failed_shared += 1
+    stats = client.stats()
+    print(f"100 calls, 30% 503s: no retries -> {failed} failed | LLMClient -> {failed_shared} failed "
+          f"({stats['retries']} retries)")
+    server.stop()
+
+    # 4. Timeouts: a server that takes 3 s to answer, 0.3 s per-call timeout, 1 retry
+    server = StubLLMServer(n_tokens=1, first_token_delay=3.0).start()
+    client = LLMClient(api_key="stub", base_url=server.base_url, timeout=0.3, max_retries=1, backoff_base=0.05)
+    start = time.perf_counter()
+    try:
+        call(client)
+    except groq.APITimeoutError:
+        pass
+    print(f"hung server: gave up after {time.perf_counter() - start:.2f} s ({client.stats()['retries']} retry)")
+    server.stop()
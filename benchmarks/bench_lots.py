@@ -0,0 +1,67 @@
+"""
+FIFO lot engine: time/peak memory on histories of up to a few million trades, against a
+straightforward deque replay on the smaller ones. Correctness (hand-built scenarios and
+agreement with the replay) is covered by tests/test_lot_engine.py.
+
+    python benchmarks/bench_lots.py [n_rows ...]
+"""
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+from synthetic import make_orders
+from data_processor import clean_orders, DATE_COLUMN
+from lot_engine import LotEngine
+
+
+def deque_replay(df, long_term_days=365):
+    """Reference FIFO: one deque of [qty, price, date] lots per symbol, trade by trade."""
+    queues, realized = {}, {}
+    for label, symbol, kind, qty, value, when in zip(
+            df.index, df['Symbol'], df['Type'], df['Quantity'], df['Value'], df[DATE_COLUMN]):
+        lots = queues.setdefault(symbol, deque())
+        price = value / qty
+        if kind == 'BUY':
+            lots.append([qty, price, when])
+            continue
+        left, pnl, short, long_ = qty, 0.0, 0.0, 0.0
+        while left > 0 and lots:
+            lot = lots[0]
+            take = min(left, lot[0])
+            gain = take * (price - lot[1])
+            pnl += gain
+            if (when.normalize() - lot[2].normalize()).days > long_term_days:
+                long_ += gain
+            else:
+                short += gain
+            lot[0] -= take
+            left -= take
+            if lot[0] == 0:
+                lots.popleft()
+        realized[label] = (pnl, short, long_, left)
+    open_cost = {s: sum(q * p for q, p, _ in lots) for s, lots in queues.items() if lots}
+    return realized, open_cost
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [100_000, 1_000_000, 3_000_000]
+    for n_rows in sizes:
+        df = clean_orders(make_orders(n_rows, n_symbols=500, seed=18))
+        if n_rows <= 100_000:
+            start = time.perf_counter()
+            deque_replay(df)
+            t_replay = time.perf_counter() - start
+        start = time.perf_counter()
+        lots = LotEngine(df)
+        elapsed = time.perf_counter() - start
+        # Separate run for memory: tracing allocations slows everything down
+        tracemalloc.start()
+        LotEngine(df)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        replay = f" | deque replay {t_replay:.2f} s" if n_rows <= 100_000 else ""
+        print(f"{len(df):>9,} trades: lot engine {elapsed:.2f} s, peak {peak / 2**20:,.0f} MiB "
+              f"({peak / len(df):.0f} B/trade), {len(lots.open_lots):,} open lots{replay}")
+        summary = lots.summary(today=df[DATE_COLUMN].max())
+    print({k: round(float(v), 2) for k, v in summary.items()})
@@ -0,0 +1,131 @@
+"""
+Local price history store: first download vs the next day's tail-only update, offline reads
+from the Parquet cache, on-disk size, and the vectorized daily market value vs a day-by-day
+loop. Uses a temporary cache directory and the stub provider. Behaviour (back-off, gaps,
+fixture provider, returns) is covered by tests/test_price_history.py.
+
+    python benchmarks/bench_price_history.py [n_rows] [n_symbols]
+"""
+import os
+import sys
+import time
+import tempfile
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+
+from synthetic import make_orders
+from stubs import StubHistoryProvider
+from data_processor import process_orders, market_value_daily, trailing_return, DATE_COLUMN
+from price_history import PriceHistoryStore
+from live_market import map_symbol
+
+TODAY = date(2024, 6, 28)
+
+
+class Clock:
+    """Settable today() / time() for the store."""
+
+    def __init__(self, day):
+        self.day = day
+        self.now = 0.0
+
+    def today(self):
+        return self.day
+
+    def time(self):
+        return self.now
+
+
+def replay_held(trades):
+    """Shares held after replaying trades one by one (never below zero)."""
+    held = 0
+    for change in trades['Quantity_Change']:
+        held = max(held + change, 0)
+    return held
+
+
+def naive_market_value(df, store, days):
+    """Per day: shares held x (last stored close, else last traded price), one day at a time."""
+    values = []
+    day_of = df[DATE_COLUMN].dt.normalize()
+    for day in days:
+        upto = df[day_of <= day]
+        total = 0.0
+        for symbol, trades in upto.groupby('Symbol'):
+            held = replay_held(trades)
+            if not held:
+                continue
+            close = store.history(symbol)['Close'].loc[:day]
+            if len(close):
+                price = close.iloc[-1]
+            else:
+                last = upto[upto['Symbol'] == symbol].iloc[-1]
+                price = last['Value'] / last['Quantity']
+            total += held * price
+        values.append(total)
+    return np.array(values)
+
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    n_symbols = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    df, portfolio, holdings = process_orders(
+        make_orders(n_rows, n_symbols=n_symbols, start="2019-01-01", years=5.4, seed=19))
+    symbols = list(df['Symbol'].unique())
+    start = df[DATE_COLUMN].min().normalize()
+    print(f"{len(df):,} trades, {len(symbols)} symbols since {start.date()}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = os.path.join(tmp, "prices")
+        clock = Clock(TODAY)
+        # Closes wander around each symbol's median traded price
+        levels = (df['Value'] / df['Quantity']).groupby(df['Symbol']).median()
+        provider = StubHistoryProvider(latency=0.02, levels={map_symbol(k): v for k, v in levels.items()})
+        store = PriceHistoryStore(cache_dir, provider, today=clock.today, clock=clock.time)
+
+        t0 = time.perf_counter()
+        first_rows = store.update(symbols, start)
+        t_first = time.perf_counter() - t0
+        first_calls = provider.calls
+
+        t0 = time.perf_counter()
+        assert store.update(symbols, start) == 0 and provider.calls == first_calls
+        t_same_day = time.perf_counter() - t0
+
+        # Next trading day: only the tail (Saturday..Monday) is fetched
+        clock.day = TODAY + timedelta(days=3)
+        t0 = time.perf_counter()
+        tail_rows = store.update(symbols, start)
+        t_tail = time.perf_counter() - t0
+        assert provider.calls == 2 * first_calls and tail_rows == len(symbols)
+
+        size = sum(os.path.getsize(os.path.join(cache_dir, f)) for f in os.listdir(cache_dir) if f.endswith(".parquet"))
+        bars = first_rows + tail_rows
+        print(f"first download: {first_rows:,} bars in {t_first:.2f} s ({first_calls} fetches, 20 ms each)")
+        print(f"same day again: 0 fetches in {t_same_day * 1000:.1f} ms | next day: {tail_rows} bars "
+              f"({tail_rows / first_rows:.3%} of the history) in {t_tail:.2f} s")
+        print(f"on disk: {size / 2**20:.1f} MiB for {bars:,} bars ({size / bars:.1f} B/bar, "
+              f"{size / len(symbols) / 1024:.0f} KiB/symbol)")
+
+        # A new process, offline: everything from the memory-mapped Parquet files
+        offline = PriceHistoryStore(cache_dir, offline=True, today=clock.today)
+        t0 = time.perf_counter()
+        closes = offline.closes(symbols, start)
+        t_read = time.perf_counter() - t0
+        assert np.allclose(closes.to_numpy(), store.closes(symbols, start, update=False).to_numpy(), equal_nan=True)
+        print(f"offline: {closes.shape[0]:,} days x {closes.shape[1]} symbols read in {t_read * 1000:.0f} ms")
+
+        t0 = time.perf_counter()
+        series = market_value_daily(df, closes)
+        t_series = time.perf_counter() - t0
+        rng = np.random.default_rng(0)
+        sample = pd.DatetimeIndex(np.sort(rng.choice(series.index, 12, replace=False)))
+        t0 = time.perf_counter()
+        expected = naive_market_value(df, offline, sample)
+        t_naive = (time.perf_counter() - t0) / len(sample) * len(series)
+        assert np.allclose(series.loc[sample, 'Market_Value'].to_numpy(), expected, rtol=1e-9)
+        print(f"daily market value for {len(series):,} days: {t_series * 1000:.0f} ms | "
+              f"day-by-day loop ~{t_naive:.0f} s (extrapolated from 12 days); matches")
+        print(f"6-month return {trailing_return(series):.2f}% | priced from closes "
+              f"{series['Priced_Share'].iloc[-1]:.0%} on {series.index[-1].date()}")
@@ -0,0 +1,81 @@
+"""
+Sidebar render latency (begin_turn + get_portfolio_stats, what every Streamlit rerun does)
+against a slow price source, with synchronous valuation and with the background price
+refresher, and the time an explicit refresh takes. The refresher's schedule, failure
+handling and refresh after new orders are covered by tests/test_price_refresher.py.
+
+Prices come from a stub provider with injected latency; the shared quote cache is given a
+zero TTL so that every valuation is a real round trip.
+
+    python benchmarks/bench_price_refresher.py [price_latency_seconds]
+"""
+import os
+import sys
+import time
+import tempfile
+
+from synthetic import make_orders, write_order_history_csv
+from stubs import StubPriceProvider, StubHistoryProvider
+from live_market import set_price_provider
+from price_cache import QuoteCache, set_quote_cache
+from price_history import PriceHistoryStore, set_price_history
+
+os.environ.setdefault("GROQ_API_KEY", "stub")
+os.environ["LLM_CACHE_PATH"] = ""  # keep stub answers out of the on-disk LLM cache
+from agents.orchestrator import Orchestrator
+
+
+def render(orchestrator):
+    start = time.perf_counter()
+    orchestrator.begin_turn()
+    stats = orchestrator.get_portfolio_stats()
+    return time.perf_counter() - start, stats
+
+
+if __name__ == "__main__":
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+
+    provider = StubPriceProvider(latency=latency, batch=True)
+    set_price_provider(provider)
+    set_quote_cache(QuoteCache(market_ttl=0, off_hours_ttl=0, stale_ttl=0))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, "orders.csv")
+        write_order_history_csv(make_orders(5_000, n_symbols=60, seed=8), file_path)
+        set_price_history(PriceHistoryStore(os.path.join(tmp, "prices"), StubHistoryProvider()))
+
+        # Before: every rerun waits for a full valuation
+        orchestrator = Orchestrator(file_path=file_path)
+        render(orchestrator)  # daily closes downloaded once, like any first visit
+        sync = [render(orchestrator)[0] for _ in range(3)]
+
+        # After: the refresher owns the valuation (refreshing every 2 s so renders overlap fetches)
+        orchestrator = Orchestrator(file_path=file_path)
+        refresher = orchestrator.start_price_refresher(market_interval=2 * latency, is_open=lambda now: True)
+        first, stats = render(orchestrator)
+        assert stats["market_value"] is None
+        refresher.wait_for_first(timeout=30)
+        background, ages = [], []
+        for _ in range(20):
+            seconds, stats = render(orchestrator)
+            assert stats["market_value"] is not None
+            background.append(seconds)
+            ages.append(stats["valuation_age"])
+            time.sleep(latency / 4)
+        assert max(background) < 0.25 * latency, max(background)
+
+        before = refresher.latest
+        start = time.perf_counter()
+        snapshot = orchestrator.refresh_prices(wait=10 * latency)
+        t_refresh = time.perf_counter() - start
+        assert snapshot is not before and snapshot.taken_at > before.taken_at
+
+        orchestrator.close()
+        assert not refresher.running
+
+    print(f"price source latency {latency:.2f} s per request")
+    print(f"sidebar render, synchronous valuation:  {min(sync) * 1000:7.0f} .. {max(sync) * 1000:.0f} ms")
+    print(f"sidebar render, background refresher:   {min(background) * 1000:7.1f} .. {max(background) * 1000:.1f} ms "
+          f"(first render {first * 1000:.1f} ms, before any prices); snapshot age shown "
+          f"{min(ages):.1f} .. {max(ages):.1f} s")
+    print(f"explicit refresh (sidebar button): {t_refresh:.2f} s; refresher stats {refresher.stats()}")
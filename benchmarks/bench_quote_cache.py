@@ -0,0 +1,78 @@
+"""
+Shared QuoteCache behaviour against a stub provider: request sharing across callers,
+coalescing of concurrent requests, stale-while-revalidate and LRU eviction.
+
+    python benchmarks/bench_quote_cache.py
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from synthetic import make_symbols
+from stubs import StubPriceProvider
+from live_market import get_live_prices
+from price_cache import QuoteCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    symbols, _ = make_symbols(40)
+    latency = 0.2
+
+    # 1. One interaction = three independent valuations (live agent, stock agent, sidebar)
+    provider = StubPriceProvider(latency=latency, batch=True)
+    _, t_direct = timed(lambda: [get_live_prices(symbols, provider=provider, use_cache=False) for _ in range(3)])
+    direct_calls = provider.calls
+
+    provider = StubPriceProvider(latency=latency, batch=True)
+    cache = QuoteCache(market_ttl=60, off_hours_ttl=60)
+    _, t_cached = timed(lambda: [cache.get_prices(symbols, provider=provider) for _ in range(3)])
+    print(f"3 valuations, 40 symbols | uncached {t_direct:5.2f} s ({direct_calls} requests) | "
+          f"shared cache {t_cached:5.2f} s ({provider.calls} requests)")
+
+    # 2. Ten concurrent callers for the same symbols share one in-flight fetch
+    provider = StubPriceProvider(latency=latency, batch=True)
+    cache = QuoteCache()
+    with ThreadPoolExecutor(10) as pool:
+        _, t = timed(lambda: list(pool.map(lambda _: cache.get_prices(symbols, provider=provider), range(10))))
+    stats = cache.stats()
+    print(f"10 concurrent callers     | {t:5.2f} s, {provider.calls} provider request(s), "
+          f"{stats['misses']} misses, {stats['coalesced']} coalesced")
+
+    # 3. Stale-while-revalidate: an expired quote is served instantly and refreshed in the background
+    clock = FakeClock()
+    provider = StubPriceProvider(latency=latency, batch=True)
+    cache = QuoteCache(market_ttl=30, off_hours_ttl=30, stale_ttl=300, clock=clock)
+    cache.get_prices(symbols, provider=provider)
+    clock.now += 45
+    quotes, t_stale = timed(cache.get_quotes, symbols, provider=provider)
+    assert all(q["cache"] == "stale" for q in quotes.values())
+    time.sleep(latency * 2)
+    quotes, t_fresh = timed(cache.get_quotes, symbols, provider=provider)
+    assert all(q["cache"] == "hit" and q["age"] == 0 for q in quotes.values())
+    clock.now += 1000
+    _, t_expired = timed(cache.get_quotes, symbols, provider=provider)
+    print(f"stale-while-revalidate    | stale served in {t_stale * 1000:.2f} ms, refreshed in background, "
+          f"fully expired -> blocking fetch {t_expired * 1000:.0f} ms")
+
+    # 4. Bounded size with LRU eviction
+    cache = QuoteCache(max_size=25)
+    provider = StubPriceProvider(latency=0.0, batch=True)
+    cache.get_prices(symbols[:20], provider=provider)
+    cache.get_prices(symbols[:5], provider=provider)        # touch: these become most recent
+    cache.get_prices(symbols[20:40], provider=provider)      # evicts the 15 least recently used
+    hot = cache.get_quotes(symbols[:5], provider=provider)
+    assert all(q["cache"] == "hit" for q in hot.values())
+    print(f"LRU                       | stats {cache.stats()}")
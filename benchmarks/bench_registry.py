@@ -0,0 +1,139 @@
+"""
+Load test of the multi-tenant PortfolioRegistry: hundreds of synthetic portfolios (CSV
+exports of different sizes), visited with a skewed (Zipf) access pattern. Each visit is one
+chat turn: sidebar stats + a MATH question. The same visits run in a fresh process with a
+bounded working set and with an unbounded one; RSS is sampled along the way.
+
+    python benchmarks/bench_registry.py [n_tenants] [n_visits] [budget_mb]
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+import numpy as np
+
+from synthetic import make_orders, write_order_history_csv
+from stubs import StubPriceProvider, StubHistoryProvider
+
+os.environ.setdefault("GROQ_API_KEY", "stub")
+os.environ["LLM_CACHE_PATH"] = ""  # keep stub answers out of the on-disk LLM cache
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def write_portfolios(directory, n_tenants, seed=22):
+    rng = np.random.default_rng(seed)
+    # Mostly small accounts, a few heavy traders
+    sizes = np.clip(rng.lognormal(np.log(3_000), 0.8, n_tenants), 200, 60_000).astype(int)
+    for i, size in enumerate(sizes):
+        orders = make_orders(int(size), n_symbols=int(rng.integers(10, 60)), start="2020-01-01", years=4, seed=i)
+        write_order_history_csv(orders, os.path.join(directory, f"acct{i:04d}.csv"))
+    return sizes
+
+
+def visits(n_tenants, n_visits, seed=23):
+    # Zipf-like popularity: a few accounts are visited all the time, most rarely
+    rng = np.random.default_rng(seed)
+    weights = 1 / np.arange(1, n_tenants + 1) ** 0.9
+    order = rng.permutation(n_tenants)
+    return [f"acct{i:04d}" for i in order[rng.choice(n_tenants, n_visits, p=weights / weights.sum())]]
+
+
+def run(directory, n_visits, budget_mb):
+    """One process, one registry; prints a JSON summary."""
+    from live_market import set_price_provider
+    from price_cache import QuoteCache, set_quote_cache
+    from price_history import PriceHistoryStore
+    from agents.portfolio_registry import PortfolioRegistry
+
+    set_price_provider(StubPriceProvider(latency=0.0, batch=True))
+    set_quote_cache(QuoteCache())
+    store = PriceHistoryStore(os.path.join(directory, "prices"), StubHistoryProvider())
+    max_bytes = int(budget_mb * 2 ** 20) if budget_mb else 2 ** 62
+    registry = PortfolioRegistry.from_directory(directory, max_bytes=max_bytes, price_history=store,
+                                                cache_dir=os.path.join(directory, "cache"))
+    tenants = registry.tenants()
+    plan = visits(len(tenants), n_visits)
+
+    baseline = rss_mb()
+    samples, over_budget, latencies = [], 0, []
+    start = time.perf_counter()
+    for n, tenant in enumerate(plan, 1):
+        t0 = time.perf_counter()
+        orchestrator = registry.get(tenant)
+        orchestrator.begin_turn()
+        orchestrator.get_portfolio_stats()
+        orchestrator.route_query("What is my XIRR?")
+        latencies.append(time.perf_counter() - t0)
+        stats = registry.stats()
+        # The tenant being served is never evicted, so it alone may exceed the budget
+        over_budget += stats["resident"] > 1 and stats["resident_bytes"] > max_bytes
+        if n % max(1, n_visits // 20) == 0:
+            samples.append((n, round(rss_mb(), 1), stats["resident"], round(stats["resident_bytes"] / 2 ** 20, 1)))
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "baseline_mb": baseline, "samples": samples, "over_budget": int(over_budget),
+        "stats": registry.stats(), "seconds": elapsed, "distinct": len(set(plan)),
+        "p50_ms": float(np.percentile(latencies, 50) * 1000), "p95_ms": float(np.percentile(latencies, 95) * 1000),
+    }))
+
+
+def child(directory, n_visits, budget_mb):
+    output = subprocess.run([sys.executable, __file__, "--run", directory, str(n_visits), str(budget_mb)],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--run"]:
+        run(sys.argv[2], int(sys.argv[3]), float(sys.argv[4]))
+        sys.exit()
+
+    n_tenants = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    n_visits = int(sys.argv[2]) if len(sys.argv) > 2 else 1_500
+    budget_mb = float(sys.argv[3]) if len(sys.argv) > 3 else 48
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        sizes = write_portfolios(tmp, n_tenants)
+        print(f"{n_tenants} portfolios ({sizes.sum():,} orders, {sizes.min():,}..{sizes.max():,} per account) "
+              f"written in {time.perf_counter() - start:.1f} s; {n_visits:,} visits")
+
+        results = {}
+        # Unbounded first: it also warms the shared price store and every Parquet data cache
+        for label, budget in (("unbounded", 0), ("bounded", budget_mb)):
+            results[label] = child(tmp, n_visits, budget)
+
+    for label, result in results.items():
+        stats = result["stats"]
+        print(f"\n{label} ({'no limit' if label == 'unbounded' else f'{budget_mb:.0f} MB'}): "
+              f"{result['distinct']} accounts visited, {stats['loads']} loads, {stats['hits']} hits, "
+              f"{stats['evictions']} evictions; {stats['resident']} resident "
+              f"({stats['resident_bytes'] / 2 ** 20:.1f} MB estimated); {result['seconds']:.1f} s, "
+              f"visit p50 {result['p50_ms']:.1f} ms / p95 {result['p95_ms']:.1f} ms")
+        print(f"  {'visit':>6}{'RSS MB':>9}{'resident':>10}{'est. MB':>9}")
+        for n, rss, resident, est in result["samples"]:
+            print(f"  {n:>6}{rss:>9.1f}{resident:>10}{est:>9.1f}")
+
+    bounded, unbounded = results["bounded"], results["unbounded"]
+    assert bounded["over_budget"] == 0
+    assert bounded["stats"]["resident_bytes"] <= budget_mb * 2 ** 20
+    # RSS levels off once the working set is full; without a bound it keeps growing with every new account
+    rss = [sample[1] for sample in bounded["samples"]]
+    half = len(rss) // 2
+    plateau_growth = max(rss[half:]) - rss[half]
+    unbounded_growth = unbounded["samples"][-1][1] - unbounded["samples"][half][1]
+    print(f"\nRSS growth over the second half of the visits: bounded {plateau_growth:.1f} MB, "
+          f"unbounded {unbounded_growth:.1f} MB; peak RSS bounded {max(rss):.0f} MB vs "
+          f"unbounded {max(s[1] for s in unbounded['samples']):.0f} MB")
+    assert plateau_growth < budget_mb, plateau_growth
+    assert max(rss) < max(s[1] for s in unbounded["samples"])
@@ -0,0 +1,130 @@
+"""
+Cold start of the Orchestrator, each step in a fresh interpreter: importing agents.orchestrator
+(plus its heaviest imports from -X importtime), creating the Orchestrator, the first sidebar
+render (stats + live valuation), the first rule-classified question and the first question
+that needs the intent model, with and without the background warm-up after the first render.
+
+    python benchmarks/bench_startup.py [--root <checkout>] [runs]
+
+--root measures another checkout (e.g. a git worktree of an older commit) with the same script.
+"""
+import os
+import sys
+import json
+import tempfile
+import subprocess
+import statistics
+
+from synthetic import make_orders, write_order_history_csv
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = r"""
+import os, sys, json, time
+root, orders, tmp, warm = sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4] == "1"
+sys.path[:0] = [os.path.join(root, "benchmarks"), root, os.path.join(root, "portfolio-data"), os.path.join(root, "live-data")]
+os.environ.setdefault("GROQ_API_KEY", "stub")
+os.environ["LLM_CACHE_PATH"] = ""
+
+times = {}
+start = time.perf_counter()
+import agents.orchestrator
+times["import"] = time.perf_counter() - start
+
+# Offline price sources (set before the first valuation; their imports are not part of the timings)
+pause = time.perf_counter()
+from stubs import StubPriceProvider, StubHistoryProvider
+from live_market import set_price_provider
+from price_history import PriceHistoryStore
+set_price_provider(StubPriceProvider(latency=0.0, batch=True))
+store = PriceHistoryStore(os.path.join(tmp, "prices"), StubHistoryProvider())
+start += time.perf_counter() - pause
+
+t = time.perf_counter()
+orchestrator = agents.orchestrator.Orchestrator(file_path=orders, price_history=store)
+times["construct"] = time.perf_counter() - t
+
+t = time.perf_counter()
+orchestrator.begin_turn()
+orchestrator.get_portfolio_stats()
+times["first_render"] = time.perf_counter() - t
+times["to_first_render"] = time.perf_counter() - start
+
+if warm and hasattr(orchestrator, "warm_up"):
+    t = time.perf_counter()
+    orchestrator.warm_up().join()
+    times["warm_up"] = time.perf_counter() - t
+
+t = time.perf_counter()
+orchestrator.begin_turn()
+orchestrator.route_query("What is my XIRR?")
+times["first_rule_query"] = time.perf_counter() - t
+
+# Several rules fire, so the intent model has to be consulted
+t = time.perf_counter()
+orchestrator.intent_classifier.predict("what is my xirr right now")
+times["first_model_query"] = time.perf_counter() - t
+print(json.dumps(times))
+"""
+
+
+def importtime(root, top=6):
+    """Heaviest modules imported by agents.orchestrator (cumulative ms, top level of the tree)."""
+    env = dict(os.environ, GROQ_API_KEY="stub")
+    code = ("import sys, os; r = sys.argv[1]; sys.path[:0] = [r, os.path.join(r, 'portfolio-data'), "
+            "os.path.join(r, 'live-data')]; import agents.orchestrator")
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", code, root], env=env,
+                         capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or not line.split("|")[1].strip().isdigit():
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = len(name) - len(name.lstrip())
+        if name.strip() == "agents.orchestrator":
+            total = int(cumulative) / 1000
+            break
+        if depth == 1:
+            # Another top-level import (e.g. site): its subtree is not ours
+            rows = []
+        elif depth == 3:
+            rows.append((int(cumulative) / 1000, name.strip()))
+    return total, sorted(rows, reverse=True)[:top]
+
+
+def cold_start(root, orders, tmp, warm, runs):
+    results = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", CHILD, root, orders, tmp, "1" if warm else "0"],
+                             capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+    return {key: statistics.median(r[key] for r in results) for key in results[0]}
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    root = os.path.dirname(HERE)
+    if args[:1] == ["--root"]:
+        root, args = os.path.abspath(args[1]), args[2:]
+    runs = int(args[0]) if args else 5
+
+    total, heaviest = importtime(root)
+    print(f"{root}\nimport agents.orchestrator (-X importtime): {total:.0f} ms; heaviest imports:")
+    for ms, name in heaviest:
+        print(f"  {ms:8.0f} ms  {name}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        orders = os.path.join(tmp, "orders.csv")
+        write_order_history_csv(make_orders(5_000, n_symbols=60, seed=8), orders)
+        # One unmeasured run fills the Parquet data cache and the price store, like a restart would find them
+        cold_start(root, orders, tmp, False, 1)
+        cold = cold_start(root, orders, tmp, False, runs)
+        warm = cold_start(root, orders, tmp, True, runs)
+
+    print(f"\ncold start, median of {runs} fresh interpreters (ms):")
+    for key in ("import", "construct", "first_render", "to_first_render", "first_rule_query", "first_model_query"):
+        print(f"  {key:<20}{cold[key] * 1000:>8.0f}")
+    if "warm_up" in warm:
+        print(f"with warm-up after the first render: warm-up {warm['warm_up'] * 1000:.0f} ms (background), then "
+              f"first rule query {warm['first_rule_query'] * 1000:.0f} ms, "
+              f"first model query {warm['first_model_query'] * 1000:.1f} ms")
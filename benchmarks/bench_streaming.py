@@ -0,0 +1,88 @@
+"""
+Peak RSS and wall time of the eager (read_excel/read_csv) and streaming loaders.
+Each measurement runs in a fresh interpreter and reads VmHWM (peak RSS of that process
+only; ru_maxrss would inherit the parent's high-water mark across fork).
+The streaming loader still keeps the cleaned order frame, so its peak grows with the file
+too; what it saves is the full workbook and raw export frame held next to it. The lazy
+mode (load_stock_data(streaming=True, lazy_orders=True), what DataContext.from_file(streaming=True)
+uses) writes the orders into the data cache instead, so its peak stays flat; the orders are
+read back from Parquet (after the peak is taken) to check them against the eager frame.
+
+    python benchmarks/bench_streaming.py
+"""
+import os
+import sys
+import json
+import tempfile
+import subprocess
+import pandas as pd
+
+from synthetic import make_orders, write_order_history_xlsx, write_order_history_csv
+
+MEASURE = r"""
+import json, sys, time
+sys.path[:0] = {paths!r}
+import pandas as pd
+from data_processor import process_stock_data
+from stream_processor import stream_stock_data
+from data_cache import load_stock_data
+def peak_mb():
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmHWM")) / 1024
+baseline = peak_mb()
+start = time.perf_counter()
+if {mode!r} == "eager":
+    frames = process_stock_data({path!r})
+elif {mode!r} == "streaming":
+    frames = stream_stock_data({path!r}, chunk_size=20_000)
+else:
+    frames = load_stock_data({path!r}, cache_dir={out!r} + ".cache", streaming=True, lazy_orders=True)
+elapsed = time.perf_counter() - start
+peak = peak_mb()
+if callable(frames[0]):
+    frames = (frames[0](),) + frames[1:]
+for name, frame in zip(("df", "portfolio_daily", "holdings"), frames):
+    frame.to_pickle({out!r} + "." + name)
+print(json.dumps({{"seconds": elapsed, "peak_mb": peak, "import_mb": baseline}}))
+"""
+
+
+def measure(mode, path, out):
+    here = os.path.dirname(os.path.abspath(__file__))
+    paths = [os.path.join(here, "..", "portfolio-data")]
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE.format(mode=mode, path=path, out=out, paths=paths)],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare(out_dir, mode):
+    for name in ("portfolio_daily", "holdings"):
+        expected = pd.read_pickle(os.path.join(out_dir, f"eager.{name}"))
+        actual = pd.read_pickle(os.path.join(out_dir, f"{mode}.{name}"))
+        pd.testing.assert_frame_equal(actual, expected, check_exact=False, check_freq=False)
+    expected = pd.read_pickle(os.path.join(out_dir, "eager.df"))
+    actual = pd.read_pickle(os.path.join(out_dir, f"{mode}.df"))
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+if __name__ == "__main__":
+    cases = [("xlsx", 50_000), ("xlsx", 200_000), ("csv", 200_000), ("csv", 1_000_000)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for fmt, rows in cases:
+            path = os.path.join(tmp_dir, f"orders_{rows}.{fmt}")
+            writer = write_order_history_xlsx if fmt == "xlsx" else write_order_history_csv
+            writer(make_orders(rows, n_symbols=300), path)
+
+            results = {}
+            for mode in ("eager", "streaming", "lazy"):
+                results[mode] = measure(mode, path, os.path.join(tmp_dir, mode))
+            compare(tmp_dir, "streaming")
+            compare(tmp_dir, "lazy")
+
+            line = " | ".join(
+                f"{mode} {r['seconds']:6.2f} s, peak {r['peak_mb']:7.1f} MB" for mode, r in results.items()
+            )
+            print(f"{fmt:>4} {rows:>9} rows | {line}")
+    print(f"(interpreter + pandas import alone: ~{results['eager']['import_mb']:.0f} MB)")
@@ -0,0 +1,157 @@
+"""
+Telemetry of the query pipeline: cost of a span with telemetry disabled and enabled, chat
+turns with and without it, and what it exports - one JSON trace per turn with its stage
+spans, LLM requests/tokens/latency per agent and model (against the local stub LLM server),
+price quotes by status, the Prometheus file and /metrics endpoint, and a per-request profile.
+
+    python benchmarks/bench_telemetry.py [turns]
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import urllib.request
+
+from synthetic import make_orders, write_order_history_csv
+from stubs import StubPriceProvider, StubHistoryProvider
+from stub_llm_server import StubLLMServer
+from live_market import set_price_provider, map_symbol
+from price_cache import QuoteCache, set_quote_cache
+from price_history import PriceHistoryStore, set_price_history
+
+os.environ.setdefault("GROQ_API_KEY", "stub")
+os.environ["LLM_CACHE_PATH"] = ""  # keep stub answers out of the on-disk LLM cache
+os.environ.pop("TELEMETRY", None)
+from agents.telemetry import Telemetry, set_telemetry, span
+from agents.llm_cache import ResponseCache
+from agents.llm_client import LLMClient
+from agents.orchestrator import Orchestrator
+
+
+def per_span_ns(n=200_000):
+    start = time.perf_counter()
+    for _ in range(n):
+        with span("bench"):
+            pass
+    return (time.perf_counter() - start) / n * 1e9
+
+
+def empty_loop_ns(n=200_000):
+    start = time.perf_counter()
+    for _ in range(n):
+        pass
+    return (time.perf_counter() - start) / n * 1e9
+
+
+def turn(orchestrator, query):
+    start = time.perf_counter()
+    orchestrator.begin_turn()
+    orchestrator.get_portfolio_stats()
+    orchestrator.route_query(query)
+    return time.perf_counter() - start
+
+
+def read_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+if __name__ == "__main__":
+    n_turns = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    server = StubLLMServer(n_tokens=20, token_delay=0.001, first_token_delay=0.01).start()
+    set_quote_cache(QuoteCache())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 1. Span overhead
+        set_telemetry(Telemetry(enabled=False))
+        baseline = empty_loop_ns()
+        disabled_ns = per_span_ns() - baseline
+        set_telemetry(Telemetry(enabled=True, log_path=os.path.join(tmp, "spans.jsonl")))
+        enabled_ns = per_span_ns() - baseline
+
+        file_path = os.path.join(tmp, "orders.csv")
+        write_order_history_csv(make_orders(5_000, n_symbols=40, seed=25), file_path)
+        set_price_history(PriceHistoryStore(os.path.join(tmp, "prices"), StubHistoryProvider()))
+
+        # 2. Chat turns (rule-classified MATH question, live valuation from the quote cache)
+        disabled = Telemetry(enabled=False)
+        enabled = Telemetry(enabled=True, log_path=os.path.join(tmp, "turns.jsonl"))
+        set_telemetry(enabled)
+        llm_client = LLMClient(api_key="stub", base_url=server.base_url)
+        orchestrator = Orchestrator(file_path=file_path, llm_client=llm_client)
+        holdings = orchestrator.data_context.holdings
+        mapped = [map_symbol(s) for s in orchestrator.live_agent.valuation.symbol_table(holdings)["Symbol"]]
+        set_price_provider(StubPriceProvider(latency=0.0, batch=True, missing=mapped[:2]))
+        turn(orchestrator, "What is my XIRR?")
+        times = {"off": [], "on": []}
+        for i in range(n_turns):
+            for label, telemetry in (("off", disabled), ("on", enabled)):
+                set_telemetry(telemetry)
+                times[label].append(turn(orchestrator, "What is my XIRR?"))
+        mean = {label: sum(t) / len(t) for label, t in times.items()}
+        traced = [r for r in read_records(os.path.join(tmp, "turns.jsonl")) if r["event"] == "turn"]
+        assert len(traced) >= n_turns
+        spans_per_turn = max(len(r["spans"]) for r in traced)
+        # Disabled, the instrumentation points of a turn cost well under 1% of it
+        assert spans_per_turn * disabled_ns < 0.01 * mean["off"] * 1e9
+
+        # 3. What a traced session exports
+        log_path, prom_path = os.path.join(tmp, "telemetry.jsonl"), os.path.join(tmp, "metrics.prom")
+        telemetry = Telemetry(enabled=True, log_path=log_path, prom_path=prom_path, prom_interval=0)
+        set_telemetry(telemetry)
+        set_quote_cache(QuoteCache(market_ttl=0, off_hours_ttl=0, stale_ttl=0))  # every valuation fetches
+        orchestrator = Orchestrator(file_path=file_path, llm_client=llm_client)
+        orchestrator.analytics_agent.response_cache = ResponseCache(max_entries=0)
+        orchestrator.edu_agent.response_cache = ResponseCache(max_entries=0)
+        orchestrator.begin_turn()
+        orchestrator.get_portfolio_stats()  # a sidebar-only rerun, traced without a question
+        for query in ("What is my XIRR?", "What is a stop loss?", "Analyze my portfolio"):
+            orchestrator.begin_turn()
+            orchestrator.get_portfolio_stats()
+            orchestrator.route_query(query)
+        orchestrator.begin_turn()
+        answer = "".join(orchestrator.route_query_stream("Explain what a mutual fund is"))
+        assert answer.startswith("token0")
+
+        records = read_records(log_path)
+        turns = [r for r in records if r["event"] == "turn"]
+        assert [r["intent"] for r in turns] == [None, "MATH", "EDU", "ANALYTICS", "EDU"], [r["intent"] for r in turns]
+        stages = {s["name"] for r in turns for s in r["spans"]}
+        assert {"classify_intent", "answer", "valuation", "live_prices"} <= stages, stages
+        assert any(r["event"] == "route" for r in records)
+        edu = turns[2]
+
+        server_metrics = telemetry.serve(port=0)
+        url = f"http://127.0.0.1:{server_metrics.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            text = response.read().decode("utf-8")
+        with open(prom_path) as f:
+            assert "portfolio_turns_total" in f.read()
+        for needle in ('llm_requests_total{agent="education"', 'llm_requests_total{agent="analytics"',
+                       'llm_tokens_total{agent="education",kind="completion"', 'stream="true"',
+                       'price_quotes_total{cache="miss",status="ok"}', 'status="missing"',
+                       'stage_seconds_bucket{stage="live_prices",le="+Inf"}', "llm_seconds_sum",
+                       "portfolio_quote_cache_misses", "portfolio_llm_client_requests"):
+            assert needle in text, needle
+        server_metrics.shutdown()
+
+        # 4. Profiling one request
+        orchestrator.begin_turn()
+        orchestrator.route_query("What is my XIRR?", profile="cprofile")
+        report = orchestrator.last_profile
+        assert "function calls" in report and "_route" in report
+        assert read_records(log_path)[-1]["event"] == "profile"
+
+    server.stop()
+    print(f"span overhead: disabled {disabled_ns:.0f} ns, enabled {enabled_ns:.0f} ns (empty loop {baseline:.0f} ns)")
+    print(f"chat turn (stats + MATH answer), mean of {n_turns}: telemetry off {mean['off'] * 1000:.2f} ms, "
+          f"on {mean['on'] * 1000:.2f} ms ({(mean['on'] / mean['off'] - 1) * 100:+.1f}%); {spans_per_turn} spans "
+          f"per turn cost {spans_per_turn * disabled_ns / 1000:.1f} us when disabled")
+    print(f"EDU turn trace: {edu['ms']:.1f} ms, spans " +
+          ", ".join(f"{s['name']} {s['ms']:.1f} ms" for s in edu["spans"]))
+    print("/metrics (LLM and price series):")
+    for line in text.splitlines():
+        if line.startswith(("portfolio_llm_requests_total", "portfolio_llm_tokens_total", "portfolio_price_quotes_total")):
+            print(f"  {line}")
+    print(f"profile report of one MATH request: {len(report.splitlines())} lines")
@@ -0,0 +1,85 @@
+"""
+Trade retrieval for StockAgent questions on a 1M-trade history: index build time,
+per-question lookup cost, correctness against pandas filters, and how many
+"did I buy X in <month>?" questions the old last-200-rows prompt could answer at all.
+
+    python benchmarks/bench_trade_index.py [n_rows]
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from synthetic import make_orders
+from data_processor import process_orders, DATE_COLUMN
+from context_builder import compact_trades, estimate_tokens
+from trade_index import TradeIndex, parse_query
+
+
+def pandas_filter(df, symbols, start, end, side):
+    mask = np.ones(len(df), dtype=bool)
+    if symbols is not None:
+        mask &= df['Symbol'].isin(symbols).to_numpy()
+    if start is not None:
+        mask &= (df[DATE_COLUMN] >= start).to_numpy() & (df[DATE_COLUMN] < end).to_numpy()
+    if side is not None:
+        mask &= (df['Type'] == side).to_numpy()
+    return np.flatnonzero(mask)
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat
+
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    df, _, _ = process_orders(make_orders(n_rows, n_symbols=400, years=6, seed=16))
+    print(f"{len(df):,} executed trades, {df['Symbol'].nunique()} symbols, "
+          f"{df[DATE_COLUMN].min():%Y-%m-%d} .. {df[DATE_COLUMN].max():%Y-%m-%d}")
+
+    index, t_build = timed(lambda: TradeIndex(df), 1)
+    print(f"index build {t_build * 1000:.0f} ms")
+
+    questions = [
+        ("Did I buy SYM0042 in November 2023?", ["SYM0042"], "2023-11-01", "2023-12-01", "BUY"),
+        ("What did I do with Synthetic Industries 0107 Ltd in 2021?", ["SYM0107"], "2021-01-01", "2022-01-01", None),
+        ("Show my sells of SYM0003 and SYM0300 between 2020-03-01 and 2020-06-30", ["SYM0003", "SYM0300"], "2020-03-01", "2020-07-01", "SELL"),
+        ("Which trades did I make on 15-06-2022?", None, "2022-06-15", "2022-06-16", None),
+        ("All my SYM0399 trades", ["SYM0399"], None, None, None),
+    ]
+    print(f"{'question':<72} {'matches':>8} {'search':>9} {'pandas':>9} {'prompt':>7}")
+    for question, symbols, start, end, side in questions:
+        positions, t_search = timed(lambda: index.search(question), 200)
+        filters = parse_query(question)
+        assert (filters["start"], filters["end"], filters["side"]) == (
+            pd.Timestamp(start) if start else None, pd.Timestamp(end) if end else None, side), filters
+        expected, t_pandas = timed(lambda: pandas_filter(df, symbols, filters["start"], filters["end"], side), 3)
+        assert np.array_equal(positions, expected), question
+        text = index.retrieve(question)
+        print(f"{question:<72} {len(positions):>8,} {t_search * 1e6:>7.0f}µs {t_pandas * 1000:>7.1f}ms "
+              f"{estimate_tokens(text):>7,}")
+        assert t_search < 1e-3
+    assert index.search("How is my portfolio doing?") is None
+
+    # Coverage: "did I buy <symbol> in <month>?" for trades sampled from the whole history
+    rng = np.random.default_rng(0)
+    sample = df.iloc[rng.integers(0, len(df), 500)]
+    last_200 = set(df.index[-200:])
+    old_found = new_found = 0
+    start = time.perf_counter()
+    for label, row in sample.iterrows():
+        question = f"Did I {row['Type'].lower()} {row['Symbol']} in {row[DATE_COLUMN]:%B %Y}?"
+        old_found += label in last_200
+        new_found += df.index.get_loc(label) in set(index.search(question))
+    t_lookup = (time.perf_counter() - start) / len(sample)
+    print(f"500 questions about trades across the history: last-200-rows prompt could see {old_found}, "
+          f"index found {new_found} ({t_lookup * 1e6:.0f} µs per question incl. parsing)")
+    assert new_found == len(sample)
+
+    old = estimate_tokens(compact_trades(df, 4000, 200, with_names=True))
+    new = estimate_tokens(compact_trades(df, 2400, 30, with_names=True))
+    print(f"trades in the StockAgent system prompt: last 200 rows ~{old:,} tokens -> last 30 rows ~{new:,} tokens, "
+          f"plus only the matching trades per question")
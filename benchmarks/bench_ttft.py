@@ -0,0 +1,80 @@
+"""
+Time-to-first-token and total latency of the blocking vs streaming answer paths
+(Orchestrator.route_query vs route_query_stream, StockAgent.chat vs chat_stream),
+against the local stub LLM server.
+
+    python benchmarks/bench_ttft.py [first_token_delay] [token_delay] [n_tokens]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from synthetic import make_orders, write_order_history_csv
+from stubs import StubPriceProvider, StubHistoryProvider
+from stub_llm_server import StubLLMServer
+from live_market import set_price_provider
+from price_history import PriceHistoryStore, set_price_history
+
+os.environ.setdefault("GROQ_API_KEY", "stub")
+os.environ["LLM_CACHE_PATH"] = ""
+from agents.llm_cache import ResponseCache
+from agents.llm_client import LLMClient
+from agents.orchestrator import Orchestrator
+from agent import StockAgent
+
+QUERIES = [("EDU", "What is a stop loss?"), ("ANALYTICS", "Analyze my portfolio")]
+
+
+def measure_blocking(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    total = time.perf_counter() - start
+    return total, total  # nothing is shown before the full answer
+
+
+def measure_stream(fn, *args):
+    start = time.perf_counter()
+    first = None
+    for _ in fn(*args):
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def row(label, blocking, streaming):
+    print(f"{label:<28} blocking: first {blocking[0] * 1000:6.0f} ms total {blocking[1] * 1000:6.0f} ms | "
+          f"streaming: first {streaming[0] * 1000:6.0f} ms total {streaming[1] * 1000:6.0f} ms")
+
+
+if __name__ == "__main__":
+    first_token_delay = float(sys.argv[1]) if len(sys.argv) > 1 else 0.25
+    token_delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    n_tokens = int(sys.argv[3]) if len(sys.argv) > 3 else 150
+    server = StubLLMServer(n_tokens=n_tokens, token_delay=token_delay, first_token_delay=first_token_delay).start()
+    set_price_provider(StubPriceProvider(latency=0.0, batch=True))
+    print(f"stub LLM: {first_token_delay * 1000:.0f} ms to first token, {token_delay * 1000:.0f} ms/token, {n_tokens} tokens")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, "orders.csv")
+        write_order_history_csv(make_orders(5_000, n_symbols=40, seed=11), file_path)
+        set_price_history(PriceHistoryStore(os.path.join(tmp, "prices"), StubHistoryProvider()))
+
+        llm_client = LLMClient(api_key="stub", base_url=server.base_url)
+        orchestrator = Orchestrator(file_path=file_path, llm_client=llm_client)
+        # No response caching: every call goes to the LLM
+        orchestrator.analytics_agent.response_cache = ResponseCache(max_entries=0)
+        orchestrator.edu_agent.response_cache = ResponseCache(max_entries=0)
+
+        for intent, query in QUERIES:
+            blocking = measure_blocking(orchestrator.route_query, query)
+            streaming = measure_stream(orchestrator.route_query_stream, query)
+            row(f"route_query ({intent})", blocking, streaming)
+
+        agent = StockAgent(file_path=file_path, llm_client=llm_client)
+        blocking = measure_blocking(agent.chat, "Did I buy SYM0001 in 2021?")
+        streaming = measure_stream(agent.chat_stream, "Did I buy SYM0001 in 2021?")
+        row("StockAgent.chat", blocking, streaming)
+        assert agent.messages[-1]["role"] == "assistant" and agent.messages[-1]["content"].startswith("token0")
+
+    server.stop()
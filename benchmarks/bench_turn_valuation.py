@@ -0,0 +1,83 @@
+"""
+Price fetches and wall time per chat turn (sidebar stats + route_query), with the
+Orchestrator's per-turn valuation snapshot disabled (previous behaviour) and enabled.
+
+Prices come from a stub provider with injected latency; the shared quote cache is
+given a zero TTL so that every valuation is a real round trip, as it was before the cache.
+
+    python benchmarks/bench_turn_valuation.py [price_latency_seconds]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from synthetic import make_orders, write_order_history_csv
+from stubs import StubPriceProvider, StubChatClient, StubHistoryProvider
+from live_market import set_price_provider
+from price_cache import QuoteCache, set_quote_cache
+from price_history import PriceHistoryStore, set_price_history
+
+os.environ.setdefault("GROQ_API_KEY", "stub")
+os.environ["LLM_CACHE_PATH"] = ""  # keep stub answers out of the on-disk LLM cache
+from agents.orchestrator import Orchestrator
+
+QUERIES = [
+    ("MATH", "What is my XIRR?"),
+    ("ANALYTICS", "Which sector dominates my portfolio?"),
+    ("LIVE", "What is my portfolio worth right now?"),
+    ("FALLBACK", "Tell me something about my holdings"),
+]
+
+
+def make_orchestrator(file_path, memoize, intents):
+    orchestrator = Orchestrator(file_path=file_path, memoize_valuation=memoize)
+    # Intent classifier answers with the intent queued for the query; agents answer instantly
+    orchestrator.client = StubChatClient(reply=lambda request: intents[request["messages"][-1]["content"]])
+    orchestrator.analytics_agent.client = StubChatClient()
+    orchestrator.edu_agent.client = StubChatClient()
+    return orchestrator
+
+
+def run_turns(orchestrator, provider):
+    rows = []
+    for label, query in QUERIES:
+        calls_before = provider.calls
+        orchestrator.begin_turn()              # one Streamlit rerun
+        orchestrator.get_portfolio_stats()     # sidebar
+        orchestrator.route_query(query)        # chat answer
+        stats = orchestrator.last_turn_stats
+        rows.append((label, stats["price_fetches"], provider.calls - calls_before,
+                     stats["price_fetch_seconds"], stats["total_seconds"]))
+    return rows
+
+
+if __name__ == "__main__":
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.3
+    provider = StubPriceProvider(latency=latency, batch=True)
+    set_price_provider(provider)
+
+    intents = {query: (label if label != "FALLBACK" else "SOMETHING ELSE") for label, query in QUERIES}
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, "orders.csv")
+        write_order_history_csv(make_orders(5_000, n_symbols=60, seed=8), file_path)
+        # Sidebar growth numbers read daily closes from a local store
+        set_price_history(PriceHistoryStore(os.path.join(tmp, "prices"), StubHistoryProvider()))
+
+        results = {}
+        for memoize in (False, True):
+            set_quote_cache(QuoteCache(market_ttl=0, off_hours_ttl=0, stale_ttl=0))
+            orchestrator = make_orchestrator(file_path, memoize, intents)
+            results[memoize] = run_turns(orchestrator, provider)
+
+    print(f"price source latency {latency:.2f} s per request")
+    print(f"{'turn':<10}{'before: fetches':>16}{'provider req':>14}{'fetch s':>9}{'turn s':>8}"
+          f"{'after: fetches':>17}{'provider req':>14}{'fetch s':>9}{'turn s':>8}")
+    for before, after in zip(results[False], results[True]):
+        print(f"{before[0]:<10}{before[1]:>16}{before[2]:>14}{before[3]:>9.2f}{before[4]:>8.2f}"
+              f"{after[1]:>17}{after[2]:>14}{after[3]:>9.2f}{after[4]:>8.2f}")
+    for memoize, label in ((False, "before"), (True, "after")):
+        rows = results[memoize]
+        print(f"{label:<7} total: {sum(r[1] for r in rows)} valuations, {sum(r[2] for r in rows)} provider requests, "
+              f"{sum(r[4] for r in rows):.2f} s over {len(rows)} turns")
+    assert all(r[1] == 1 for r in results[True])
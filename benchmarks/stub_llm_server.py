@@ -0,0 +1,160 @@
+"""
+Local stand-in for the Groq (OpenAI-compatible) chat-completions endpoint.
+
+Answers POST .../chat/completions with a canned reply of n_tokens tokens, either as one
+JSON body or, for stream=True, as server-sent events. Latency is simulated with
+first_token_delay (time before the first token, i.e. prompt processing) and token_delay
+(between tokens); fail_rate answers that share of requests with a 503 instead.
+Speaks HTTP/1.1 keep-alive and counts connections and requests.
+
+    server = StubLLMServer(token_delay=0.02).start()
+    client = Groq(api_key="stub", base_url=server.base_url)
+    ...
+    server.stop()
+"""
+import json
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Without this, small writes on a reused connection stall on delayed ACKs (~40 ms)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.stub.count("connections")
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        stub = self.server.stub
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        stub.count("requests")
+        if stub.should_fail():
+            stub.count("failures")
+            payload = b'{"error": {"message": "stub overloaded", "type": "server_error"}}'
+            self.send_response(503)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        with stub.lock:
+            stub.active += 1
+            stub.max_active = max(stub.max_active, stub.active)
+        try:
+            if body.get("stream"):
+                self._stream(stub, body)
+            else:
+                self._complete(stub, body)
+        finally:
+            with stub.lock:
+                stub.active -= 1
+
+    def _complete(self, stub, body):
+        tokens = stub.tokens(body)
+        time.sleep(stub.first_token_delay + stub.token_delay * (len(tokens) - 1))
+        payload = json.dumps({
+            "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": body.get("model"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": "".join(tokens)}}],
+            "usage": stub.usage(body, tokens),
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, stub, body):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        time.sleep(stub.first_token_delay)
+        tokens = stub.tokens(body)
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(stub.token_delay)
+            self._event({
+                "id": "stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": body.get("model"),
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+            })
+        self._event({
+            "id": "stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": body.get("model"),
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            # Like Groq: token usage arrives with the last chunk
+            "x_groq": {"id": "stub", "usage": stub.usage(body, tokens)},
+        })
+        self._chunk(b"data: [DONE]\n\n")
+        self._chunk(b"")
+
+    def _event(self, data):
+        self._chunk(f"data: {json.dumps(data)}\n\n".encode("utf-8"))
+
+    def _chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+
+class StubLLMServer:
+    def __init__(self, n_tokens=60, token_delay=0.01, first_token_delay=0.2, reply=None, fail_rate=0.0, seed=0,
+                 host="127.0.0.1", port=0):
+        self.n_tokens = n_tokens
+        self.token_delay = token_delay
+        self.first_token_delay = first_token_delay
+        # reply(request_body) -> str overrides the canned answer (split into tokens on spaces)
+        self.reply = reply
+        self.fail_rate = fail_rate
+        self._rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = {"connections": 0, "requests": 0, "failures": 0}
+        self.active = 0
+        self.max_active = 0
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def should_fail(self):
+        with self.lock:
+            return self._rng.random() < self.fail_rate
+
+    def tokens(self, body):
+        if self.reply is not None:
+            words = self.reply(body).split(" ")
+            return [w if i == 0 else " " + w for i, w in enumerate(words)]
+        return [f"token{i} " for i in range(self.n_tokens)]
+
+    @staticmethod
+    def usage(body, tokens):
+        # Rough count (words of the prompt), enough to tell requests apart
+        prompt = sum(len(str(m.get("content", "")).split()) for m in body.get("messages", []))
+        return {"prompt_tokens": prompt, "completion_tokens": len(tokens), "total_tokens": prompt + len(tokens)}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,156 @@
+"""
+Local stand-ins for the network dependencies (price source, LLM API) used by the benchmarks.
+"""
+import threading
+import time
+import zlib
+import numpy as np
+import pandas as pd
+
+
+class StubPriceProvider:
+    """
+    Price provider with injected latency. Implements the same interface as
+    live_market.YFinanceProvider: fetch_one(mapped_symbol) and, if batch=True, fetch_batch(mapped_symbols).
+    """
+
+    def __init__(self, latency=0.05, batch_latency=None, batch=False, missing=(), failing=(), hanging=(),
+                 hang_seconds=5.0):
+        self.latency = latency
+        self.batch_latency = latency if batch_latency is None else batch_latency
+        self.missing = set(missing)
+        self.failing = set(failing)
+        self.hanging = set(hanging)
+        self.hang_seconds = hang_seconds
+        self.calls = 0
+        self.symbols_requested = 0
+        self._lock = threading.Lock()
+        if batch:
+            self.fetch_batch = self._fetch_batch
+
+    @staticmethod
+    def price_of(mapped_symbol):
+        # Deterministic, symbol-dependent price
+        return 100.0 + sum(map(ord, mapped_symbol)) % 900
+
+    def _count(self, n):
+        with self._lock:
+            self.calls += 1
+            self.symbols_requested += n
+
+    def fetch_one(self, mapped_symbol):
+        self._count(1)
+        time.sleep(self.hang_seconds if mapped_symbol in self.hanging else self.latency)
+        if mapped_symbol in self.failing:
+            raise ConnectionError(f"stub failure for {mapped_symbol}")
+        if mapped_symbol in self.missing:
+            return None
+        return self.price_of(mapped_symbol)
+
+    def _fetch_batch(self, mapped_symbols):
+        self._count(len(mapped_symbols))
+        time.sleep(self.batch_latency)
+        return {
+            sym: self.price_of(sym) for sym in mapped_symbols
+            if sym not in self.missing and sym not in self.failing and sym not in self.hanging
+        }
+
+
+class StubHistoryProvider:
+    """
+    Daily bar source with injected latency. Implements price_history.YFinanceHistoryProvider's
+    fetch_history(mapped_symbol, start, end): deterministic per-symbol random-walk bars on
+    weekdays, so any two requests for the same day agree. levels ({mapped_symbol: price})
+    anchors a symbol's walk around a price level (in 2020), e.g. its traded prices; drift is
+    the daily log drift. volatility > 0 adds random-walk noise with that daily standard
+    deviation, from a market factor shared by all symbols (correlation 0.36) and a
+    symbol-specific one, still fixed per day.
+    """
+
+    def __init__(self, latency=0.0, failing=(), missing=(), levels=None, drift=0.0002, volatility=0.0):
+        self.latency = latency
+        self.levels = dict(levels or {})
+        self.drift = drift
+        self.volatility = volatility
+        self._walks = {}
+        self.failing = set(failing)
+        self.missing = set(missing)
+        self.calls = 0
+        self.rows_served = 0
+        self._lock = threading.Lock()
+
+    def closes(self, mapped_symbol, days):
+        seed = zlib.crc32(mapped_symbol.encode())
+        level = self.levels.get(mapped_symbol, 50 + seed % 1500)
+        ordinal = (days - pd.Timestamp("2020-01-01")).days.to_numpy()
+        # Log-price is a fixed function of the day: a drift (default ~7%/year) plus a few symbol-specific waves
+        phase = (seed % 997) / 997 * 2 * np.pi
+        log_price = (np.log(level) + self.drift * ordinal + 0.15 * np.sin(ordinal / 45 + phase)
+                     + 0.05 * np.sin(ordinal / 7 + 2 * phase))
+        if self.volatility:
+            log_price = log_price + self.volatility * (0.6 * self._walk(0, ordinal) + 0.8 * self._walk(seed, ordinal))
+        return np.exp(log_price)
+
+    def _walk(self, seed, ordinal):
+        # Gaussian random walk over days 2000-01-01 .. 2040, the same for every request
+        with self._lock:
+            walk = self._walks.get(seed)
+            if walk is None:
+                steps = np.random.default_rng(seed).standard_normal(20 * 365 + 40 * 365)
+                walk = self._walks[seed] = np.cumsum(steps) - np.cumsum(steps)[20 * 365]
+        return walk[ordinal + 20 * 365]
+
+    def fetch_history(self, mapped_symbol, start, end):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        if mapped_symbol in self.failing:
+            raise ConnectionError(f"stub failure for {mapped_symbol}")
+        days = pd.date_range(start, end)
+        days = days[days.dayofweek < 5]
+        if mapped_symbol in self.missing or not len(days):
+            return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"])
+        close = self.closes(mapped_symbol, days)
+        with self._lock:
+            self.rows_served += len(days)
+        return pd.DataFrame({
+            "Open": close * 0.995, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+            "Volume": np.full(len(days), 10_000, dtype=np.int64),
+        }, index=days)
+
+
+class _Message:
+    def __init__(self, content):
+        self.content = content
+
+
+class _Choice:
+    def __init__(self, content):
+        self.message = _Message(content)
+
+
+class _Completion:
+    def __init__(self, content):
+        self.choices = [_Choice(content)]
+
+
+class StubChatClient:
+    """
+    Stand-in for groq.Groq: client.chat.completions.create(...) sleeps for latency and
+    returns a fixed reply (reply may also be a callable taking the request kwargs).
+    """
+
+    def __init__(self, reply="stub answer", latency=0.0):
+        self.reply = reply
+        self.latency = latency
+        self.calls = 0
+        self.requests = []
+        self.chat = self
+        self.completions = self
+
+    def create(self, **kwargs):
+        self.calls += 1
+        self.requests.append(kwargs)
+        time.sleep(self.latency)
+        content = self.reply(kwargs) if callable(self.reply) else self.reply
+        return _Completion(content)
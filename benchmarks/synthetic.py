@@ -0,0 +1,88 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Make the repo modules importable the same way streamlit_app.py does
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for sub in ("", "portfolio-data", "live-data"):
+    path = os.path.join(ROOT, sub)
+    if path not in sys.path:
+        sys.path.append(path)
+
+COLUMNS = [
+    "Stock name", "Symbol", "ISIN", "Type", "Quantity", "Value",
+    "Exchange", "Exchange Order Id", "Execution date and time", "Order status"
+]
+
+
+def make_symbols(n_symbols):
+    symbols = [f"SYM{i:04d}" for i in range(n_symbols)]
+    names = [f"Synthetic Industries {i:04d} Ltd" for i in range(n_symbols)]
+    return symbols, names
+
+
+def make_orders(n_rows, n_symbols=50, start="2019-01-01", years=5, seed=42):
+    """
+    Generates a synthetic order history in the same layout as the broker export
+    (string dates in '%d-%m-%Y %I:%M %p', a few cancelled/blank rows).
+    """
+    rng = np.random.default_rng(seed)
+    symbols, names = make_symbols(n_symbols)
+    sym_idx = rng.integers(0, n_symbols, n_rows)
+
+    start_ts = pd.Timestamp(start)
+    minutes = rng.integers(0, years * 365 * 24 * 60, n_rows)
+    stamps = start_ts + pd.to_timedelta(minutes, unit="m")
+
+    # Mostly buys so holdings stay positive, like a real accumulation portfolio
+    types = np.where(rng.random(n_rows) < 0.7, "BUY", "SELL")
+    quantity = rng.integers(1, 50, n_rows)
+    base_price = 50 + (np.arange(n_symbols) * 37) % 2000
+    price = base_price[sym_idx] * rng.uniform(0.8, 1.2, n_rows)
+    value = np.round(quantity * price, 2)
+    status = np.where(rng.random(n_rows) < 0.95, "Executed", "Cancelled")
+
+    df = pd.DataFrame({
+        "Stock name": np.array(names, dtype=object)[sym_idx],
+        "Symbol": np.array(symbols, dtype=object)[sym_idx],
+        "ISIN": [f"INE{i:09d}" for i in sym_idx],
+        "Type": types,
+        "Quantity": quantity,
+        "Value": value,
+        "Exchange": "NSE",
+        "Exchange Order Id": np.arange(n_rows).astype(str),
+        "Execution date and time": stamps.strftime("%d-%m-%Y %I:%M %p"),
+        "Order status": status,
+    }, columns=COLUMNS)
+
+    # A sprinkle of incomplete rows that the cleaning step must drop
+    blank = rng.random(n_rows) < 0.005
+    df.loc[blank, "Symbol"] = None
+    return df
+
+
+def write_order_history_xlsx(orders, file_path):
+    """Writes orders with the 5 metadata rows the broker export has above the header."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Orders")
+    ws.append(["Stock Order History"])
+    ws.append(["Name", "Synthetic Investor"])
+    ws.append(["Client Code", "SYN000"])
+    ws.append(["Generated", "Benchmark"])
+    ws.append([])
+    ws.append(COLUMNS)
+    for row in orders.itertuples(index=False):
+        ws.append([None if (isinstance(v, float) and np.isnan(v)) else v for v in row])
+    wb.save(file_path)
+    return file_path
+
+
+def write_order_history_csv(orders, file_path):
+    """CSV variant of the export, with the same 5 metadata rows above the header."""
+    with open(file_path, "w", newline="", encoding="utf-8") as f:
+        f.write("Stock Order History\nName,Synthetic Investor\nClient Code,SYN000\nGenerated,Benchmark\n\n")
+        orders.to_csv(f, index=False)
+    return file_path
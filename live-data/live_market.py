@@ -1,57 +1,198 @@
-import yfinance as yf
-import requests
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
-def get_live_prices(symbols):
+# Per-symbol fetch status returned by fetch_live_quotes
+STATUS_OK = "ok"
+STATUS_MISSING = "missing"   # provider answered but had no price
+STATUS_ERROR = "error"       # provider raised
+STATUS_TIMEOUT = "timeout"   # per-symbol or overall deadline hit
+
+
+def map_symbol(sym):
+    # Symbol Mapping: bare NSE symbols need the .NS suffix on Yahoo (indices like ^NSEI are kept as is)
+    return f"{sym}.NS" if '.' not in sym and not sym.startswith('^') else sym
+
+
+class YFinanceProvider:
     """
-    Fetch live prices using standard yfinance.
-    Returns empty dict if blocked or failed.
+    Default price source. fetch_batch uses one multi-symbol download request;
+    fetch_one is the per-symbol fallback (fast_info, then a 1d history).
     """
-    current_prices = {}
-    
-    # Try to set a basic user agent, but let yfinance handle the rest
-    # Using 'v8' endpoint via Ticker.fast_info is usually best
-    
-    for sym in symbols:
-        # Symbol Mapping
-        if '.' not in sym:
-            mapped_sym = f"{sym}.NS"
-        else:
-            mapped_sym = sym
-            
-        try:
-            ticker = yf.Ticker(mapped_sym)
-            price = None
-            
-            # fast_info
-            if hasattr(ticker, 'fast_info'):
-                try:
-                    price = ticker.fast_info.get('last_price')
-                except:
-                    pass
-            
-            # history fallback
-            if price is None:
-                try:
-                     hist = ticker.history(period="1d")
-                     if not hist.empty:
-                         price = hist['Close'].iloc[-1]
-                except:
-                    pass
-
-            if price is not None:
-                current_prices[sym] = price
-            else:
-                # Silent fail
+
+    def __init__(self, timeout=10):
+        self.timeout = timeout
+
+    def fetch_batch(self, mapped_symbols):
+        # yfinance is imported on the first fetch: it costs ~0.5 s at startup otherwise
+        import yfinance as yf
+        data = yf.download(
+            mapped_symbols, period="1d", progress=False, threads=False,
+            timeout=self.timeout, multi_level_index=True,
+        )
+        if data is None or data.empty:
+            return {}
+        closes = data['Close'].ffill().iloc[-1]
+        return {sym: float(price) for sym, price in closes.items() if price == price}
+
+    def fetch_one(self, mapped_symbol):
+        import yfinance as yf
+        ticker = yf.Ticker(mapped_symbol)
+        price = None
+
+        # fast_info
+        if hasattr(ticker, 'fast_info'):
+            try:
+                price = ticker.fast_info.get('last_price')
+            except Exception:
                 pass
-                
-        except Exception:
-            # Silent fail to avoid crashing orchestration
-            pass
-            
-    return current_prices
+
+        # history fallback
+        if price is None:
+            hist = ticker.history(period="1d")
+            if not hist.empty:
+                price = hist['Close'].iloc[-1]
+        return price
+
+
+_default_provider = None
+
+
+def get_price_provider():
+    global _default_provider
+    if _default_provider is None:
+        _default_provider = YFinanceProvider()
+    return _default_provider
+
+
+def set_price_provider(provider):
+    """Swap the process-wide price source (e.g. a stub for tests or an offline provider)."""
+    global _default_provider
+    _default_provider = provider
+
+
+def _collect(pool, tasks, symbol_timeout, deadline):
+    """
+    Runs tasks ({key: callable}) on the pool and waits until each has finished, exceeded
+    symbol_timeout since it started running, or the overall deadline passed.
+    Returns {key: (status, value, error)} for every key.
+    """
+    started = {}
+
+    def run(key, fn):
+        started[key] = time.monotonic()
+        return fn()
+
+    futures = {pool.submit(run, key, fn): key for key, fn in tasks.items()}
+    results = {}
+    pending = set(futures)
+
+    while pending:
+        now = time.monotonic()
+        if now >= deadline:
+            break
+        # Per-task deadline counts from when the task actually started (the pool is bounded)
+        for future in list(pending):
+            key = futures[future]
+            if key in started and now - started[key] >= symbol_timeout:
+                pending.discard(future)
+                results[key] = (STATUS_TIMEOUT, None, f"no answer within {symbol_timeout}s")
+        if not pending:
+            break
+
+        expiries = [started[futures[f]] + symbol_timeout for f in pending if futures[f] in started]
+        wake_at = min(expiries + [deadline])
+        done, pending = wait(pending, timeout=max(wake_at - now, 0.001), return_when=FIRST_COMPLETED)
+        for future in done:
+            key = futures[future]
+            try:
+                results[key] = (STATUS_OK, future.result(), None)
+            except Exception as e:
+                results[key] = (STATUS_ERROR, None, str(e))
+
+    for future in pending:
+        future.cancel()
+        results.setdefault(futures[future], (STATUS_TIMEOUT, None, "overall deadline exceeded"))
+    return results
+
+
+def fetch_live_quotes(symbols, provider=None, max_workers=8, batch_size=50,
+                      symbol_timeout=5.0, overall_timeout=12.0):
+    """
+    Fetches prices concurrently and returns a per-symbol result instead of failing silently:
+        {symbol: {"price": float | None, "status": ok|missing|error|timeout,
+                  "source": "batch" | "single" | None, "error": str | None}}
+
+    Providers exposing fetch_batch are asked for all symbols in multi-symbol batches first;
+    anything the batch did not price is fetched one-by-one on a bounded thread pool.
+    symbol_timeout bounds each request, overall_timeout bounds the whole call.
+    """
+    provider = provider or get_price_provider()
+    deadline = time.monotonic() + overall_timeout
+
+    mapped = {}
+    for sym in symbols:
+        mapped.setdefault(sym, map_symbol(sym))
+    quotes = {sym: {"price": None, "status": STATUS_MISSING, "source": None, "error": None} for sym in mapped}
+    if not mapped:
+        return quotes
+
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="price-fetch")
+    try:
+        # 1. Batched multi-symbol requests where the backend supports them
+        remaining = list(mapped)
+        if hasattr(provider, 'fetch_batch'):
+            unique = sorted(set(mapped.values()))
+            batches = {
+                i: (lambda chunk=unique[i:i + batch_size]: provider.fetch_batch(chunk))
+                for i in range(0, len(unique), batch_size)
+            }
+            batch_prices = {}
+            for status, value, error in _collect(pool, batches, symbol_timeout, deadline).values():
+                if status == STATUS_OK and value:
+                    batch_prices.update(value)
+            for sym in mapped:
+                price = batch_prices.get(mapped[sym])
+                if price is not None:
+                    quotes[sym].update(price=float(price), status=STATUS_OK, source="batch")
+            remaining = [sym for sym in mapped if quotes[sym]["status"] != STATUS_OK]
+
+        # 2. Per-symbol fallback for whatever the batch did not cover
+        if remaining and time.monotonic() < deadline:
+            singles = {sym: (lambda m=mapped[sym]: provider.fetch_one(m)) for sym in remaining}
+            for sym, (status, value, error) in _collect(pool, singles, symbol_timeout, deadline).items():
+                if status == STATUS_OK and value is not None:
+                    quotes[sym].update(price=float(value), status=STATUS_OK, source="single")
+                elif status == STATUS_OK:
+                    quotes[sym].update(status=STATUS_MISSING, source="single")
+                else:
+                    quotes[sym].update(status=status, source="single", error=error)
+        elif remaining:
+            for sym in remaining:
+                quotes[sym].update(status=STATUS_TIMEOUT, error="overall deadline exceeded")
+    finally:
+        # Don't wait for stragglers: their results are discarded
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    return quotes
+
+
+def get_live_prices(symbols, provider=None, use_cache=True, **kwargs):
+    """
+    Fetch live prices through the shared quote cache (see price_cache.QuoteCache),
+    or straight from the source with use_cache=False.
+    Returns {symbol: price} for the symbols that could be priced; empty dict if blocked or failed.
+    """
+    if use_cache:
+        from price_cache import get_quote_cache
+        return get_quote_cache().get_prices(symbols, provider=provider)
+    quotes = fetch_live_quotes(symbols, provider=provider, **kwargs)
+    return {sym: q["price"] for sym, q in quotes.items() if q["status"] == STATUS_OK}
 
 if __name__ == "__main__":
     # Test
     test_symbols = ["RELIANCE", "INFY", "GOLDBEES"]
+    quotes = fetch_live_quotes(test_symbols)
+    for sym, quote in quotes.items():
+        print(sym, quote)
     prices = get_live_prices(test_symbols)
     print("Live Prices:", prices)
@@ -0,0 +1,183 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone, time as dtime
+
+from live_market import fetch_live_quotes, STATUS_OK, STATUS_TIMEOUT
+
+# NSE trades 09:15-15:30 IST, Monday to Friday (exchange holidays are not modelled)
+IST = timezone(timedelta(hours=5, minutes=30))
+MARKET_OPEN = dtime(9, 15)
+MARKET_CLOSE = dtime(15, 30)
+
+
+def is_market_open(now=None):
+    now = datetime.fromtimestamp(now if now is not None else time.time(), IST)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() <= MARKET_CLOSE
+
+
+class _Entry:
+    __slots__ = ("price", "fetched_at", "expires_at", "stale_until")
+
+    def __init__(self, price, fetched_at, ttl, stale_ttl):
+        self.price = price
+        self.fetched_at = fetched_at
+        self.expires_at = fetched_at + ttl
+        self.stale_until = self.expires_at + stale_ttl
+
+
+class QuoteCache:
+    """
+    Process-wide live price cache shared by every agent.
+
+    - Per-symbol TTL: market_ttl while NSE is open, off_hours_ttl otherwise (or ttl_overrides[symbol]).
+    - Stale-while-revalidate: an expired quote younger than ttl + stale_ttl is served
+      immediately and refreshed on a background thread.
+    - Concurrent requests for the same symbol share one in-flight fetch.
+    - At most max_size symbols are kept, least recently used evicted first.
+    """
+
+    def __init__(self, max_size=512, market_ttl=60, off_hours_ttl=1800, stale_ttl=300,
+                 ttl_overrides=None, fetch_timeout=15.0, clock=time.time):
+        self.max_size = max_size
+        self.market_ttl = market_ttl
+        self.off_hours_ttl = off_hours_ttl
+        self.stale_ttl = stale_ttl
+        self.ttl_overrides = dict(ttl_overrides or {})
+        self.fetch_timeout = fetch_timeout
+        self.clock = clock
+
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(
+            ("hits", "stale_hits", "misses", "coalesced", "refreshes", "evictions", "fetches", "fetch_failures"), 0
+        )
+        self._served_age_sum = 0.0
+        self._max_served_age = 0.0
+
+    def ttl_for(self, symbol, now=None):
+        if symbol in self.ttl_overrides:
+            return self.ttl_overrides[symbol]
+        return self.market_ttl if is_market_open(now) else self.off_hours_ttl
+
+    def get_prices(self, symbols, provider=None):
+        """{symbol: price} for every symbol that is cached or could be fetched."""
+        return {sym: q["price"] for sym, q in self.get_quotes(symbols, provider).items() if q["status"] == STATUS_OK}
+
+    def get_quotes(self, symbols, provider=None):
+        """
+        Same shape as live_market.fetch_live_quotes, plus "age" (seconds) and
+        "cache" (hit / stale / miss / coalesced) per symbol.
+        """
+        now = self.clock()
+        quotes = {}
+        to_fetch, to_wait, to_refresh = [], {}, []
+
+        with self._lock:
+            for sym in dict.fromkeys(symbols):
+                entry = self._entries.get(sym)
+                if entry is not None and now < entry.stale_until:
+                    self._entries.move_to_end(sym)
+                    age = now - entry.fetched_at
+                    self._served_age_sum += age
+                    self._max_served_age = max(self._max_served_age, age)
+                    fresh = now < entry.expires_at
+                    self._counters["hits" if fresh else "stale_hits"] += 1
+                    quotes[sym] = self._quote(entry.price, STATUS_OK, age, "hit" if fresh else "stale")
+                    if not fresh and sym not in self._inflight:
+                        self._inflight[sym] = Future()
+                        to_refresh.append(sym)
+                elif sym in self._inflight:
+                    self._counters["coalesced"] += 1
+                    to_wait[sym] = self._inflight[sym]
+                else:
+                    self._counters["misses"] += 1
+                    self._inflight[sym] = Future()
+                    to_fetch.append(sym)
+            if to_refresh:
+                self._counters["refreshes"] += 1
+
+        if to_refresh:
+            threading.Thread(
+                target=self._fetch, args=(to_refresh, provider), name="quote-refresh", daemon=True
+            ).start()
+
+        if to_fetch:
+            for sym, quote in self._fetch(to_fetch, provider).items():
+                quotes[sym] = dict(quote, age=0.0, cache="miss")
+
+        for sym, future in to_wait.items():
+            try:
+                quote = future.result(timeout=self.fetch_timeout)
+            except Exception:
+                quote = {"price": None, "status": STATUS_TIMEOUT, "source": None, "error": "shared fetch did not finish"}
+            quotes[sym] = dict(quote, age=0.0, cache="coalesced")
+        return quotes
+
+    @staticmethod
+    def _quote(price, status, age, cache):
+        return {"price": price, "status": status, "source": "cache", "error": None, "age": age, "cache": cache}
+
+    def _fetch(self, symbols, provider):
+        """Fetches symbols (which this caller owns in _inflight) and publishes the results."""
+        try:
+            quotes = fetch_live_quotes(symbols, provider=provider)
+        except Exception as e:
+            quotes = {sym: {"price": None, "status": "error", "source": None, "error": str(e)} for sym in symbols}
+
+        now = self.clock()
+        with self._lock:
+            self._counters["fetches"] += 1
+            for sym in symbols:
+                quote = quotes[sym]
+                if quote["status"] == STATUS_OK:
+                    self._entries[sym] = _Entry(quote["price"], now, self.ttl_for(sym, now), self.stale_ttl)
+                    self._entries.move_to_end(sym)
+                else:
+                    # Failures are not cached; a stale entry (if any) keeps being served until it ages out
+                    self._counters["fetch_failures"] += 1
+                future = self._inflight.pop(sym, None)
+                if future is not None:
+                    future.set_result(quote)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+        return quotes
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            served = stats["hits"] + stats["stale_hits"]
+            lookups = served + stats["misses"] + stats["coalesced"]
+            stats.update(
+                size=len(self._entries),
+                hit_rate=served / lookups if lookups else 0.0,
+                mean_served_age=self._served_age_sum / served if served else 0.0,
+                max_served_age=self._max_served_age,
+            )
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_quote_cache():
+    """The process-wide QuoteCache used by get_live_prices and the agents."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = QuoteCache()
+        return _shared_cache
+
+
+def set_quote_cache(cache):
+    global _shared_cache
+    with _shared_lock:
+        _shared_cache = cache
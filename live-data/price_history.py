@@ -0,0 +1,316 @@
+import os
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from live_market import map_symbol
+
+logger = logging.getLogger("portfolio")
+
+DEFAULT_HISTORY_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "portfolio-data", ".cache", "prices"
+)
+
+OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+
+# On-disk layout: one Parquet file per symbol, dates as date32, prices as float64
+SCHEMA = pa.schema([
+    ("Date", pa.date32()),
+    ("Open", pa.float64()), ("High", pa.float64()), ("Low", pa.float64()), ("Close", pa.float64()),
+    ("Volume", pa.int64()),
+])
+
+
+class YFinanceHistoryProvider:
+    """
+    Daily OHLCV from Yahoo Finance: fetch_history(mapped_symbol, start, end) with end inclusive.
+    """
+
+    def __init__(self, timeout=20):
+        self.timeout = timeout
+
+    def fetch_history(self, mapped_symbol, start, end):
+        # Imported on first use, like in live_market.YFinanceProvider
+        import yfinance as yf
+        data = yf.download(
+            mapped_symbol, start=start, end=end + timedelta(days=1), progress=False, threads=False,
+            timeout=self.timeout, auto_adjust=False, multi_level_index=False,
+        )
+        if data is None or data.empty:
+            return pd.DataFrame(columns=OHLCV)
+        return data[OHLCV]
+
+
+class FixtureHistoryProvider:
+    """
+    Offline provider serving fixed frames ({mapped_symbol: OHLCV frame indexed by date}),
+    e.g. loaded from CSV fixtures with from_csv_dir. Counts calls like a real source would.
+    """
+
+    def __init__(self, frames):
+        self.frames = {sym: frame.sort_index() for sym, frame in frames.items()}
+        self.calls = 0
+        self.rows_served = 0
+
+    @classmethod
+    def from_csv_dir(cls, path):
+        # One <mapped symbol>.csv per symbol with Date,Open,High,Low,Close,Volume columns
+        frames = {}
+        for name in os.listdir(path):
+            if name.endswith(".csv"):
+                frames[name[:-4]] = pd.read_csv(os.path.join(path, name), index_col="Date", parse_dates=True)
+        return cls(frames)
+
+    def fetch_history(self, mapped_symbol, start, end):
+        self.calls += 1
+        frame = self.frames.get(mapped_symbol)
+        if frame is None:
+            return pd.DataFrame(columns=OHLCV)
+        rows = frame.loc[pd.Timestamp(start):pd.Timestamp(end)]
+        self.rows_served += len(rows)
+        return rows
+
+
+def _to_table(frame):
+    index = pd.DatetimeIndex(frame.index)
+    return pa.table({
+        "Date": pa.array(index.to_numpy().astype("datetime64[D]"), type=pa.date32()),
+        **{c: pa.array(frame[c].to_numpy(dtype=float), type=pa.float64()) for c in OHLCV[:4]},
+        "Volume": pa.array(np.nan_to_num(frame["Volume"].to_numpy(dtype=float)).astype(np.int64), type=pa.int64()),
+    }, schema=SCHEMA)
+
+
+class PriceHistoryStore:
+    """
+    Local daily OHLCV store. Each symbol's history is downloaded once; later updates only
+    fetch the missing head (an earlier start) or tail (days after the last stored bar), and a
+    symbol is asked at most once per day for its tail. Bars are kept as one Parquet file per
+    symbol (read memory-mapped) plus a small JSON manifest of covered ranges.
+
+    offline=True never touches the provider and serves whatever is stored.
+    """
+
+    def __init__(self, cache_dir=None, provider=None, offline=False, max_workers=8, retry_after=900,
+                 today=date.today, clock=time.time):
+        self.cache_dir = cache_dir or DEFAULT_HISTORY_DIR
+        self.provider = provider
+        self.offline = offline
+        self.max_workers = max_workers
+        # A symbol whose fetch failed is not asked again for retry_after seconds
+        self.retry_after = retry_after
+        self.today = today
+        self.clock = clock
+        self._lock = threading.Lock()
+        # One update() at a time: the manifest, counters and on-disk files are shared with
+        # the background refresher and page renders
+        self._update_lock = threading.Lock()
+        self._frames = {}
+        self._failed_at = {}
+        self.version = 0
+        self.counters = dict.fromkeys(("fetches", "rows_fetched", "fetch_failures", "up_to_date"), 0)
+        self.manifest = self._read_manifest()
+
+    # -- persistence -------------------------------------------------------------------------
+
+    def _path(self, mapped):
+        return os.path.join(self.cache_dir, mapped.replace("/", "_") + ".parquet")
+
+    @staticmethod
+    def _tmp_path(path):
+        # Per writer, so another process sharing the cache directory never writes the same file
+        return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.cache_dir, "manifest.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._tmp_path(os.path.join(self.cache_dir, "manifest.json"))
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, os.path.join(self.cache_dir, "manifest.json"))
+
+    def history(self, symbol):
+        """Stored OHLCV bars for a symbol (raw or mapped), indexed by date; empty if none."""
+        mapped = map_symbol(symbol)
+        with self._lock:
+            frame = self._frames.get(mapped)
+        if frame is not None:
+            return frame
+        try:
+            table = pq.read_table(self._path(mapped), memory_map=True)
+            # Straight from the Arrow columns (to_pandas' metadata handling costs more than the read)
+            frame = pd.DataFrame(
+                {c: table.column(c).to_numpy() for c in OHLCV},
+                index=pd.DatetimeIndex(table.column("Date").to_numpy().astype("datetime64[ns]"), name="Date"),
+            )
+        except (OSError, pa.ArrowException):
+            frame = pd.DataFrame(columns=OHLCV, index=pd.DatetimeIndex([], name="Date"))
+        with self._lock:
+            self._frames[mapped] = frame
+        return frame
+
+    def _store(self, mapped, frame):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._tmp_path(self._path(mapped))
+        pq.write_table(_to_table(frame), tmp_path, compression="zstd")
+        os.replace(tmp_path, self._path(mapped))
+        with self._lock:
+            self._frames[mapped] = frame
+
+    # -- updates -----------------------------------------------------------------------------
+
+    def _missing(self, mapped, start, end):
+        """Date ranges [(from, to)] not yet covered for a symbol."""
+        entry = self.manifest.get(mapped)
+        if entry is None:
+            return [(start, end)]
+        checked = date.fromisoformat(entry["checked"])
+        if "first" not in entry:
+            # Nothing came back so far (unknown symbol or source down): ask again tomorrow
+            return [(start, end)] if checked < self.today() else []
+        first, last = date.fromisoformat(entry["first"]), date.fromisoformat(entry["last"])
+        ranges = []
+        if start < first:
+            ranges.append((start, first - timedelta(days=1)))
+        # The tail is asked for once a day (no new bars on holidays/weekends is a valid answer)
+        if end > last and checked < self.today():
+            ranges.append((last + timedelta(days=1), end))
+        return ranges
+
+    def _update_one(self, mapped, start, end):
+        ranges = self._missing(mapped, start, end)
+        if not ranges:
+            return mapped, None, 0
+        parts = [self.history(mapped)]
+        fetched = 0
+        covered = []
+        for lo, hi in ranges:
+            bars = self.provider.fetch_history(mapped, lo, hi)
+            bars = bars[OHLCV].dropna(subset=["Close"]) if len(bars) else bars
+            fetched += len(bars)
+            parts.append(bars)
+            # An empty answer only counts as "no trading" for a few days (weekend, holidays);
+            # for anything longer it is treated as missing and asked again tomorrow
+            if len(bars) or (hi - lo).days < 7:
+                covered.append((lo, hi))
+        frame = pd.concat([p for p in parts if len(p)]) if any(len(p) for p in parts) else parts[0]
+        frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+
+        entry = dict(self.manifest.get(mapped, {}), checked=self.today().isoformat())
+        if "first" in entry:
+            covered.append((date.fromisoformat(entry["first"]), date.fromisoformat(entry["last"])))
+        if covered:
+            entry["first"] = min(lo for lo, _ in covered).isoformat()
+            entry["last"] = max(hi for _, hi in covered).isoformat()
+        # Written from the worker (Parquet encoding releases the GIL); the manifest follows in update()
+        if fetched:
+            self._store(mapped, frame)
+        return mapped, entry, fetched
+
+    def update(self, symbols, start, end=None):
+        """
+        Makes sure every symbol's bars cover [start, end] (end defaults to today), fetching only
+        what is missing. Failures keep the stored bars. Returns the number of bars fetched.
+        Concurrent calls run one after the other; a later one finds the work already done.
+        """
+        if self.offline or self.provider is None:
+            return 0
+        start = pd.Timestamp(start).date()
+        end = pd.Timestamp(end).date() if end is not None else self.today()
+        with self._update_lock:
+            return self._update(symbols, start, end)
+
+    def _update(self, symbols, start, end):
+        now = self.clock()
+        mapped = []
+        for sym in sorted({map_symbol(s) for s in symbols}):
+            if now - self._failed_at.get(sym, -np.inf) < self.retry_after:
+                continue
+            # Already covered symbols are settled from the manifest, without a worker
+            if self._missing(sym, start, end):
+                mapped.append(sym)
+            else:
+                self.counters["up_to_date"] += 1
+        fetched = 0
+        changed = False
+        if not mapped:
+            return 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="price-history") as pool:
+            futures = {sym: pool.submit(self._update_one, sym, start, end) for sym in mapped}
+            for sym, future in futures.items():
+                try:
+                    _, entry, rows = future.result()
+                except Exception as e:
+                    self.counters["fetch_failures"] += 1
+                    self._failed_at[sym] = now
+                    logger.warning("price_history: Price history for %s not updated (%s)", sym, e)
+                    continue
+                if entry is None:
+                    self.counters["up_to_date"] += 1
+                    continue
+                self.counters["fetches"] += 1
+                self.counters["rows_fetched"] += rows
+                fetched += rows
+                self.manifest[sym] = entry
+                changed = True
+        if changed:
+            self._write_manifest()
+            self.version += 1
+        return fetched
+
+    def closes(self, symbols, start, end=None, update=True):
+        """
+        Daily closes (calendar days, carried forward over weekends/holidays) for the given raw
+        symbols: a frame indexed by date with one column per symbol. NaN before a symbol's
+        first stored bar.
+        """
+        if update:
+            self.update(symbols, start, end)
+        start = pd.Timestamp(start).normalize()
+        end = pd.Timestamp(end).normalize() if end is not None else pd.Timestamp(self.today())
+        days = pd.date_range(start, end)
+        targets = days.to_numpy()
+        columns = {}
+        for sym in dict.fromkeys(symbols):
+            frame = self.history(sym)
+            close = frame["Close"].to_numpy(dtype=float)
+            # Last bar on or before each day; bars before start still seed the first days
+            last = np.searchsorted(frame.index.to_numpy(), targets, side="right") - 1
+            columns[sym] = np.where(last >= 0, close[np.maximum(last, 0)], np.nan) if len(close) else np.full(len(days), np.nan)
+        return pd.DataFrame(columns, index=days)
+
+    def stats(self):
+        return dict(self.counters, symbols=len(self.manifest), version=self.version)
+
+
+_default_store = None
+_store_lock = threading.Lock()
+
+
+def get_price_history():
+    """The process-wide PriceHistoryStore (Yahoo Finance source, local cache under portfolio-data/.cache)."""
+    global _default_store
+    with _store_lock:
+        if _default_store is None:
+            _default_store = PriceHistoryStore(provider=YFinanceHistoryProvider())
+        return _default_store
+
+
+def set_price_history(store):
+    """Swap the process-wide store (e.g. offline, or backed by a fixture provider)."""
+    global _default_store
+    with _store_lock:
+        _default_store = store
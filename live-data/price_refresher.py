@@ -0,0 +1,136 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from price_cache import is_market_open, IST, MARKET_OPEN
+
+logger = logging.getLogger("portfolio")
+
+
+def seconds_until_open(now=None):
+    """Seconds from now until the next NSE open (09:15 IST on a weekday; 0 while open)."""
+    if is_market_open(now):
+        return 0.0
+    now = datetime.fromtimestamp(now if now is not None else time.time(), IST)
+    opening = now.replace(hour=MARKET_OPEN.hour, minute=MARKET_OPEN.minute, second=0, microsecond=0)
+    if opening <= now:
+        opening += timedelta(days=1)
+    while opening.weekday() >= 5:
+        opening += timedelta(days=1)
+    return (opening - now).total_seconds()
+
+
+class PriceRefresher:
+    """
+    Keeps a valuation snapshot current on a daemon thread, so readers (the Streamlit sidebar)
+    get the latest one instantly instead of waiting for the price source.
+
+    refresh() is called every market_interval seconds while NSE is open and every
+    off_hours_interval seconds otherwise (but always right at the next open). A failed refresh
+    keeps the previous snapshot and is retried after retry_interval. refresh_now() asks for
+    an immediate refresh, e.g. from a "refresh" button or after new orders were ingested.
+    """
+
+    def __init__(self, refresh, market_interval=60, off_hours_interval=1800, retry_interval=15,
+                 clock=time.time, is_open=is_market_open, until_open=seconds_until_open, name="price-refresher"):
+        self._refresh = refresh
+        self.market_interval = market_interval
+        self.off_hours_interval = off_hours_interval
+        self.retry_interval = retry_interval
+        self.clock = clock
+        self.is_open = is_open
+        self.until_open = until_open
+        self.name = name
+
+        self.latest = None
+        self.last_error = None
+        self.last_refresh_at = None
+        # Completed refreshes (successful or not), and whether one is running right now
+        self._generation = 0
+        self._busy = False
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._counters = dict.fromkeys(("refreshes", "failures", "requested"), 0)
+        self._refresh_seconds = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive() and not self._stopped.is_set()
+
+    def stop(self, timeout=None):
+        """Stops the thread after the refresh in progress (if any)."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def interval(self, now=None):
+        """Seconds until the next scheduled refresh."""
+        now = self.clock() if now is None else now
+        if self.is_open(now):
+            return self.market_interval
+        return max(1.0, min(self.off_hours_interval, self.until_open(now)))
+
+    def refresh_now(self, wait=None):
+        """
+        Asks for an immediate refresh. With wait (seconds) blocks until a refresh that started
+        after this call has finished, and returns the latest snapshot either way.
+        """
+        with self._cond:
+            target = self._generation + (2 if self._busy else 1)
+            self._counters["requested"] += 1
+        self._wake.set()
+        if wait:
+            with self._cond:
+                self._cond.wait_for(lambda: self._generation >= target or self._stopped.is_set(), timeout=wait)
+        return self.latest
+
+    def wait_for_first(self, timeout=None):
+        """Blocks until the first snapshot is available (or timeout); returns it."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._generation > 0 or self._stopped.is_set(), timeout=timeout)
+        return self.latest
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.clear()
+            with self._cond:
+                self._busy = True
+            start = time.perf_counter()
+            try:
+                snapshot = self._refresh()
+                self.latest, self.last_error = snapshot, None
+                self.last_refresh_at = self.clock()
+                delay = self.interval()
+                outcome = "refreshes"
+            except Exception as e:
+                self.last_error = e
+                logger.warning("price_refresh: Background price refresh failed (%s)", e)
+                delay = min(self.retry_interval, self.interval())
+                outcome = "failures"
+            with self._cond:
+                self._busy = False
+                self._generation += 1
+                self._counters[outcome] += 1
+                self._refresh_seconds += time.perf_counter() - start
+                self._cond.notify_all()
+            self._wake.wait(delay)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._counters)
+            done = stats["refreshes"] + stats["failures"]
+            stats["mean_refresh_seconds"] = self._refresh_seconds / done if done else 0.0
+        stats["running"] = self.running
+        stats["age"] = getattr(self.latest, "age", None)
+        stats["last_error"] = None if self.last_error is None else str(self.last_error)
+        return stats
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+from live_market import map_symbol
+
+STATUS_LIVE = "Live"
+STATUS_ESTIMATED = "Est. (Cost)"
+
+
+class ValuationEngine:
+    """
+    Values a holdings frame against a price vector in one columnar pass.
+
+    The symbol-normalization table (raw symbol -> Yahoo symbol, net quantity, cost basis)
+    is built once per holdings frame and reused until the holdings change.
+    Symbols without a usable live price fall back to their cost basis (Total_Value),
+    so the portfolio value is never reported as 0 just because a quote is missing.
+    """
+
+    def __init__(self):
+        # (holdings, table) as one tuple: read and replaced atomically, so a thread
+        # never pairs one frame with the table built for another
+        self._cached = None
+
+    def symbol_table(self, holdings):
+        cached = self._cached
+        if cached is not None and cached[0] is holdings:
+            return cached[1]
+
+        # Symbol may be in the index (processor output) or a column
+        frame = holdings.reset_index() if 'Symbol' not in holdings.columns else holdings
+        qty_column = 'Quantity_Change' if 'Quantity_Change' in frame.columns else 'Quantity'
+        cost = frame['Total_Value'] if 'Total_Value' in frame.columns else pd.Series(0.0, index=frame.index)
+        table = pd.DataFrame({
+            'Symbol': frame['Symbol'].astype(str).to_numpy(),
+            'qty': frame[qty_column].to_numpy(),
+            'cost': cost.to_numpy(dtype=float),
+        })
+        # The same symbol can appear under two stock names (renames); value it once
+        if table['Symbol'].duplicated().any():
+            table = table.groupby('Symbol', sort=False, as_index=False).sum()
+
+        symbols = table['Symbol'].to_numpy(dtype=object)
+        table['mapped'] = [map_symbol(sym) for sym in symbols]
+        self._cached = (holdings, table)
+        return table
+
+    def value(self, holdings, prices):
+        """
+        prices: {symbol: price} keyed by raw (e.g. 'INFY') or mapped ('INFY.NS') symbol.
+        Returns (total_value, frame) where frame is indexed by Symbol with
+        columns price, value, qty, status.
+        """
+        if holdings.empty:
+            return 0.0, pd.DataFrame(columns=['price', 'value', 'qty', 'status'])
+
+        table = self.symbol_table(holdings)
+        price_vector = pd.Series(prices, dtype=float) if prices else pd.Series(dtype=float)
+        price = price_vector.reindex(table['Symbol']).to_numpy()
+        price = np.where(np.isnan(price), price_vector.reindex(table['mapped']).to_numpy(), price)
+
+        live = price > 0  # NaN compares False
+        qty = table['qty'].to_numpy()
+        value = np.where(live, qty * np.where(live, price, 0.0), table['cost'].to_numpy())
+
+        frame = pd.DataFrame({
+            'price': np.where(live, price, 0.0),
+            'value': value,
+            'qty': qty,
+            'status': np.where(live, STATUS_LIVE, STATUS_ESTIMATED),
+        }, index=pd.Index(table['Symbol'], name='Symbol'))
+        return float(value.sum()), frame
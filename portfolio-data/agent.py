@@ -1,14 +1,21 @@
 import os
+import logging
 import pandas as pd
-import httpx
-import certifi
-from groq import Groq
 from dotenv import load_dotenv
-from data_processor import process_stock_data
+from data_context import DataContext
 import sys
-# Add live-data directory to path
+# Add live-data directory (and the repo root, for the shared agents package) to path
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "live-data"))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from live_market import get_live_prices
+from valuation import ValuationEngine
+from context_builder import compact_context
+from conversation_memory import ConversationMemory
+from trade_index import TradeIndex
+from price_history import get_price_history
+from data_processor import trailing_return, quarterly_returns
+from agents.llm_client import get_llm_client
+from agents.telemetry import log
 
 load_dotenv()
 
@@ -16,34 +23,86 @@ load_dotenv()
 
 
 class StockAgent:
-    def __init__(self, model_name="openai/gpt-oss-120b"):
-        self.api_key = os.getenv("GROQ_API_KEY")
-        
-        # SSL certificate handling for Windows/Corporate environments
-        try:
-            # Try to use certifi for verification
-            http_client = httpx.Client(verify=certifi.where())
-        except Exception:
-            # Fallback
-            http_client = httpx.Client(verify=False)
-            print("Warning: SSL verification disabled due to environment issues.")
-
-        self.client = Groq(api_key=self.api_key, http_client=http_client)
+    def __init__(self, model_name="openai/gpt-oss-120b", file_path=None, llm_client=None, context_budget=2400,
+                 memory_budget=8000, retrieval_budget=1500, price_history=None):
+        # Shared, pooled LLM client (certificate handling, keep-alive, timeouts and retries live there)
+        self.client = llm_client or get_llm_client()
         self.model_name = model_name
-        file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stock_order_history.xlsx")
+        # Token budget for holdings + recent trades in the system prompt
+        self.context_budget = context_budget
+        # Token budget for the trades retrieved for each question
+        self.retrieval_budget = retrieval_budget
+        self._trade_index = None
+        if file_path is None:
+            file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stock_order_history.xlsx")
         print(f"Loading data from: {file_path}")
-        self.df, self.portfolio, self.holdings = process_stock_data(file_path)
-        
-        # Conversation history
+        self.data = DataContext.from_file(file_path)
+        self.valuation = ValuationEngine()
+        # Daily closes for the market-value series behind the growth numbers
+        self.price_history = price_history or get_price_history()
+        # System prompt + latest turns verbatim, older turns folded into a background summary;
+        # room is left for the retrieved trades so a whole request stays within memory_budget
+        self.memory_budget = memory_budget
+        self.memory = ConversationMemory(self._build_system_prompt(), summarizer=self._summarize,
+                                         max_tokens=memory_budget - retrieval_budget)
+
+    @property
+    def messages(self):
+        # What the next call will send (bounded by memory_budget)
+        return self.memory.messages()
+
+    @property
+    def df(self):
+        return self.data.df
+
+    @property
+    def portfolio(self):
+        return self.data.portfolio
+
+    @property
+    def holdings(self):
+        return self.data.holdings
+
+    @property
+    def trade_index(self):
+        # Built on first use and rebuilt after new orders are ingested
+        if self._trade_index is None or self._trade_index[0] != self.data.version:
+            self._trade_index = (self.data.version, TradeIndex(self.df))
+        return self._trade_index[1]
+
+    def _request_messages(self):
+        """
+        The conversation plus the trades matching the latest question, pulled from the full
+        history through the trade index. They only go into this request, not the memory.
+        """
+        messages = self.messages
+        matches = self.trade_index.retrieve(messages[-1]["content"], self.retrieval_budget)
+        if matches is None:
+            return messages
+        context = {"role": "system", "content": (
+            "Matching Trades for the latest question (CSV in INR from the full transaction history, "
+            f"newest last; type B=BUY, S=SELL):\n{matches}"
+        )}
+        return messages[:-1] + [context, messages[-1]]
+
+    def ingest_orders(self, new_orders):
+        """
+        Adds new order rows without reloading the history and refreshes the system prompt,
+        keeping the conversation so far.
+        """
+        new = self.data.append_orders(new_orders)
+        self.memory.set_system(self._build_system_prompt())
+        return new
+
+    def _build_system_prompt(self):
+        # Portfolio metrics for the prompt
         stats = self._get_portfolio_stats()
         
-        # Prepare holdings summary for the prompt
-        holdings_text = self.holdings.to_string()
-        
-        # Prepare transaction history summary (last 200 transactions to fit context)
-        # We only need relevant columns for the LLM: Execution date, Stock name, Type, Quantity, Value
-        history_df = self.df[['Execution date and time', 'Stock name', 'Symbol', 'Type', 'Quantity', 'Value']].tail(200)
-        history_text = history_df.to_string(index=False)
+        # Holdings and the most recent trades as compact CSV within the token budget; older trades are
+        # summarized as aggregates and looked up per question through the trade index
+        holdings_text, history_text = compact_context(
+            self.holdings, self.df, self.context_budget, holdings_share=0.65, max_trades=30, with_names=True
+        )
         
         system_prompt = f"""
         You are a financial analyst agent. You have access to the user's stock order history and portfolio metrics.
@@ -55,10 +114,10 @@ class StockAgent:
         - QoQ Growth (last few quarters): {stats['qoq_growth']}
         - 6-Month Growth: {stats['six_month_growth']}%
         
-        Current Asset Holdings (Summary in INR):
+        Current Asset Holdings (CSV in INR, largest first):
         {holdings_text}
         
-        Detailed Transaction History (Last 200 Executed Orders):
+        Recent Transactions (CSV in INR, up to the last 30 executed orders, newest last; type B=BUY, S=SELL):
         {history_text}
         
         Data Context:
@@ -70,29 +129,46 @@ class StockAgent:
         3. For queries about specific holdings, use this EXACT prefix in your response: 
            "Your current Valuation on <StockName> in INR is as follows," 
            followed by the details (Quantity, Average Price, Total Value).
-        4. If the user asks about specific trades or dates (e.g., "Did I buy X in November 2025?"), search the "Detailed Transaction History" provided above and give a specific answer based on those rows.
+        4. If the user asks about specific trades or dates (e.g., "Did I buy X in November 2025?"), use the "Matching Trades" provided with the question (looked up from the full history), or the "Recent Transactions" above if none are provided, and give a specific answer based on those rows. If the Matching Trades say "No matching trades.", say there were none.
         5. If requested for QoQ or growth, use the calculated summary stats.
         6. Always use the ₹ symbol or "INR" when mentioning monetary values.
         """
-        self.messages = [{"role": "system", "content": system_prompt}]
+        return system_prompt
+
 
 
 
+    def _summarize(self, previous_summary, messages):
+        """
+        Folds older turns into the running conversation summary (runs on the memory's background thread).
+        """
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        completion = self.client.chat.completions.create(
+            model=self.model_name,
+            messages=[
+                {"role": "system", "content": (
+                    "You maintain a running summary of a conversation between a user and their portfolio analyst. "
+                    "Update the summary with the new turns. Keep the facts, numbers, stocks and decisions discussed, "
+                    f"drop pleasantries. Reply with the summary only, under {self.memory.summary_tokens * 3 // 4} words."
+                )},
+                {"role": "user", "content": f"Current summary:\n{previous_summary or '(none)'}\n\nNew turns:\n{transcript}"},
+            ],
+            temperature=0,
+            max_tokens=self.memory.summary_tokens,
+        )
+        return completion.choices[0].message.content
 
     def _get_portfolio_stats(self):
-        # Calculate QoQ growth
-        self.portfolio['Quarter'] = self.portfolio.index.to_period('Q')
-        qoq = self.portfolio.groupby('Quarter')['Cumulative_Investment'].last()
-        qoq_growth = (qoq.pct_change() * 100).fillna(0)
-        
-        # Calculate 6-month growth
-        latest_date = self.portfolio.index.max()
-        six_months_ago = latest_date - pd.DateOffset(months=6)
-        if six_months_ago in self.portfolio.index:
-            val_now = self.portfolio.loc[latest_date, 'Cumulative_Investment']
-            val_then = self.portfolio.loc[six_months_ago, 'Cumulative_Investment']
-            six_month_growth = ((val_now - val_then) / val_then) * 100 if val_then != 0 else 0
-        else:
+        # QoQ and 6-month growth are returns on the daily market value, net of money put in
+        # (Cumulative_Investment alone only measures deposits)
+        try:
+            market_value = self.data.market_value(self.price_history)
+        except Exception as e:
+            log("market_value_history", f"Market value history unavailable ({e})", error=str(e), level=logging.WARNING)
+            market_value = None
+        qoq_growth = quarterly_returns(market_value) if market_value is not None else {}
+        six_month_growth = trailing_return(market_value, months=6)
+        if six_month_growth is None:
             six_month_growth = "Insufficient data for 6-month calculation"
             
         # Live Market Data Integration
@@ -101,26 +177,11 @@ class StockAgent:
         # Get symbols from current holdings (reset index to make Symbol a column)
         # Verify if holdings is empty or has data
         if not self.holdings.empty:
-            # Check if index is MultiIndex or single index, reset to get Symbol column if it's in index
-            holdings_reset = self.holdings.reset_index()
-            symbols = holdings_reset['Symbol'].unique().tolist()
-            
+            symbols = self.valuation.symbol_table(self.holdings)['Symbol'].tolist()
             live_prices = get_live_prices(symbols)
             
-            current_market_value = 0
-            for idx, row in holdings_reset.iterrows():
-                sym = row['Symbol']
-                qty = row['Quantity_Change'] # This is the net quantity
-                
-                # Simple heuristic mapping (same as in live_market.py)
-                mapped_sym = f"{sym}.NS" if '.' not in sym else sym
-                
-                if mapped_sym in live_prices:
-                    price = live_prices[mapped_sym]
-                    current_market_value += qty * price
-                else:
-                    # Fallback to cost basis if live price not found (conservative)
-                    current_market_value += row['Total_Value'] # Total_Value is cost basis here
+            # Columnar join of holdings and prices; missing quotes fall back to cost basis (conservative)
+            current_market_value, _ = self.valuation.value(self.holdings, live_prices)
             
             unrealized_pnl = current_market_value - current_invested_value
             pnl_pct = (unrealized_pnl / current_invested_value) * 100 if current_invested_value != 0 else 0
@@ -130,7 +191,7 @@ class StockAgent:
             pnl_pct = 0
 
         return {
-            "qoq_growth": qoq_growth.to_dict(),
+            "qoq_growth": qoq_growth,
             "six_month_growth": six_month_growth,
             "current_value": current_invested_value, # Kept for consistency as "Book Value"
             "market_value": current_market_value,
@@ -140,18 +201,42 @@ class StockAgent:
         }
 
     def chat(self, user_query):
-        self.messages.append({"role": "user", "content": user_query})
+        self.memory.add("user", user_query)
         
         completion = self.client.chat.completions.create(
             model=self.model_name,
-            messages=self.messages,
+            messages=self._request_messages(),
             temperature=0,
         )
         
         response = completion.choices[0].message.content
-        self.messages.append({"role": "assistant", "content": response})
+        self.memory.add("assistant", response)
         return response
 
+    def chat_stream(self, user_query):
+        """
+        Same as chat, but yields the reply token by token as the model generates it.
+        The full reply is added to the conversation once the stream ends.
+        """
+        self.memory.add("user", user_query)
+
+        stream = self.client.chat.completions.create(
+            model=self.model_name,
+            messages=self._request_messages(),
+            temperature=0,
+            stream=True,
+        )
+
+        parts = []
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield parts[-1]
+        finally:
+            # Keep whatever was shown to the user, even if the stream was cut short
+            self.memory.add("assistant", "".join(parts))
+
 if __name__ == "__main__":
     import sys
     # Set encoding to utf-8 for Windows console
@@ -172,8 +257,10 @@ if __name__ == "__main__":
             if not user_input.strip():
                 continue
                 
-            response = agent.chat(user_input)
-            print(f"\nAgent: {response}")
+            print("\nAgent: ", end="", flush=True)
+            for token in agent.chat_stream(user_input):
+                print(token, end="", flush=True)
+            print()
             
         except KeyboardInterrupt:
             print("\nAgent: Goodbye!")
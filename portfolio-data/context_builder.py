@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+from data_processor import DATE_COLUMN
+
+# Rough token estimate used for budgeting (about 4 characters per token for English/CSV text)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _fit(header, lines, max_tokens, summary_tokens=40):
+    """
+    Number of leading lines (already in priority order) that fit in max_tokens
+    together with the header, leaving room for a one-line summary of the rest.
+    """
+    if not len(lines):
+        return 0
+    costs = np.cumsum((np.fromiter((len(l) + 1 for l in lines), dtype=np.int64, count=len(lines))))
+    available = max_tokens * CHARS_PER_TOKEN - len(header) - 1
+    if costs[-1] <= available:
+        return len(lines)
+    return int(np.searchsorted(costs, available - summary_tokens * CHARS_PER_TOKEN, side="right"))
+
+
+def compact_holdings(holdings, max_tokens=1200):
+    """
+    Holdings as compact CSV (symbol,name,qty,avg_price,invested), largest positions first,
+    rounded to whole rupees (2 decimals for the average price). Positions that don't fit
+    in max_tokens are summarized in one line.
+    """
+    if holdings.empty:
+        return "No open holdings."
+
+    frame = holdings.reset_index().sort_values('Total_Value', ascending=False, kind='stable')
+    header = "symbol,name,qty,avg_price,invested"
+    lines = (
+        frame['Symbol'].astype(str) + "," + frame['Stock name'].astype(str).str.replace(",", " ", regex=False)
+        + "," + frame['Quantity_Change'].round().astype(np.int64).astype(str)
+        + "," + frame['Avg_Price'].round(2).astype(str)
+        + "," + frame['Total_Value'].round().astype(np.int64).astype(str)
+    ).tolist()
+
+    keep = _fit(header, lines, max_tokens)
+    text = "\n".join([header] + lines[:keep])
+    if keep < len(lines):
+        rest = frame.iloc[keep:]
+        text += (f"\n(+{len(rest)} smaller holdings: total invested {rest['Total_Value'].sum():,.0f},"
+                 f" largest {rest['Symbol'].iloc[0]} {rest['Total_Value'].iloc[0]:,.0f})")
+    return text
+
+
+def compact_trades(df, max_tokens=800, max_rows=50, with_names=False):
+    """
+    Most recent trades (up to max_rows) as compact CSV (date,symbol,type,qty,value), newest last,
+    trimmed further to fit max_tokens. Everything older is summarized as aggregates
+    (count, date range, buy/sell totals, most traded symbols).
+    with_names adds the stock name column (for prompts that look trades up by name).
+    """
+    if df.empty:
+        return "No trades."
+
+    recent = df.tail(max_rows)
+    header = "date,symbol,name,type,qty,value" if with_names else "date,symbol,type,qty,value"
+    symbol = recent['Symbol'].astype(str)
+    if with_names:
+        symbol = symbol + "," + recent['Stock name'].astype(str).str.replace(",", " ", regex=False)
+    lines = (
+        recent[DATE_COLUMN].dt.strftime('%Y-%m-%d') + "," + symbol
+        + "," + recent['Type'].astype(str).str[0] + "," + recent['Quantity'].astype(np.int64).astype(str)
+        + "," + recent['Value'].round().astype(np.int64).astype(str)
+    ).tolist()
+
+    # Newest trades are the most relevant: fit from the end
+    keep = _fit(header, lines[::-1], max_tokens, summary_tokens=60)
+    kept = lines[len(lines) - keep:]
+    text = "\n".join([header] + kept)
+
+    older = df.iloc[:len(df) - keep]
+    if len(older):
+        totals = older.groupby('Type')['Value'].sum()
+        top = older['Symbol'].value_counts().head(3)
+        text = (
+            f"(Earlier: {len(older)} trades from {older[DATE_COLUMN].min():%Y-%m-%d} to {older[DATE_COLUMN].max():%Y-%m-%d};"
+            f" bought {totals.get('BUY', 0):,.0f}, sold {totals.get('SELL', 0):,.0f};"
+            f" most traded {', '.join(f'{s} ({n})' for s, n in top.items())})\n"
+        ) + text
+    return text
+
+
+def compact_context(holdings, df, max_tokens=2000, holdings_share=0.6, max_trades=50, with_names=False):
+    """
+    (holdings_text, trades_text) sharing one token budget; holdings get holdings_share of it
+    and any part they don't use goes to the trades.
+    """
+    holdings_text = compact_holdings(holdings, int(max_tokens * holdings_share))
+    trades_text = compact_trades(df, max_tokens - estimate_tokens(holdings_text), max_trades, with_names)
+    return holdings_text, trades_text
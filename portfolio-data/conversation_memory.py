@@ -0,0 +1,130 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from context_builder import estimate_tokens
+from agents.telemetry import log
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+ABRIDGED_PREFIX = "\nMost recent earlier turns (abridged):\n"
+
+
+def _truncate(text, max_tokens):
+    max_chars = max_tokens * 4
+    return text if len(text) <= max_chars else text[:max_chars - 3] + "..."
+
+
+class ConversationMemory:
+    """
+    Chat history with a token budget.
+
+    The system prompt and the latest turns are sent verbatim. Older turns are moved out of
+    the window and folded into a running summary by summarizer(previous_summary, messages)
+    on a background thread, so no chat call waits for it. Until that summary lands, the
+    moved-out turns are represented by a short abridged list.
+
+    The prompt stays within max_tokens regardless of session length (as long as the
+    system prompt plus the last min_recent messages fit on their own).
+    """
+
+    def __init__(self, system_prompt, summarizer=None, max_tokens=8000, summary_tokens=400, min_recent=2):
+        self.system = {"role": "system", "content": system_prompt}
+        self.summarizer = summarizer
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.min_recent = min_recent
+
+        self.recent = []       # verbatim messages still in the window
+        self.pending = []      # moved out of the window, not yet folded into the summary
+        self.summary = ""
+        self.summarized_messages = 0
+        self.last_prompt_tokens = 0
+        self._recent_tokens = 0
+        self._lock = threading.Lock()
+        self._executor = None
+        self._future = None
+
+    def set_system(self, system_prompt):
+        with self._lock:
+            self.system = {"role": "system", "content": system_prompt}
+
+    def add(self, role, content):
+        with self._lock:
+            self.recent.append({"role": role, "content": content})
+            self._recent_tokens += estimate_tokens(content)
+
+    def messages(self):
+        """The messages to send for the next call: system prompt, summary, latest turns."""
+        with self._lock:
+            self._evict()
+            self._schedule_summary()
+            summary = self._summary_message()
+            prompt = [self.system] + ([summary] if summary else []) + list(self.recent)
+        self.last_prompt_tokens = sum(estimate_tokens(m["content"]) for m in prompt)
+        return prompt
+
+    def _recent_budget(self):
+        # Summary and abridged list get summary_tokens each
+        return self.max_tokens - estimate_tokens(self.system["content"]) - 2 * self.summary_tokens
+
+    def _evict(self):
+        budget = self._recent_budget()
+        while self._recent_tokens > budget and len(self.recent) > self.min_recent:
+            message = self.recent.pop(0)
+            self._recent_tokens -= estimate_tokens(message["content"])
+            self.pending.append(message)
+        if self.summarizer is None:
+            # Nothing will fold these in; keep only what the abridged list can show
+            del self.pending[:-(self.summary_tokens // 10)]
+
+    def _summary_message(self):
+        if not self.summary and not self.pending:
+            return None
+        content = SUMMARY_PREFIX + (self.summary or "(being prepared)")
+        if self.pending:
+            # Newest first until the abridged budget is used up, then shown in order
+            lines, used = [], 0
+            for message in reversed(self.pending):
+                line = f"- {message['role']}: {_truncate(' '.join(message['content'].split()), 40)}"
+                used += estimate_tokens(line) + 1
+                if used > self.summary_tokens:
+                    break
+                lines.append(line)
+            content += ABRIDGED_PREFIX + "\n".join(reversed(lines))
+        return {"role": "system", "content": content}
+
+    def _schedule_summary(self):
+        if not self.pending or self.summarizer is None or self._future is not None:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-summary")
+        batch = list(self.pending)
+        self._future = self._executor.submit(self._summarize, self.summary, batch)
+
+    def _summarize(self, previous, batch):
+        try:
+            summary = self.summarizer(previous, batch)
+        except Exception as e:
+            log("conversation_summary", f"Conversation summary failed ({e}), keeping the previous one", error=str(e), level=logging.WARNING)
+            summary = None
+        with self._lock:
+            if summary:
+                self.summary = _truncate(summary.strip(), self.summary_tokens - estimate_tokens(SUMMARY_PREFIX))
+                self.pending = self.pending[len(batch):]
+                self.summarized_messages += len(batch)
+            self._future = None
+
+    def wait(self, timeout=None):
+        """Blocks until the background summary (if any) has finished."""
+        future = self._future
+        if future is not None:
+            future.result(timeout=timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "recent_messages": len(self.recent),
+                "pending_messages": len(self.pending),
+                "summarized_messages": self.summarized_messages,
+                "summary_tokens": estimate_tokens(self.summary),
+                "last_prompt_tokens": self.last_prompt_tokens,
+            }
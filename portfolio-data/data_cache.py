@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import pandas as pd
+from functools import partial
+from data_processor import DATE_COLUMN, process_stock_data
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Bump for changes the source hash below cannot see (e.g. how frames are written to Parquet)
+SCHEMA_VERSION = 2
+
+# Modules whose code builds the cached frames
+PIPELINE_SOURCES = ("data_processor.py", "stream_processor.py")
+
+
+def pipeline_version():
+    """
+    Schema version plus a hash of the pipeline's source, so a cache written by an older
+    pipeline is rebuilt instead of reused even when nobody remembered to bump the version.
+    """
+    digest = hashlib.blake2b(str(SCHEMA_VERSION).encode("ascii"), digest_size=8)
+    for name in PIPELINE_SOURCES:
+        with open(os.path.join(HERE, name), "rb") as f:
+            digest.update(f.read())
+    return f"{SCHEMA_VERSION}-{digest.hexdigest()}"
+
+
+CACHE_VERSION = pipeline_version()
+
+DEFAULT_CACHE_DIR = os.path.join(HERE, ".cache")
+
+FRAMES = ("df", "portfolio_daily", "holdings")
+
+
+def file_fingerprint(file_path, with_hash=True):
+    """
+    Fingerprint of the source workbook: size, mtime and (optionally) a content hash.
+    """
+    stat = os.stat(file_path)
+    fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if with_hash:
+        digest = hashlib.blake2b(digest_size=20)
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        fingerprint["hash"] = digest.hexdigest()
+    return fingerprint
+
+
+def _cache_path(file_path, cache_dir):
+    # One sub-directory per source file so several workbooks can share a cache dir
+    key = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, key)
+
+
+def _read_manifest(entry_dir):
+    try:
+        with open(os.path.join(entry_dir, "manifest.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(entry_dir, manifest):
+    tmp_path = os.path.join(entry_dir, "manifest.json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, os.path.join(entry_dir, "manifest.json"))
+
+
+def _is_fresh(manifest, file_path, entry_dir, verify_hash):
+    """
+    Returns True if the cached frames still describe file_path.
+    Size + mtime is the cheap check; the content hash settles the cases where
+    the file was touched/copied without changing (and is always used when verify_hash=True).
+    """
+    if not manifest or manifest.get("version") != CACHE_VERSION:
+        return False
+    cached = manifest.get("source", {})
+    current = file_fingerprint(file_path, with_hash=False)
+    same_stat = cached.get("size") == current["size"] and cached.get("mtime_ns") == current["mtime_ns"]
+    if same_stat and not verify_hash:
+        return True
+
+    current = file_fingerprint(file_path)
+    if cached.get("hash") != current["hash"]:
+        return False
+    if not same_stat:
+        # Content unchanged, only the stat moved: remember the new stat so the next start is cheap
+        manifest["source"] = current
+        _write_manifest(entry_dir, manifest)
+    return True
+
+
+def _staging_dir(entry_dir):
+    tmp_dir = entry_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    return tmp_dir
+
+
+def _save(entry_dir, file_path, source_fingerprint, frames, tmp_dir=None):
+    tmp_dir = tmp_dir or _staging_dir(entry_dir)
+    for name, frame in zip(FRAMES, frames):
+        # None: already written into tmp_dir (the streamed orders)
+        if frame is not None:
+            frame.to_parquet(os.path.join(tmp_dir, f"{name}.parquet"))
+
+    # Manifest is written last: a crash mid-write leaves no manifest, i.e. a miss
+    shutil.rmtree(entry_dir, ignore_errors=True)
+    os.replace(tmp_dir, entry_dir)
+    _write_manifest(entry_dir, {
+        "version": CACHE_VERSION,
+        "source": source_fingerprint,
+        "source_path": os.path.abspath(file_path),
+        "created": time.time(),
+    })
+
+
+def _read_orders(entry_dir):
+    df = pd.read_parquet(os.path.join(entry_dir, "df.parquet"))
+    # Streamed orders are stored chunk by chunk, each chunk in date order
+    df = df.sort_values(DATE_COLUMN, kind="stable")
+    # Parquet keeps the values but not the python-date column type
+    if "Date" in df.columns:
+        df["Date"] = pd.to_datetime(df["Date"]).dt.date
+    return df
+
+
+def _load(entry_dir, lazy_orders=False):
+    portfolio_daily, holdings = (
+        pd.read_parquet(os.path.join(entry_dir, f"{name}.parquet")) for name in FRAMES[1:]
+    )
+    # Nor the index frequency/unit, so rebuild the daily index exactly the way process_stock_data does
+    if len(portfolio_daily):
+        portfolio_daily.index = pd.date_range(
+            start=portfolio_daily.index.min().date(), end=portfolio_daily.index.max().date()
+        )
+    df = partial(_read_orders, entry_dir) if lazy_orders else _read_orders(entry_dir)
+    return df, portfolio_daily, holdings
+
+
+def load_stock_data(file_path, cache_dir=None, use_cache=True, verify_hash=False, streaming=False,
+                    lazy_orders=False):
+    """
+    Drop-in replacement for process_stock_data that caches the cleaned
+    (df, portfolio_daily, holdings) outputs as Parquet next to the workbook.
+    A warm start never touches openpyxl; any change to the workbook invalidates the cache.
+    streaming=True parses a cache miss with the chunked reader (see stream_processor).
+    lazy_orders=True returns df as a function that reads the orders from the cache when
+    called (DataContext takes either). With streaming=True a cache miss then writes the
+    cleaned orders straight into the cache instead of holding them, so loading takes the
+    same memory whatever the size of the export.
+    """
+    if streaming:
+        from stream_processor import stream_stock_data
+        parse = stream_stock_data
+    else:
+        parse = process_stock_data
+
+    if not use_cache:
+        return parse(file_path)
+
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    entry_dir = _cache_path(file_path, cache_dir)
+
+    if _is_fresh(_read_manifest(entry_dir), file_path, entry_dir, verify_hash):
+        try:
+            return _load(entry_dir, lazy_orders)
+        except Exception as e:
+            print(f"Warning: ignoring unreadable data cache ({e})")
+
+    # Fingerprint before parsing so an edit made while we parse is not masked
+    source_fingerprint = file_fingerprint(file_path)
+    if streaming and lazy_orders:
+        try:
+            tmp_dir = _staging_dir(entry_dir)
+        except OSError as e:
+            print(f"Warning: could not write data cache ({e})")
+            return parse(file_path)
+        frames = stream_stock_data(file_path, orders_path=os.path.join(tmp_dir, "df.parquet"))
+        _save(entry_dir, file_path, source_fingerprint, frames, tmp_dir)
+        return (partial(_read_orders, entry_dir),) + frames[1:]
+
+    frames = parse(file_path)
+    try:
+        _save(entry_dir, file_path, source_fingerprint, frames)
+    except Exception as e:
+        # A read-only checkout should still work, just without the speed-up
+        print(f"Warning: could not write data cache ({e})")
+    return frames
+
+
+def clear_cache(cache_dir=None):
+    shutil.rmtree(cache_dir or DEFAULT_CACHE_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    source = os.path.join(HERE, "stock_order_history.xlsx")
+
+    start = time.perf_counter()
+    process_stock_data(source)
+    cold = time.perf_counter() - start
+
+    load_stock_data(source)  # make sure the cache is populated
+    start = time.perf_counter()
+    load_stock_data(source)
+    warm = time.perf_counter() - start
+
+    print(f"Cold (openpyxl): {cold * 1000:.1f} ms")
+    print(f"Warm (cache):    {warm * 1000:.1f} ms")
@@ -0,0 +1,174 @@
+import hashlib
+import pandas as pd
+from data_processor import (
+    DATE_COLUMN, read_order_history, clean_orders, daily_activity,
+    build_portfolio_daily, net_positions, build_holdings, market_value_daily,
+)
+from data_cache import load_stock_data
+
+# The columns that define a trade; hashing the free-text columns would only make it slower
+FINGERPRINT_COLUMNS = ['Symbol', 'Quantity_Change', 'Value_Change', DATE_COLUMN]
+
+
+def _hash_orders(df, previous=""):
+    hashed = pd.util.hash_pandas_object(df[FINGERPRINT_COLUMNS], index=False)
+    digest = hashlib.blake2b(previous.encode("ascii"), digest_size=16)
+    digest.update(hashed.to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class DataContext:
+    """
+    Processed order history shared by the Orchestrator and all agents.
+    Agents keep a reference to this object (not to its frames), so orders
+    ingested with append_orders() are visible to them without rebuilding anything.
+    df may also be a function returning the order frame; it is then only called once
+    something reads the orders (portfolio and holdings are there from the start).
+    """
+
+    def __init__(self, df, portfolio, holdings):
+        self._load_orders = df if callable(df) else None
+        self._needs_sort = False
+        self.portfolio = portfolio
+        self.holdings = holdings
+        # Unfiltered net positions (incl. closed ones), only built once we need to update them
+        self._positions = None
+        self.version = 0
+        self._fingerprint = None
+        self._market_value = None
+        if self._load_orders is None:
+            self._set_orders(df)
+
+    @classmethod
+    def from_file(cls, file_path, streaming=False, cache_dir=None):
+        # Streamed exports go straight into the cache and the orders are read back on first use
+        return cls(*load_stock_data(file_path, cache_dir=cache_dir, streaming=streaming, lazy_orders=streaming))
+
+    def _set_orders(self, df):
+        self._chunks = [df]
+        self._next_label = int(df.index.max()) + 1 if len(df) else 0
+        self._last_timestamp = df[DATE_COLUMN].max() if len(df) else None
+
+    def _ensure_orders(self):
+        if self._load_orders is not None:
+            load, self._load_orders = self._load_orders, None
+            self._set_orders(load())
+
+    @property
+    def df(self):
+        self._ensure_orders()
+        # New orders are kept as separate chunks and only concatenated when someone reads df
+        if len(self._chunks) > 1:
+            df = pd.concat(self._chunks)
+            if self._needs_sort:
+                df = df.sort_values(DATE_COLUMN)
+                self._needs_sort = False
+            self._chunks = [df]
+        return self._chunks[0]
+
+    @property
+    def fingerprint(self):
+        """
+        Content hash of the order history, used to key anything derived from the data
+        (e.g. cached LLM answers). Hashed once, then chained with each appended batch.
+        """
+        if self._fingerprint is None:
+            self._fingerprint = _hash_orders(self.df)
+        return self._fingerprint
+
+    def market_value(self, store, update=True):
+        """
+        Daily market value of the holdings since the first trade (see
+        data_processor.market_value_daily), from the closes in a price_history.PriceHistoryStore.
+        The store is first brought up to date for every symbol ever traded (only missing bars
+        are fetched; update=False uses what is stored); the series is rebuilt when the orders
+        or the stored prices change. None when there are no orders.
+        """
+        df = self.df
+        if df.empty:
+            return None
+        symbols = list(df['Symbol'].unique())
+        start = df[DATE_COLUMN].min().normalize()
+        if update:
+            store.update(symbols, start)
+        key = (self.version, id(store), store.version, store.today())
+        if self._market_value is None or self._market_value[0] != key:
+            closes = store.closes(symbols, start, update=False)
+            self._market_value = (key, market_value_daily(df, closes))
+        return self._market_value[1]
+
+    def append_orders(self, raw_orders):
+        """
+        Incrementally ingests new order rows (same layout as the broker export, or a path to one).
+        Holdings, portfolio_daily and Cumulative_Investment are updated from the delta only.
+        Returns the cleaned new orders.
+        """
+        if isinstance(raw_orders, str):
+            raw_orders = read_order_history(raw_orders)
+        # Labels and aggregates continue from the stored orders
+        self._ensure_orders()
+
+        # Continue the row labels so they stay unique across appends
+        raw_orders = raw_orders.reset_index(drop=True)
+        raw_orders.index += self._next_label
+        self._next_label += len(raw_orders)
+
+        new = clean_orders(raw_orders)
+        if new.empty:
+            return new
+
+        if self._last_timestamp is not None and new[DATE_COLUMN].min() < self._last_timestamp:
+            self._needs_sort = True
+        newest = new[DATE_COLUMN].max()
+        self._last_timestamp = newest if self._last_timestamp is None else max(self._last_timestamp, newest)
+        self._chunks.append(new)
+
+        self._update_holdings(new)
+        self._update_portfolio(new)
+        if self._fingerprint is not None:
+            self._fingerprint = _hash_orders(new, previous=self._fingerprint)
+        self.version += 1
+        return new
+
+    def _update_holdings(self, new):
+        if self._positions is None:
+            # First update: aggregate everything that was there before this delta, once
+            previous = self._chunks[:-1]
+            self._positions = net_positions(previous[0] if len(previous) == 1 else pd.concat(previous))
+        # Cost is O(symbols + delta): the existing per-symbol sums are not re-aggregated from df
+        self._positions = pd.concat([self._positions, net_positions(new)]).groupby(level=[0, 1]).sum()
+        self.holdings = build_holdings(self._positions)
+
+    def _update_portfolio(self, new):
+        activity = daily_activity(new)
+        portfolio = self.portfolio
+
+        if portfolio.empty or activity.index[0] < portfolio.index[0]:
+            # Orders before the start of the history: the daily frame has to be rebuilt
+            df = self.df
+            self.portfolio = build_portfolio_daily(
+                daily_activity(df), df[DATE_COLUMN].min().date(), df[DATE_COLUMN].max().date()
+            )
+            return
+
+        # Extend the daily frame from the last date (new days start with no activity)
+        end = max(portfolio.index[-1], activity.index[-1])
+        if end > portfolio.index[-1]:
+            dtypes = portfolio.dtypes.to_dict()
+            portfolio = portfolio.reindex(pd.date_range(start=portfolio.index[0].date(), end=end.date()))
+            # No activity on the added days, so the running total carries over from the last known one
+            portfolio['Cumulative_Investment'] = portfolio['Cumulative_Investment'].ffill()
+            portfolio = portfolio.fillna(0).astype(dtypes)
+        else:
+            portfolio = portfolio.copy()
+
+        columns = ['Quantity_Change', 'Value_Change']
+        portfolio.loc[activity.index, columns] = portfolio.loc[activity.index, columns].to_numpy() + activity[columns].to_numpy()
+
+        # Continue Cumulative_Investment from the day before the earliest new order
+        first = activity.index[0]
+        position = portfolio.index.get_loc(first)
+        base = portfolio['Cumulative_Investment'].iloc[position - 1] if position > 0 else 0.0
+        tail = portfolio['Value_Change'].iloc[position:]
+        portfolio.iloc[position:, portfolio.columns.get_loc('Cumulative_Investment')] = base - tail.cumsum().to_numpy()
+        self.portfolio = portfolio
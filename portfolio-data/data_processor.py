@@ -1,62 +1,246 @@
+import os
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 
-def process_stock_data(file_path):
-    # Load the excel file skipping metadata rows
-    df = pd.read_excel(file_path, header=5)
-    
-    # Basic cleaning
-    df = df.dropna(subset=['Stock name', 'Symbol', 'Execution date and time'])
-    
+DATE_COLUMN = 'Execution date and time'
+DATE_FORMAT = '%d-%m-%Y %I:%M %p'
+ORDER_ID_COLUMN = 'Exchange Order Id'
+
+
+def read_order_history(file_path):
+    # Load the excel file (or the CSV variant of the same export) skipping metadata rows
+    if os.path.splitext(file_path)[1].lower() == '.csv':
+        return pd.read_csv(file_path, skiprows=5)
+    return pd.read_excel(file_path, header=5)
+
+
+def parse_execution_dates(dates):
+    """
+    Parses 'dd-mm-YYYY hh:MM AM' strings with integer arithmetic on the raw bytes.
+    Falls back to pd.to_datetime for anything that is not exactly in that fixed-width
+    format (Excel datetime cells, padding, invalid calendar days, ...).
+    """
+    dates = pd.Series(dates)
+    reference = pd.to_datetime(dates.iloc[:1], format=DATE_FORMAT)
+    try:
+        raw = np.array(dates.tolist(), dtype='S')
+        if raw.dtype.itemsize != 19 or not len(raw):
+            raise ValueError
+        chars = raw.view(np.uint8).reshape(-1, 19)
+        # 'dd-mm-YYYY hh:MM AM': separators at fixed offsets, meridiem at 17
+        if not (np.all(chars[:, [2, 5]] == ord('-')) and np.all(chars[:, [10, 16]] == ord(' '))
+                and np.all(chars[:, 13] == ord(':')) and np.all(chars[:, 18] == ord('M'))):
+            raise ValueError
+        digits = chars[:, [0, 1, 3, 4, 6, 7, 8, 9, 11, 12, 14, 15]].astype(np.int64) - ord('0')
+        day = digits[:, 0] * 10 + digits[:, 1]
+        month = digits[:, 2] * 10 + digits[:, 3]
+        year = digits[:, 4] * 1000 + digits[:, 5] * 100 + digits[:, 6] * 10 + digits[:, 7]
+        hour = digits[:, 8] * 10 + digits[:, 9]
+        minute = digits[:, 10] * 10 + digits[:, 11]
+        meridiem = chars[:, 17]
+        if (digits.min() < 0 or digits.max() > 9
+                or not np.all((meridiem == ord('A')) | (meridiem == ord('P')))
+                or not np.all((hour >= 1) & (hour <= 12) & (minute <= 59))
+                or not np.all((month >= 1) & (month <= 12) & (day >= 1))):
+            raise ValueError
+
+        months = (year - 1970) * 12 + (month - 1)
+        days = months.astype('datetime64[M]').astype('datetime64[D]') + (day - 1)
+        # 31-02 etc. would roll into the next month: leave those to pandas to reject
+        if not np.array_equal(days.astype('datetime64[M]').astype(np.int64), months):
+            raise ValueError
+        hour = hour % 12 + np.where(meridiem == ord('P'), 12, 0)
+        parsed = days.astype('datetime64[m]') + (hour * 60 + minute)
+        return pd.Series(parsed, index=dates.index).astype(reference.dtype)
+    except (ValueError, TypeError, UnicodeEncodeError):
+        return pd.to_datetime(dates, format=DATE_FORMAT)
+
+
+def clean_orders(df):
+    """
+    Turns raw export rows into the cleaned order frame (one vectorized pass, no row-wise apply).
+    """
+    # Basic cleaning + filter for Executed orders, as a single row selection
+    # (before parsing dates, so we only parse what we keep)
+    keep = df[['Stock name', 'Symbol', DATE_COLUMN]].notna().all(axis=1) & (df['Order status'] == 'Executed')
+    df = df[keep]
+
     # Convert date to datetime
-    df['Execution date and time'] = pd.to_datetime(df['Execution date and time'], format='%d-%m-%Y %I:%M %p')
-    
-    # Filter for Executed orders
-    df = df[df['Order status'] == 'Executed']
-    
-    # Sort by date
-    df = df.sort_values('Execution date and time')
-    
-    # Calculate impact on quantity and value
+    df[DATE_COLUMN] = parse_execution_dates(df[DATE_COLUMN])
+
+    # Sort by date (stable, so orders placed in the same minute keep their export order)
+    df = df.sort_values(DATE_COLUMN, kind='stable')
+
+    # Order ids are identifiers, not numbers: always text, whatever the reader inferred
+    # (ids that came in as floats because of blank cells lose their '.0' first)
+    if ORDER_ID_COLUMN in df.columns:
+        ids = df[ORDER_ID_COLUMN]
+        if pd.api.types.is_float_dtype(ids):
+            ids = ids.astype('Int64')
+        df[ORDER_ID_COLUMN] = ids.astype('str')
+
+    # Calculate impact on quantity and value with a signed multiplier from Type
     # BUY: Quantity +, Value -
     # SELL: Quantity -, Value +
-    df['Quantity_Change'] = df.apply(lambda x: x['Quantity'] if x['Type'] == 'BUY' else -x['Quantity'], axis=1)
-    df['Value_Change'] = df.apply(lambda x: -x['Value'] if x['Type'] == 'BUY' else x['Value'], axis=1)
-    
-    # Calculate cumulative portfolio value and snapshot over time
-    # However, for QoQ growth of portfolio, we need to track the value of current holdings at different points in time.
-    # Since we don't have historical prices in the sheet, "growth" here might mean "Net Cash Invested" vs "Current Value"
-    # But for QoQ based only on this sheet, we can track "Net Investment" or "Realized P&L"
-    
-    # Let's create a daily snapshot of the portfolio
-    all_dates = pd.date_range(start=df['Execution date and time'].min().date(), end=df['Execution date and time'].max().date())
-    portfolio_daily = pd.DataFrame(index=all_dates)
-    
-    # Group by date to get daily activity
-    df['Date'] = df['Execution date and time'].dt.date
-    daily_activity = df.groupby('Date').agg({
-        'Quantity_Change': 'sum',
-        'Value_Change': 'sum'
-    })
-    
-    portfolio_daily = portfolio_daily.join(daily_activity, how='left').fillna(0)
+    sign = np.where(df['Type'].to_numpy() == 'BUY', 1, -1)
+    df['Quantity_Change'] = df['Quantity'] * sign
+    df['Value_Change'] = df['Value'] * -sign
+
+    # Calendar day of each order (python dates, as the rest of the code expects)
+    df['Date'] = df[DATE_COLUMN].to_numpy().astype('datetime64[D]').astype(object)
+    return df
+
+
+def daily_activity(df):
+    """Net Quantity_Change / Value_Change per calendar day (DatetimeIndex)."""
+    return df.groupby(df[DATE_COLUMN].dt.normalize().rename(None))[['Quantity_Change', 'Value_Change']].sum()
+
+
+def build_portfolio_daily(activity, start, end):
+    """
+    Daily snapshot between start and end from a daily-activity frame.
+    Since we don't have historical prices in the sheet, "growth" here means "Net Cash Invested".
+    """
+    all_dates = pd.date_range(start=start, end=end)
+    portfolio_daily = activity.reindex(all_dates).fillna(0)
     portfolio_daily['Cumulative_Investment'] = -portfolio_daily['Value_Change'].cumsum()
-    
-    # Calculate current holdings per Symbol
-    # Group by Symbol to get Net Quantity and Total Net Cost
-    holdings = df.groupby(['Symbol', 'Stock name']).agg({
-        'Quantity_Change': 'sum',
-        'Value_Change': 'sum'
-    })
-    
+    return portfolio_daily
+
+
+def held_positions(df):
+    """
+    Shares held after each trade (df in date order), with sells clipped at the position held
+    like lot_engine.LotEngine: shares sold beyond it were bought before the export starts.
+    Also returns the matched share of each trade (1 for buys).
+    """
+    change = df['Quantity_Change']
+    by_symbol = df['Symbol']
+    net = change.groupby(by_symbol).cumsum()
+    position = net - net.groupby(by_symbol).cummin().clip(upper=0)
+    before = position.groupby(by_symbol).shift(1, fill_value=0)
+    matched = ((before - position) / df['Quantity']).where(change < 0, 1.0)
+    return position, matched
+
+
+def daily_positions(df, days, position=None):
+    """Shares held per symbol at the end of each day in days (DatetimeIndex x Symbol)."""
+    if position is None:
+        position, _ = held_positions(df)
+    daily = position.groupby([df[DATE_COLUMN].dt.normalize().rename(None), df['Symbol']]).last()
+    held = daily.unstack()
+    return held.reindex(held.index.union(days)).ffill().reindex(days).fillna(0)
+
+
+def market_value_daily(df, closes):
+    """
+    Daily market value of the holdings from a frame of daily closes (days x Symbol, e.g.
+    price_history.PriceHistoryStore.closes). Where a symbol has no close yet, its last traded
+    price from the orders stands in. Columns:
+    - Market_Value: value of the shares held at the end of the day
+    - Net_Invested: cash put in that day, Bought - Sold (proceeds of shares sold beyond the
+      position held count as neither value nor cash flow)
+    - Bought / Sold: cost of that day's buys, proceeds of its sells
+    - Priced_Share: share of Market_Value that comes from market closes
+    """
+    days = closes.index
+    position, matched = held_positions(df)
+    positions = daily_positions(df, days, position).reindex(columns=closes.columns, fill_value=0)
+    day = df[DATE_COLUMN].dt.normalize().rename(None)
+    traded = (df['Value'] / df['Quantity']).groupby([day, df['Symbol']]).last().unstack()
+    traded = traded.reindex(traded.index.union(days)).ffill().reindex(index=days, columns=closes.columns)
+
+    price = closes.where(closes.notna(), traded)
+    value = (positions * price).fillna(0)
+    market_value = value.sum(axis=1)
+    from_closes = (positions * closes).fillna(0).sum(axis=1)
+    flows = -(df['Value_Change'] * matched)
+    bought = flows.clip(lower=0).groupby(day).sum().reindex(days, fill_value=0.0)
+    sold = -flows.clip(upper=0).groupby(day).sum().reindex(days, fill_value=0.0)
+    return pd.DataFrame({
+        'Market_Value': market_value,
+        'Net_Invested': bought - sold,
+        'Bought': bought,
+        'Sold': sold,
+        'Priced_Share': (from_closes / market_value.where(market_value != 0)).fillna(0.0),
+    }, index=days)
+
+
+def period_return(series, start, end):
+    """
+    Simple Dietz return (%) between two days of a market_value_daily frame: the change in
+    market value net of the cash put in, over the average capital employed.
+    None if the period is not covered.
+    """
+    window = series.loc[start:end]
+    if len(window) < 2:
+        return None
+    start_value, end_value = window['Market_Value'].iloc[0], window['Market_Value'].iloc[-1]
+    flows = window['Net_Invested'].iloc[1:].sum()
+    capital = start_value + flows / 2
+    return float((end_value - start_value - flows) / capital * 100) if capital > 0 else None
+
+
+def trailing_return(series, months=6):
+    """Simple Dietz return (%) over the last months of a market_value_daily frame, None if shorter."""
+    if series is None or series.empty:
+        return None
+    end = series.index[-1]
+    start = end - pd.DateOffset(months=months)
+    if start < series.index[0]:
+        return None
+    return period_return(series, start, end)
+
+
+def quarterly_returns(series):
+    """{'YYYYQn': simple Dietz return %} for each quarter of a market_value_daily frame."""
+    returns = {}
+    quarters = series.index.to_period('Q')
+    for quarter in quarters.unique():
+        days = series.index[quarters == quarter]
+        # Each quarter starts from the previous quarter's closing value
+        start = days[0] - pd.Timedelta(days=1) if days[0] > series.index[0] else days[0]
+        value = period_return(series, start, days[-1])
+        if value is not None:
+            returns[str(quarter)] = round(value, 2)
+    return returns
+
+
+def net_positions(df):
+    """Net Quantity_Change / Value_Change per (Symbol, Stock name), including closed positions."""
+    return df.groupby(['Symbol', 'Stock name'])[['Quantity_Change', 'Value_Change']].sum()
+
+
+def build_holdings(positions):
     # Only keep current holdings (Quantity > 0)
-    holdings = holdings[holdings['Quantity_Change'] > 0]
+    holdings = positions[positions['Quantity_Change'] > 0].copy()
     holdings['Avg_Price'] = -holdings['Value_Change'] / holdings['Quantity_Change']
     holdings['Total_Value'] = -holdings['Value_Change']
-    
+    return holdings
+
+
+def process_orders(raw_df):
+    """
+    Vectorized pipeline from raw export rows to (df, portfolio_daily, holdings).
+    """
+    df = clean_orders(raw_df)
+
+    # Let's create a daily snapshot of the portfolio from the grouped daily activity
+    portfolio_daily = build_portfolio_daily(
+        daily_activity(df),
+        df[DATE_COLUMN].min().date(),
+        df[DATE_COLUMN].max().date(),
+    )
+
+    # Calculate current holdings per Symbol
+    # Group by Symbol to get Net Quantity and Total Net Cost
+    holdings = build_holdings(net_positions(df))
+
     return df, portfolio_daily, holdings
 
+
+def process_stock_data(file_path):
+    return process_orders(read_order_history(file_path))
+
 if __name__ == "__main__":
     df, portfolio, holdings = process_stock_data('stock_order_history.xlsx')
     print("Data processed successfully.")
@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+from data_processor import DATE_COLUMN
+
+# Listed equity held for more than 12 months counts as long-term
+LONG_TERM_DAYS = 365
+
+
+class LotEngine:
+    """
+    FIFO lot accounting over the cleaned order frame (sorted by execution date).
+
+    Every BUY opens a lot. Per symbol the lots sit in one array in buy order, and FIFO means
+    a sell always consumes from the front, so each symbol's queue is just a head position on
+    its cumulative bought quantity. A sell of q shares takes the units between its cumulative
+    sold quantity before and after the sell; intersecting those intervals with the lots'
+    intervals gives every (lot, sell) match for the whole history at once, in a few array
+    passes over the order stream.
+
+    Sells larger than the position held (e.g. shares bought before the export starts) are
+    matched up to the position; the rest is reported as unmatched_qty with no cost basis.
+    """
+
+    def __init__(self, df, long_term_days=LONG_TERM_DAYS):
+        self.long_term_days = long_term_days
+        n = len(df)
+        codes, symbols = pd.factorize(df['Symbol'].astype(str), sort=False)
+        self.symbols = pd.Index(symbols, name='Symbol')
+
+        # Order stream grouped by symbol, each group still in date order
+        order = np.argsort(codes, kind="stable")
+        code = codes[order]
+        labels = df.index.to_numpy()[order]
+        names = df['Stock name'].array.take(order)
+        when = df[DATE_COLUMN].to_numpy()[order]
+        day = when.astype('datetime64[D]')
+        qty = df['Quantity'].to_numpy(dtype=float)[order]
+        value = df['Value'].to_numpy(dtype=float)[order]
+        is_buy = (df['Type'] == 'BUY').to_numpy(dtype=bool)[order]
+        first = np.r_[True, code[1:] != code[:-1]] if n else np.zeros(0, dtype=bool)
+        group = np.cumsum(first) - 1
+        sizes = np.diff(np.flatnonzero(np.r_[first, True]))
+
+        # Position after each trade with sells clipped at what is held: running net quantity
+        # minus its running minimum (below zero) within the symbol
+        net = pd.Series(np.where(is_buy, qty, -qty)).groupby(group).cumsum().to_numpy()
+        floor = np.minimum(pd.Series(net).groupby(group).cummin().to_numpy(), 0)
+        position = net - floor
+        before = np.where(first, 0.0, np.r_[0.0, position[:-1]])
+        matched = np.where(is_buy, 0.0, before - position)
+
+        # Cumulative bought / sold quantity on one axis (symbols laid end to end): the running
+        # total of buys over the grouped stream, and each symbol's sells restarted at the
+        # quantity bought by the symbols before it
+        buy_end = np.cumsum(np.where(is_buy, qty, 0.0))
+        sold = np.cumsum(matched)
+        base = buy_end - np.where(is_buy, qty, 0.0)
+        sell_end = sold + np.repeat((base - (sold - matched))[first], sizes)
+
+        buys, sells = np.flatnonzero(is_buy), np.flatnonzero(~is_buy & (matched > 0))
+        lot_end, lot_start = buy_end[buys], buy_end[buys] - qty[buys]
+        cut_end, cut_start = sell_end[sells], sell_end[sells] - matched[sells]
+
+        # Matched pieces: segments between all boundaries that lie inside a sell
+        points = np.unique(np.concatenate([lot_end, cut_start, cut_end]))
+        lo, hi = points[:-1], points[1:]
+        mid = (lo + hi) / 2
+        s = np.searchsorted(cut_end, mid)
+        inside = s < len(sells)
+        inside[inside] &= mid[inside] > cut_start[s[inside]]
+        lo, hi, mid, s = lo[inside], hi[inside], mid[inside], s[inside]
+        b = np.searchsorted(lot_end, mid)
+
+        lot_rows, sell_rows = buys[b], sells[s]
+        piece_qty = hi - lo
+        piece_cost = piece_qty * value[lot_rows] / qty[lot_rows]
+        piece_proceeds = piece_qty * value[sell_rows] / qty[sell_rows]
+        held_days = (day[sell_rows] - day[lot_rows]).astype(np.int64)
+        long_term = held_days > long_term_days
+
+        # One row per sell
+        def per_sell(weights):
+            return np.bincount(s, weights=weights, minlength=len(sells))
+
+        pnl = piece_proceeds - piece_cost
+        all_sells = np.flatnonzero(~is_buy)
+        realized = pd.DataFrame({
+            'Symbol': symbols[code[all_sells]],
+            'Stock name': names[all_sells],
+            DATE_COLUMN: when[all_sells],
+            'Quantity': qty[all_sells],
+            'Proceeds': value[all_sells],
+            'matched_qty': matched[all_sells],
+            'unmatched_qty': qty[all_sells] - matched[all_sells],
+            'cost_basis': 0.0,
+            'realized_pnl': 0.0,
+            'short_term_qty': 0.0,
+            'short_term_pnl': 0.0,
+            'long_term_qty': 0.0,
+            'long_term_pnl': 0.0,
+        }, index=pd.Index(labels[all_sells], name=df.index.name))
+        rows = np.searchsorted(all_sells, sells)
+        for column, weights in (
+            ('cost_basis', piece_cost),
+            ('realized_pnl', pnl),
+            ('short_term_qty', np.where(long_term, 0.0, piece_qty)),
+            ('short_term_pnl', np.where(long_term, 0.0, pnl)),
+            ('long_term_qty', np.where(long_term, piece_qty, 0.0)),
+            ('long_term_pnl', np.where(long_term, pnl, 0.0)),
+        ):
+            realized.iloc[rows, realized.columns.get_loc(column)] = per_sell(weights)
+        # Back to the order of the stream (date order)
+        self.realized = realized.iloc[np.argsort(order[all_sells], kind="stable")]
+
+        # Open lots: what is left of each lot past its symbol's total matched sells
+        last = np.r_[first[1:], True] if n else first
+        sold_total = np.repeat(sell_end[last], sizes)
+        remaining = np.clip(lot_end - np.maximum(lot_start, sold_total[buys]), 0.0, None)
+        open_ = remaining > 0
+        rows = buys[open_]
+        price = value[rows] / qty[rows]
+        open_lots = pd.DataFrame({
+            'Symbol': symbols[code[rows]],
+            'Stock name': names[rows],
+            DATE_COLUMN: when[rows],
+            'Quantity': remaining[open_],
+            'Price': price,
+            'Cost': remaining[open_] * price,
+        }, index=pd.Index(labels[rows], name=df.index.name))
+        self.open_lots = open_lots.iloc[np.argsort(order[rows], kind="stable")]
+
+    def holdings(self):
+        """
+        Open positions at FIFO cost, indexed by (Symbol, Stock name) like build_holdings:
+        Quantity_Change, Avg_Price (FIFO) and Total_Value (FIFO cost of the open lots).
+        """
+        grouped = self.open_lots.groupby(['Symbol', 'Stock name'], sort=True)[['Quantity', 'Cost']].sum()
+        return pd.DataFrame({
+            'Quantity_Change': grouped['Quantity'],
+            'Avg_Price': grouped['Cost'] / grouped['Quantity'],
+            'Total_Value': grouped['Cost'],
+        })
+
+    def summary(self, today=None):
+        """
+        Realized P&L split into short- and long-term, and the FIFO cost of what is still held
+        (with how much of it is already past the long-term holding period as of today).
+        """
+        today = pd.Timestamp(today) if today is not None else pd.Timestamp.today()
+        realized = self.realized
+        age = (today.normalize() - self.open_lots[DATE_COLUMN].dt.normalize()).dt.days
+        return {
+            "Realized P&L (FIFO)": float(realized['realized_pnl'].sum()),
+            "Short-term Realized P&L": float(realized['short_term_pnl'].sum()),
+            "Long-term Realized P&L": float(realized['long_term_pnl'].sum()),
+            "Cost Basis of Shares Sold": float(realized['cost_basis'].sum()),
+            "Open Cost Basis (FIFO)": float(self.open_lots['Cost'].sum()),
+            "Open Cost Held Long-term": float(self.open_lots.loc[age > self.long_term_days, 'Cost'].sum()),
+            "Unmatched Sold Quantity": float(realized['unmatched_qty'].sum()),
+        }
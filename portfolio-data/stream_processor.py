@@ -0,0 +1,138 @@
+import os
+import pandas as pd
+from data_processor import (
+    DATE_COLUMN, clean_orders, daily_activity,
+    build_portfolio_daily, build_holdings, net_positions,
+)
+
+# Rows of metadata above the column header in the broker export (same as read_excel(header=5))
+HEADER_ROWS = 5
+
+# Explicit types for the export's numeric columns, so every chunk gets the same dtypes
+# whatever its rows look like (per-chunk inference could turn a column into float in one
+# chunk and int in the next). Order ids are normalized to text by clean_orders.
+NUMERIC_COLUMNS = ('Quantity', 'Value')
+
+
+def _convert_cell(value):
+    # Whole-number floats become ints, as in read_excel
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _typed(chunk):
+    for column in NUMERIC_COLUMNS:
+        if column in chunk.columns:
+            chunk[column] = pd.to_numeric(chunk[column])
+    return chunk
+
+
+def _iter_xlsx_chunks(file_path, chunk_size, header_rows):
+    from openpyxl import load_workbook
+
+    # read_only streams rows from the sheet XML instead of building the whole workbook
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        for _ in range(header_rows):
+            next(rows, None)
+        columns = [c for c in next(rows, ()) if c is not None]
+        width = len(columns)
+
+        # Row labels continue across chunks, as in the single frame read_excel returns
+        offset = 0
+        buffer = []
+        for row in rows:
+            buffer.append([_convert_cell(v) for v in row[:width]])
+            if len(buffer) >= chunk_size:
+                yield _typed(pd.DataFrame(buffer, columns=columns, index=pd.RangeIndex(offset, offset + len(buffer))))
+                offset += len(buffer)
+                buffer = []
+        if buffer:
+            yield _typed(pd.DataFrame(buffer, columns=columns, index=pd.RangeIndex(offset, offset + len(buffer))))
+    finally:
+        wb.close()
+
+
+def iter_order_chunks(file_path, chunk_size=50_000, header_rows=HEADER_ROWS):
+    """
+    Yields raw export rows as DataFrames of at most chunk_size rows (xlsx or csv).
+    """
+    if os.path.splitext(file_path)[1].lower() == ".csv":
+        for chunk in pd.read_csv(file_path, skiprows=header_rows, chunksize=chunk_size):
+            yield _typed(chunk)
+    else:
+        yield from _iter_xlsx_chunks(file_path, chunk_size, header_rows)
+
+
+def _write_orders(writer, orders_path, chunk):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # One row group per chunk; later chunks are cast to the first one's schema
+    # (a column that is all-null in a chunk would otherwise come out with another type)
+    if writer is None:
+        table = pa.Table.from_pandas(chunk, preserve_index=True)
+        writer = pq.ParquetWriter(orders_path, table.schema)
+    else:
+        table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=True)
+    writer.write_table(table)
+    return writer
+
+
+def stream_stock_data(file_path, chunk_size=50_000, orders_path=None):
+    """
+    Chunked equivalent of process_stock_data, for exports too large to read at once.
+    Each chunk is cleaned and folded straight into the daily-activity and holdings
+    aggregates, so neither the workbook nor the raw export frame is ever held in memory
+    in full: peak memory is the cleaned order frame plus one chunk.
+    With orders_path, the cleaned chunks are appended to that Parquet file instead of kept
+    and df is returned as None, so peak memory is one chunk plus the aggregates whatever
+    the size of the export (data_cache.load_stock_data(lazy_orders=True) reads the file
+    back, in date order, once something needs the orders).
+    """
+    activity = None
+    positions = None
+    first_date = last_date = None
+    orders = []
+    writer = None
+
+    try:
+        for raw in iter_order_chunks(file_path, chunk_size):
+            chunk = clean_orders(raw)
+            if chunk.empty:
+                continue
+
+            chunk_activity = daily_activity(chunk)
+            chunk_positions = net_positions(chunk)
+            activity = chunk_activity if activity is None else pd.concat([activity, chunk_activity]).groupby(level=0).sum()
+            positions = chunk_positions if positions is None else pd.concat([positions, chunk_positions]).groupby(level=[0, 1]).sum()
+
+            chunk_first, chunk_last = chunk[DATE_COLUMN].iloc[0], chunk[DATE_COLUMN].iloc[-1]
+            first_date = chunk_first if first_date is None else min(first_date, chunk_first)
+            last_date = chunk_last if last_date is None else max(last_date, chunk_last)
+
+            if orders_path is None:
+                orders.append(chunk)
+            else:
+                writer = _write_orders(writer, orders_path, chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if activity is None:
+        raise ValueError(f"No executed orders found in {file_path}")
+
+    # Stable, like clean_orders: same-minute orders keep their export order across chunks
+    df = pd.concat(orders).sort_values(DATE_COLUMN, kind='stable') if orders_path is None else None
+    portfolio_daily = build_portfolio_daily(activity, first_date.date(), last_date.date())
+    holdings = build_holdings(positions)
+    return df, portfolio_daily, holdings
+
+
+if __name__ == "__main__":
+    df, portfolio, holdings = stream_stock_data('stock_order_history.xlsx')
+    print("Data streamed successfully.")
+    print("\nCurrent Holdings:")
+    print(holdings)
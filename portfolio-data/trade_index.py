@@ -0,0 +1,159 @@
+import re
+from collections import Counter
+import numpy as np
+import pandas as pd
+from data_processor import DATE_COLUMN
+from context_builder import compact_trades
+
+MONTHS = {m: i + 1 for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"])}
+
+# Words that show up in stock names (or questions) without identifying a stock
+STOPWORDS = {
+    "ltd", "limited", "the", "and", "of", "india", "inc", "corp", "corporation", "company", "co",
+    "did", "buy", "sell", "bought", "sold", "my", "in", "on", "for", "what", "when", "how", "many",
+    "shares", "stock", "stocks", "any", "all", "trades", "trade", "orders", "order",
+}
+
+_MONTH_YEAR = re.compile(r"\b(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?,?\s+(\d{4})\b")
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+_DMY_DATE = re.compile(r"\b(\d{1,2})[-/](\d{1,2})[-/](\d{4})\b")
+_YEAR = re.compile(r"\b((?:19|20)\d{2})\b")
+_BUY = re.compile(r"\b(buy|bought|buys|buying|purchase[sd]?|add(?:ed)?)\b")
+_SELL = re.compile(r"\b(sell|sold|sells|selling|exit(?:ed)?)\b")
+
+
+def _name_tokens(text):
+    return [t for t in re.findall(r"[a-z0-9]+", text.lower()) if len(t) > 2 and t not in STOPWORDS]
+
+
+def parse_query(query):
+    """
+    Pulls trade filters out of a question: symbols/name words (matched later against the index),
+    a date range (month + year, ISO or dd-mm-yyyy dates, or a bare year; several dates give the
+    range spanning them) and the side (BUY/SELL, only when the question names one).
+    """
+    text = query.lower()
+    spans = []
+    for month, year in _MONTH_YEAR.findall(text):
+        start = pd.Timestamp(int(year), MONTHS[month], 1)
+        spans.append((start, start + pd.offsets.MonthBegin(1)))
+    for year, month, day in _ISO_DATE.findall(text):
+        start = pd.Timestamp(int(year), int(month), int(day))
+        spans.append((start, start + pd.Timedelta(days=1)))
+    for day, month, year in _DMY_DATE.findall(text):
+        start = pd.Timestamp(int(year), int(month), int(day))
+        spans.append((start, start + pd.Timedelta(days=1)))
+    if not spans:
+        # A bare year only counts when no finer date was given
+        spans = [(pd.Timestamp(int(y), 1, 1), pd.Timestamp(int(y) + 1, 1, 1)) for y in _YEAR.findall(text)]
+
+    buy, sell = bool(_BUY.search(text)), bool(_SELL.search(text))
+    return {
+        "words": re.findall(r"[A-Za-z0-9&\-]+", query),
+        "start": min(s for s, _ in spans) if spans else None,
+        "end": max(e for _, e in spans) if spans else None,
+        "side": "BUY" if buy and not sell else "SELL" if sell and not buy else None,
+    }
+
+
+class TradeIndex:
+    """
+    In-memory index over the cleaned order frame (sorted by execution date):
+    row positions grouped by symbol, stock-name tokens -> symbols, and the execution
+    timestamps per symbol for range lookups with searchsorted.
+
+    lookup() returns positional row numbers into df in date order; it never scans df.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        dates = df[DATE_COLUMN].to_numpy(dtype="datetime64[ns]").view(np.int64)
+        if len(dates) and not np.all(dates[1:] >= dates[:-1]):
+            raise ValueError("TradeIndex expects orders sorted by execution date")
+        self.dates = dates
+        self.is_buy = (df['Type'] == 'BUY').to_numpy(dtype=bool)
+
+        # Positions grouped by symbol (stable, so each group stays in date order)
+        codes, symbols = pd.factorize(df['Symbol'], sort=False)
+        self.order = np.argsort(codes, kind="stable")
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(symbols)))])
+        self.symbol_dates = dates[self.order]
+        self.symbols = {str(s).upper(): i for i, s in enumerate(symbols)}
+
+        # Name tokens -> symbol codes (one stock name per symbol)
+        names = df['Stock name'].to_numpy()[self.order[self.offsets[:-1]]]
+        self.tokens = {}
+        for code, name in enumerate(names):
+            for token in set(_name_tokens(str(name))):
+                self.tokens.setdefault(token, set()).add(code)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def match_symbols(self, words):
+        """
+        Symbol codes a question refers to: exact ticker matches, otherwise the stocks whose
+        names share the most words with it ("tata motors" -> Tata Motors, not Tata Steel).
+        """
+        exact = {self.symbols[w.upper()] for w in words if w.upper() in self.symbols}
+        if exact:
+            return sorted(exact)
+        hits = Counter()
+        for token in _name_tokens(" ".join(words)):
+            hits.update(self.tokens.get(token, ()))
+        if not hits:
+            return []
+        best = max(hits.values())
+        return sorted(code for code, n in hits.items() if n == best)
+
+    def lookup(self, codes=None, start=None, end=None, side=None):
+        """
+        Row positions (into df, in date order) for the given symbol codes (None = all symbols)
+        within [start, end) and of the given side.
+        """
+        lo = np.int64(pd.Timestamp(start).value) if start is not None else None
+        hi = np.int64(pd.Timestamp(end).value) if end is not None else None
+
+        if codes is None:
+            a = np.searchsorted(self.dates, lo) if lo is not None else 0
+            b = np.searchsorted(self.dates, hi) if hi is not None else len(self.dates)
+            positions = np.arange(a, b)
+        else:
+            parts = []
+            for code in codes:
+                first, last = self.offsets[code], self.offsets[code + 1]
+                dates = self.symbol_dates[first:last]
+                a = first + (np.searchsorted(dates, lo) if lo is not None else 0)
+                b = first + (np.searchsorted(dates, hi) if hi is not None else len(dates))
+                parts.append(self.order[a:b])
+            positions = np.sort(np.concatenate(parts)) if len(parts) > 1 else parts[0] if parts else np.empty(0, np.int64)
+
+        if side is not None:
+            positions = positions[self.is_buy[positions] == (side == 'BUY')]
+        return positions
+
+    def search(self, query):
+        """
+        Row positions matching the filters in a question, or None if it names
+        neither a stock nor a date.
+        """
+        filters = parse_query(query)
+        codes = self.match_symbols(filters["words"])
+        if not codes and filters["start"] is None:
+            # Nothing to narrow down by ("what did I sell?" alone would pull half the history);
+            # the recent trades in the system prompt cover those
+            return None
+        return self.lookup(codes or None, filters["start"], filters["end"], filters["side"])
+
+    def retrieve(self, query, max_tokens=1500, max_rows=200):
+        """
+        The trades matching a question as compact CSV (newest max_rows within max_tokens,
+        older matches summarized), or None if the question doesn't filter trades.
+        """
+        positions = self.search(query)
+        if positions is None:
+            return None
+        if not len(positions):
+            return "No matching trades."
+        return compact_trades(self.df.iloc[positions], max_tokens, max_rows, with_names=True)
@@ -1,10 +1,13 @@
 import streamlit as st
 import sys, os
+from datetime import datetime
 # Add portfolio-data and agents directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), "portfolio-data"))
 sys.path.append(os.path.join(os.path.dirname(__file__), "agents"))
 
-from agents.orchestrator import Orchestrator
+from agents.portfolio_registry import get_portfolio_registry
+from agents.orchestrator import TurnState
+from agents.telemetry import get_telemetry
 from dotenv import load_dotenv
 
 # Set page configuration
@@ -38,13 +41,60 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
-# Initialize Orchestrator
+# One registry per server: every account gets its own Orchestrator, built on its first visit
 @st.cache_resource
+def get_registry():
+    return get_portfolio_registry()
+
+# Prometheus metrics on TELEMETRY_PORT (needs TELEMETRY=1), one endpoint per server
+@st.cache_resource
+def start_metrics_server():
+    telemetry = get_telemetry()
+    port = os.getenv("TELEMETRY_PORT")
+    if telemetry.enabled and port:
+        telemetry.serve(int(port), host=os.getenv("TELEMETRY_HOST", "127.0.0.1"))
+    return telemetry
+
+def signed_in_identity():
+    # Streamlit's built-in login (st.login, configured under [auth] in .streamlit/secrets.toml)
+    if not st.user.get("is_logged_in", False):
+        return None
+    return st.user.get("email")
+
 def get_orchestrator():
-    return Orchestrator()
+    registry = get_registry()
+    identity = signed_in_identity()
+    # Only the visitor's own portfolios (see PORTFOLIO_ACCESS) are offered or opened
+    accounts = registry.accounts_for(identity)
+    requested = st.query_params.get("account")
+    if not accounts or (requested is not None and requested not in accounts):
+        if identity is None and registry.requires_login:
+            st.info("Sign in to see your portfolio.")
+            st.button("Log in", on_click=st.login)
+        else:
+            st.error("This portfolio is not available to you.")
+        st.stop()
+    # ?account=<id> picks one of them; with several the sidebar offers a choice
+    account = requested or accounts[0]
+    if len(accounts) > 1:
+        account = st.sidebar.selectbox("Portfolio", accounts, index=accounts.index(account))
+    # A different portfolio starts a new conversation
+    if st.session_state.get("account") != account:
+        st.session_state.account = account
+        st.session_state.pop("messages", None)
+    # The orchestrator is shared by every session on this account; the turn state is not
+    if "turn_state" not in st.session_state:
+        st.session_state.turn_state = TurnState()
+    orchestrator = registry.get(account)
+    # Live prices are kept current in the background; reruns only read the latest snapshot
+    orchestrator.start_price_refresher()
+    return orchestrator
 
 try:
+    start_metrics_server()
     orchestrator = get_orchestrator()
+    # Each rerun is one interaction: the sidebar and the chat answer share one valuation
+    orchestrator.begin_turn(state=st.session_state.turn_state)
     # Get stats for sidebar
     stats = orchestrator.get_portfolio_stats()
 except Exception as e:
@@ -56,19 +106,31 @@ st.sidebar.title("🚀 Multi-Agent Dashboard")
 st.sidebar.divider()
 
 st.sidebar.metric("Invested Value", f"₹{stats['current_value']:,.2f}")
-st.sidebar.metric("Live Market Value", f"₹{stats.get('market_value', 0):,.2f}")
+if stats.get('market_value') is None:
+    st.sidebar.metric("Live Market Value", "—")
+    st.sidebar.caption("Fetching live prices...")
+else:
+    st.sidebar.metric("Live Market Value", f"₹{stats['market_value']:,.2f}")
+    age = stats.get('valuation_age') or 0
+    age_text = f"{age:.0f}s ago" if age < 120 else f"{age / 60:.0f} min ago"
+    st.sidebar.caption(f"Prices as of {datetime.fromtimestamp(stats['valuation_taken_at']):%H:%M:%S} ({age_text})")
+
+    # Calculate Unrealized P&L Delta color
+    pnl = stats.get('unrealized_pnl', 0)
+    pnl_pct = stats.get('pnl_percentage', 0)
+    st.sidebar.metric("Unrealized P&L", f"₹{pnl:,.2f}", delta=f"{pnl_pct:,.2f}%")
 
-# Calculate Unrealized P&L Delta color
-pnl = stats.get('unrealized_pnl', 0)
-pnl_pct = stats.get('pnl_percentage', 0)
-st.sidebar.metric("Unrealized P&L", f"₹{pnl:,.2f}", delta=f"{pnl_pct:,.2f}%")
+if st.sidebar.button("🔄 Refresh prices"):
+    with st.spinner("Refreshing prices..."):
+        orchestrator.refresh_prices()
+    st.rerun()
 
 st.sidebar.metric("Total Orders", f"{stats['total_orders']}")
 
 # 6-Month Growth with color
 growth = stats['six_month_growth']
 if isinstance(growth, (int, float)):
-    st.sidebar.metric("6-Month Growth (Historical)", f"{growth:,.2f}%")
+    st.sidebar.metric("6-Month Return (Market Value)", f"{growth:,.2f}%")
 else:
     st.sidebar.info(growth)
 
@@ -97,20 +159,26 @@ if prompt := st.chat_input("Ask about XIRR, Predictions, or Analysis..."):
     # Add user message to chat history
     st.session_state.messages.append({"role": "user", "content": prompt})
 
-    with st.spinner("Orchestrator is routing your query..."):
-        try:
-            # Generate response from orchestrator
-            # Note: route_query returns a string directly
-            response = orchestrator.route_query(prompt)
-            
-            # Display assistant response in chat message container
-            with st.chat_message("assistant"):
-                st.markdown(response)
-            # Add assistant response to chat history
-            st.session_state.messages.append({"role": "assistant", "content": response})
-        except Exception as e:
-            st.error(f"An error occurred: {e}")
+    try:
+        # Stream the answer into the assistant message as it is generated
+        # (write_stream shows a spinner until the first piece arrives and returns the full text)
+        # ?profile=1 (or =pyinstrument) profiles this answer and shows the report below it
+        profile = {"1": "cprofile", "true": "cprofile", "cprofile": "cprofile",
+                   "pyinstrument": "pyinstrument"}.get(st.query_params.get("profile"))
+        with st.chat_message("assistant"):
+            response = st.write_stream(orchestrator.route_query_stream(prompt, profile=profile))
+            if profile and orchestrator.last_profile:
+                with st.expander("Profile of this answer"):
+                    st.code(orchestrator.last_profile, language="text")
+        # Add assistant response to chat history
+        st.session_state.messages.append({"role": "assistant", "content": response})
+    except Exception as e:
+        st.error(f"An error occurred: {e}")
 
 # Footer
 st.markdown("---")
 st.caption("Powered by Multi-Agent Architecture • Groq • Streamlit")
+
+# The page is up: build the remaining agents and fit the intent model in the background
+# (once per orchestrator) instead of on the first question that needs them
+orchestrator.warm_up()
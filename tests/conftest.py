@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The benchmarks' synthetic exports and stub providers double as test fixtures;
+# importing synthetic also puts the repo modules on sys.path like streamlit_app.py does
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import synthetic  # noqa: E402,F401
+
+os.environ.setdefault("GROQ_API_KEY", "stub")
+os.environ["LLM_CACHE_PATH"] = ""  # keep stub answers out of the on-disk LLM cache
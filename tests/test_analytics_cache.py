@@ -0,0 +1,56 @@
+from synthetic import make_orders
+from stubs import StubChatClient
+from data_processor import process_orders
+from data_context import DataContext
+from agents.llm_cache import ResponseCache
+from agents.analytics_agent import AnalyticsAgent, LIVE_VALUE_STEP
+
+QUESTION = "How diversified am I?"
+
+
+def make_agent(context):
+    agent = AnalyticsAgent(context, response_cache=ResponseCache())
+    agent.client = StubChatClient()
+    return agent
+
+
+def ask(agent, live):
+    return agent.analyze(QUESTION, live_value=live)
+
+
+def test_answers_are_reused_while_the_live_value_only_ticks():
+    raw = make_orders(2_000, n_symbols=20, seed=5)
+    context = DataContext(*process_orders(raw.iloc[:1_900]))
+    agent = make_agent(context)
+    value = (1 + LIVE_VALUE_STEP) ** 2800
+    for tick in (1.0, 1.001, 0.999, 1.002):
+        ask(agent, value * tick)
+    assert agent.client.calls == 1
+    # A real move in the portfolio value is a new answer
+    ask(agent, value * 1.03)
+    assert agent.client.calls == 2
+    # So are new orders
+    context.append_orders(raw.iloc[1_900:])
+    ask(agent, value)
+    assert agent.client.calls == 3
+
+
+def test_cached_answers_only_see_the_rounded_live_value():
+    context = DataContext(*process_orders(make_orders(500, n_symbols=10, seed=7)))
+    agent = make_agent(context)
+    ask(agent, 1_234_567.89)
+    prompt = agent.client.requests[0]["messages"][0]["content"]
+    # The answer cached for this bucket is reused for 1,235,000.00, so it must not be told 1,234,567.89
+    assert "1,234,567" not in prompt
+    assert "about ₹1,23" in prompt
+    ask(agent, 1_235_000.00)
+    assert agent.client.calls == 1
+
+
+def test_exact_live_context_is_keyed_without_a_value():
+    context = DataContext(*process_orders(make_orders(500, n_symbols=10, seed=6)))
+    agent = make_agent(context)
+    agent.analyze(QUESTION, "Current Live Portfolio Value: ₹1,000.00")
+    agent.analyze(QUESTION, "Current Live Portfolio Value: ₹1,000.00")
+    agent.analyze(QUESTION, "Current Live Portfolio Value: ₹1,001.00")
+    assert agent.client.calls == 2
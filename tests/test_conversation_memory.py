@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+
+from synthetic import make_orders, write_order_history_csv
+from stubs import StubChatClient, StubHistoryProvider
+from context_builder import estimate_tokens
+from conversation_memory import ConversationMemory, SUMMARY_PREFIX
+from price_history import PriceHistoryStore
+
+SYSTEM = "You are a portfolio assistant. " * 20
+ANSWER = "Your position in SYM0001 is 120 shares at an average price of 1,204.50. " * 4
+
+
+def prompt_tokens(messages):
+    return sum(estimate_tokens(m["content"]) for m in messages)
+
+
+def chat(memory, turns):
+    sent = []
+    for turn in range(turns):
+        memory.add("user", f"Question {turn}: how did SYM{turn:04d} do this quarter?")
+        sent.append(memory.messages())
+        memory.add("assistant", ANSWER)
+    return sent
+
+
+def test_prompt_stays_within_budget_and_keeps_the_latest_turn():
+    memory = ConversationMemory(SYSTEM, summarizer=lambda previous, batch: f"{len(batch)} more turns. " * 10,
+                                max_tokens=1500, summary_tokens=200)
+    for turn, messages in enumerate(chat(memory, 100)):
+        assert prompt_tokens(messages) <= memory.max_tokens
+        assert messages[0] == memory.system
+        assert messages[-1]["content"].startswith(f"Question {turn}:")
+    memory.wait()
+    stats = memory.stats()
+    assert stats["summarized_messages"] > 0
+    assert stats["summary_tokens"] <= memory.summary_tokens
+
+
+def test_summary_is_folded_in_on_a_background_thread():
+    release = threading.Event()
+
+    def slow_summary(previous, batch):
+        release.wait(5)
+        return (previous + " " if previous else "") + f"{len(batch)} turns about holdings."
+
+    memory = ConversationMemory(SYSTEM, summarizer=slow_summary, max_tokens=1200, summary_tokens=200)
+    start = time.perf_counter()
+    sent = chat(memory, 30)
+    # No turn waited for the summarizer, which is still blocked
+    assert time.perf_counter() - start < 1.0
+    assert memory.stats()["summarized_messages"] == 0
+    # Until the summary lands the moved-out turns are shown abridged
+    assert sent[-1][1]["content"].startswith(SUMMARY_PREFIX + "(being prepared)")
+
+    release.set()
+    memory.wait(5)
+    messages = memory.messages()
+    memory.wait(5)
+    assert memory.stats()["summarized_messages"] > 0
+    assert "turns about holdings" in messages[1]["content"]
+
+
+def test_failed_summary_keeps_the_previous_one():
+    calls = []
+
+    def flaky(previous, batch):
+        calls.append(len(batch))
+        if len(calls) == 2:
+            raise ConnectionError("LLM unavailable")
+        return f"summary {len(calls)}"
+
+    memory = ConversationMemory(SYSTEM, summarizer=flaky, max_tokens=1000, summary_tokens=150)
+    for _ in range(6):
+        chat(memory, 5)
+        memory.wait(5)
+    assert memory.summary.startswith("summary ")
+    assert len(calls) > 2
+    assert prompt_tokens(memory.messages()) <= memory.max_tokens
+
+
+def test_without_summarizer_only_an_abridged_list_is_kept():
+    memory = ConversationMemory(SYSTEM, max_tokens=1000, summary_tokens=100)
+    for messages in chat(memory, 200):
+        assert prompt_tokens(messages) <= memory.max_tokens
+    assert memory.stats()["pending_messages"] <= memory.summary_tokens // 10
+
+
+def test_stock_agent_requests_stay_within_memory_budget(tmp_path):
+    from agent import StockAgent
+
+    file_path = os.path.join(tmp_path, "orders.csv")
+    write_order_history_csv(make_orders(2_000, n_symbols=40, seed=15), file_path)
+    store = PriceHistoryStore(os.path.join(tmp_path, "prices"), StubHistoryProvider())
+
+    def reply(request):
+        if request["messages"][0]["content"].startswith("You maintain a running summary"):
+            return "The user asked about holdings and trades. " * 4
+        return ANSWER
+
+    client = StubChatClient(reply=reply)
+    agent = StockAgent(file_path=file_path, llm_client=client, memory_budget=4000, retrieval_budget=800,
+                       price_history=store)
+    for turn in range(40):
+        query = f"Question {turn}: how did SYM{turn % 40:04d} do this quarter?"
+        agent.chat(query)
+        sent = [r for r in client.requests if not r["messages"][0]["content"].startswith("You maintain")][-1]
+        assert prompt_tokens(sent["messages"]) <= agent.memory_budget
+        assert sent["messages"][-1]["content"] == query
+    agent.memory.wait(5)
+    assert agent.memory.stats()["summarized_messages"] > 0
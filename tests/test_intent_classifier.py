@@ -0,0 +1,27 @@
+import pytest
+
+from agents.intent_classifier import IntentClassifier
+
+TRAPS = [
+    ("What is the price of Reliance?", "LIVE"), ("What is Nifty doing?", "LIVE"),
+    ("Will you help me?", "CHAT"), ("Show my total holdings", "ANALYTICS"),
+]
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return IntentClassifier().fit()
+
+
+@pytest.mark.parametrize("query,expected", TRAPS)
+def test_keyword_traps_are_not_answered_wrongly_with_confidence(classifier, query, expected):
+    label, confidence, _ = classifier.predict(query)
+    assert label == expected or confidence < classifier.threshold
+    # Whatever is not answered right locally goes to the LLM classifier
+    assert classifier.classify(query, fallback=lambda q: expected)[0] == expected
+
+
+def test_rule_answers_are_below_certainty(classifier):
+    label, confidence, source = classifier.predict("What is my XIRR?")
+    assert (label, source) == ("MATH", "rule")
+    assert classifier.threshold <= confidence < 1.0
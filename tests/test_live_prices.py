@@ -0,0 +1,59 @@
+import time
+
+from synthetic import make_symbols
+from stubs import StubPriceProvider
+from live_market import fetch_live_quotes, get_live_prices, map_symbol, STATUS_OK, STATUS_MISSING, STATUS_ERROR, STATUS_TIMEOUT
+
+SYMBOLS, _ = make_symbols(30)
+MAPPED = [map_symbol(s) for s in SYMBOLS]
+
+
+def test_per_symbol_fetches_run_concurrently():
+    provider = StubPriceProvider(latency=0.1)
+    start = time.perf_counter()
+    quotes = fetch_live_quotes(SYMBOLS, provider=provider, max_workers=10)
+    elapsed = time.perf_counter() - start
+    assert all(q["status"] == STATUS_OK and q["source"] == "single" for q in quotes.values())
+    # 30 requests of 0.1 s on 10 workers: ~0.3 s instead of 3 s one by one
+    assert elapsed < 1.5
+    assert quotes["SYM0001"]["price"] == StubPriceProvider.price_of("SYM0001.NS")
+
+
+def test_batch_requests_cover_every_symbol():
+    provider = StubPriceProvider(latency=0.05, batch=True)
+    quotes = fetch_live_quotes(SYMBOLS, provider=provider, batch_size=10)
+    assert all(q["source"] == "batch" for q in quotes.values())
+    assert provider.calls == 3 and provider.symbols_requested == 30
+
+
+def test_degraded_source_returns_partial_results_within_the_deadline():
+    provider = StubPriceProvider(latency=0.01, batch=True, missing=MAPPED[:3], failing=MAPPED[3:6],
+                                 hanging=MAPPED[6:9], hang_seconds=3.0)
+    start = time.perf_counter()
+    quotes = fetch_live_quotes(SYMBOLS, provider=provider, symbol_timeout=0.3, overall_timeout=1.0)
+    elapsed = time.perf_counter() - start
+    assert elapsed < 1.5
+    statuses = [quotes[s]["status"] for s in SYMBOLS]
+    assert statuses[:3] == [STATUS_MISSING] * 3
+    assert statuses[3:6] == [STATUS_ERROR] * 3
+    assert statuses[6:9] == [STATUS_TIMEOUT] * 3
+    assert statuses[9:] == [STATUS_OK] * 21
+    assert all(quotes[s]["error"] for s in SYMBOLS[3:9])
+
+    # The plain price dict only has what could be priced
+    prices = get_live_prices(SYMBOLS, provider=provider, use_cache=False, symbol_timeout=0.3, overall_timeout=1.0)
+    assert set(prices) == set(SYMBOLS[9:])
+
+
+def test_overall_deadline_bounds_a_hung_source():
+    provider = StubPriceProvider(latency=0.01, hanging=set(MAPPED), hang_seconds=3.0)
+    start = time.perf_counter()
+    quotes = fetch_live_quotes(SYMBOLS, provider=provider, max_workers=4, symbol_timeout=2.0, overall_timeout=0.5)
+    assert time.perf_counter() - start < 1.0
+    assert all(q["status"] == STATUS_TIMEOUT for q in quotes.values())
+
+
+def test_duplicates_and_empty_input():
+    quotes = fetch_live_quotes(["SYM0001", "SYM0001", "SYM0002"], provider=StubPriceProvider(latency=0.0))
+    assert set(quotes) == {"SYM0001", "SYM0002"}
+    assert fetch_live_quotes([], provider=StubPriceProvider(latency=0.0)) == {}
@@ -0,0 +1,69 @@
+import asyncio
+import gc
+
+import pytest
+
+from stub_llm_server import StubLLMServer
+from agents.llm_client import LLMClient
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+@pytest.fixture
+def server():
+    server = StubLLMServer(n_tokens=5, token_delay=0.0, first_token_delay=0.0).start()
+    yield server
+    server.stop()
+
+
+def create(client, **kwargs):
+    return client.chat.completions.create(model="stub", messages=MESSAGES, timeout=5, **kwargs)
+
+
+def test_stream_holds_its_slot_only_while_iterated(server):
+    client = LLMClient(api_key="stub", base_url=server.base_url, max_concurrency=1)
+    never_started = create(client, stream=True)
+    assert client.stats()["in_flight"] == 0
+    # With the only slot free, a plain call goes through
+    assert create(client).choices[0].message.content
+
+    abandoned = create(client, stream=True)
+    next(abandoned)
+    assert client.stats()["in_flight"] == 1
+    abandoned.close()
+    assert client.stats()["in_flight"] == 0
+
+    dropped = create(client, stream=True)
+    next(dropped)
+    del dropped
+    gc.collect()
+    assert client.stats()["in_flight"] == 0
+    assert "".join(c.choices[0].delta.content or "" for c in never_started).startswith("token0")
+    client.close()
+
+
+def test_async_client_is_closed_with_its_event_loop(server):
+    client = LLMClient(api_key="stub", base_url=server.base_url)
+    opened = []
+
+    async def ask():
+        response = await client.aio.chat.completions.create(model="stub", messages=MESSAGES, timeout=5)
+        opened.append(client._async_clients[asyncio.get_running_loop()][2])
+        return response.choices[0].message.content
+
+    assert asyncio.run(ask()) and asyncio.run(ask())
+    assert len(opened) == 2 and all(http.is_closed for http in opened)
+    assert len(client._async_clients) == 0
+    client.close()
+
+
+def test_close_shuts_the_async_client_of_an_open_loop(server):
+    client = LLMClient(api_key="stub", base_url=server.base_url)
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(client.aio.chat.completions.create(model="stub", messages=MESSAGES, timeout=5))
+        http = client._async_clients[loop][2]
+        client.close()
+        assert http.is_closed and len(client._async_clients) == 0
+    finally:
+        loop.close()
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from synthetic import make_orders
+from bench_lots import deque_replay
+from data_processor import clean_orders, build_holdings, net_positions, DATE_COLUMN
+from lot_engine import LotEngine
+
+
+def orders(rows):
+    """Cleaned-order frame from (date, symbol, type, qty, price) tuples."""
+    frame = pd.DataFrame(rows, columns=[DATE_COLUMN, 'Symbol', 'Type', 'Quantity', 'Price'])
+    frame[DATE_COLUMN] = pd.to_datetime(frame[DATE_COLUMN])
+    frame['Stock name'] = frame['Symbol'] + " Ltd"
+    frame['Value'] = frame['Quantity'] * frame['Price']
+    sign = np.where(frame['Type'] == 'BUY', 1, -1)
+    frame['Quantity_Change'] = frame['Quantity'] * sign
+    frame['Value_Change'] = frame['Value'] * -sign
+    return frame.drop(columns='Price')
+
+
+def test_partial_sell_consumes_oldest_lot_first():
+    df = orders([
+        ("2022-01-10", "ABC", "BUY", 10, 100.0),
+        ("2022-06-10", "ABC", "BUY", 10, 200.0),
+        ("2023-03-01", "ABC", "SELL", 15, 300.0),
+    ])
+    lots = LotEngine(df)
+    sale = lots.realized.iloc[0]
+    # 10 @100 held 415 days (long-term), 5 @200 held 264 days (short-term)
+    assert sale['cost_basis'] == 10 * 100 + 5 * 200
+    assert sale['realized_pnl'] == 15 * 300 - 2000
+    assert (sale['long_term_qty'], sale['long_term_pnl']) == (10, 2000)
+    assert (sale['short_term_qty'], sale['short_term_pnl']) == (5, 500)
+    # Avg_Price follows the remaining lots
+    held = lots.holdings().loc[("ABC", "ABC Ltd")]
+    assert (held['Quantity_Change'], held['Avg_Price'], held['Total_Value']) == (5, 200, 1000)
+    # The net-cash average the processor reports is not a cost basis after a partial sell
+    net = build_holdings(net_positions(df)).loc[("ABC", "ABC Ltd")]
+    assert net['Avg_Price'] == (2000 + 1000 - 4500) / 5 == -300
+
+
+def test_long_term_boundary():
+    # Exactly 365 days is still short-term; one more day makes it long-term
+    df = orders([
+        ("2022-01-01", "XYZ", "BUY", 4, 50.0),
+        ("2023-01-01", "XYZ", "SELL", 2, 60.0),
+        ("2023-01-02", "XYZ", "SELL", 2, 70.0),
+    ])
+    realized = LotEngine(df).realized
+    assert list(realized['short_term_pnl']) == [20, 0]
+    assert list(realized['long_term_pnl']) == [0, 40]
+
+
+def test_sell_spanning_lots_of_interleaved_symbols():
+    df = orders([
+        ("2021-01-01", "AAA", "BUY", 1, 10.0),
+        ("2021-01-02", "BBB", "BUY", 5, 1.0),
+        ("2021-01-03", "AAA", "BUY", 2, 20.0),
+        ("2021-01-04", "AAA", "BUY", 3, 30.0),
+        ("2021-01-05", "BBB", "SELL", 5, 2.0),
+        ("2021-02-01", "AAA", "SELL", 4, 40.0),
+        ("2021-03-01", "AAA", "BUY", 1, 50.0),
+    ])
+    lots = LotEngine(df)
+    assert list(lots.realized['cost_basis']) == [5, 1 * 10 + 2 * 20 + 1 * 30]
+    assert list(lots.open_lots['Quantity']) == [2, 1]
+    assert list(lots.open_lots['Price']) == [30, 50]
+    assert "BBB" not in lots.holdings().index.get_level_values('Symbol')
+
+
+def test_oversell_is_matched_up_to_the_position_held():
+    # Shares sold beyond the position were bought before the export starts
+    df = orders([
+        ("2020-01-01", "OLD", "BUY", 3, 10.0),
+        ("2020-02-01", "OLD", "SELL", 5, 12.0),
+        ("2020-03-01", "OLD", "BUY", 2, 11.0),
+        ("2020-04-01", "OLD", "SELL", 1, 13.0),
+    ])
+    lots = LotEngine(df)
+    assert list(lots.realized['matched_qty']) == [3, 1]
+    assert list(lots.realized['unmatched_qty']) == [2, 0]
+    # The later buy is not used to cover the earlier oversell
+    assert list(lots.realized['cost_basis']) == [30, 11]
+    assert list(lots.open_lots['Quantity']) == [1]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_matches_a_deque_replay(seed):
+    df = clean_orders(make_orders(5_000, n_symbols=30, seed=seed))
+    lots = LotEngine(df)
+    realized, open_cost = deque_replay(df)
+    expected = pd.DataFrame.from_dict(realized, orient='index',
+                                      columns=['realized_pnl', 'short_term_pnl', 'long_term_pnl', 'unmatched_qty'])
+    got = lots.realized[expected.columns].loc[expected.index]
+    assert np.allclose(got.to_numpy(), expected.to_numpy())
+    fifo_cost = lots.open_lots.groupby('Symbol')['Cost'].sum()
+    assert np.allclose(fifo_cost.loc[list(open_cost)].to_numpy(), list(open_cost.values()))
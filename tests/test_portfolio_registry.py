@@ -0,0 +1,24 @@
+from stubs import StubHistoryProvider
+from price_history import PriceHistoryStore
+from agents.portfolio_registry import PortfolioRegistry, DEFAULT_TENANT
+
+SOURCES = {DEFAULT_TENANT: "default.xlsx", "alice": "alice.csv", "bob": "bob.csv", "demo": "demo.csv"}
+
+
+def registry(tmp_path, access):
+    return PortfolioRegistry(SOURCES, access=access, price_history=PriceHistoryStore(str(tmp_path), StubHistoryProvider()))
+
+
+def test_without_an_access_map_only_the_default_account_is_served(tmp_path):
+    tenants = registry(tmp_path, None)
+    assert tenants.accounts_for(None) == tenants.accounts_for("alice@example.com") == [DEFAULT_TENANT]
+    assert not tenants.requires_login
+
+
+def test_identities_see_their_own_accounts_and_the_public_ones(tmp_path):
+    tenants = registry(tmp_path, {"alice@example.com": ["alice", "gone"], "bob@example.com": ["bob"], "*": ["demo"]})
+    assert tenants.requires_login
+    assert tenants.accounts_for(None) == ["demo"]
+    assert tenants.accounts_for("alice@example.com") == ["alice", "demo"]
+    assert "alice" not in tenants.accounts_for("bob@example.com")
+    assert tenants.accounts_for("mallory@example.com") == ["demo"]
@@ -0,0 +1,128 @@
+import os
+import threading
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+
+from synthetic import make_orders
+from stubs import StubHistoryProvider
+from bench_price_history import Clock, naive_market_value
+from data_processor import process_orders, market_value_daily, period_return, trailing_return, DATE_COLUMN
+from data_context import DataContext
+from price_history import PriceHistoryStore, FixtureHistoryProvider
+
+TODAY = date(2024, 6, 28)
+
+
+def test_simple_dietz_returns():
+    # 10 shares bought at 100; the price doubles, then 1,000 more is invested at the top
+    days = pd.date_range("2024-01-01", periods=4)
+    series = pd.DataFrame({
+        'Market_Value': [1000.0, 1500.0, 2000.0, 3000.0],
+        'Net_Invested': [1000.0, 0.0, 0.0, 1000.0],
+    }, index=days)
+    assert period_return(series, days[0], days[2]) == 100.0
+    # New money is not growth: (3000 - 1000 - 1000) / (1000 + 1000 / 2)
+    assert abs(period_return(series, days[0], days[3]) - 1000 / 1500 * 100) < 1e-9
+    assert period_return(series, days[3], days[3]) is None
+    assert trailing_return(series, months=6) is None
+
+
+def test_only_missing_bars_are_fetched(tmp_path):
+    clock = Clock(TODAY)
+    provider = StubHistoryProvider()
+    store = PriceHistoryStore(str(tmp_path), provider, today=clock.today, clock=clock.time)
+    first = store.update(["AAA", "BBB"], "2024-01-01")
+    assert first > 0 and provider.calls == 2
+    # Same day: settled from the manifest
+    assert store.update(["AAA", "BBB"], "2024-01-01") == 0 and provider.calls == 2
+    # Next trading day: one tail request per symbol
+    clock.day = TODAY + timedelta(days=3)
+    assert store.update(["AAA", "BBB"], "2024-01-01") == 2 and provider.calls == 4
+    # An earlier start fetches only the head
+    store.update(["AAA"], "2023-12-01")
+    assert provider.calls == 5
+    assert store.history("AAA").index[0] < pd.Timestamp("2024-01-01")
+
+
+def test_failure_backoff_and_empty_ranges(tmp_path):
+    clock = Clock(TODAY)
+    provider = StubHistoryProvider(failing={"BAD.NS"}, missing={"GONE.NS"})
+    store = PriceHistoryStore(str(tmp_path), provider, today=clock.today, clock=clock.time, retry_after=900)
+    store.update(["OK", "BAD", "GONE"], "2023-01-01")
+    assert store.stats()["fetch_failures"] == 1 and "BAD.NS" not in store.manifest
+    # An empty answer for a whole year is not stored as covered
+    assert "first" not in store.manifest["GONE.NS"]
+    calls = provider.calls
+    clock.now += 60
+    store.update(["OK", "BAD", "GONE"], "2023-01-01")
+    # Failed symbol not retried before retry_after, empty symbol not asked twice a day
+    assert provider.calls == calls
+    clock.now += 900
+    clock.day += timedelta(days=1)
+    store.update(["OK", "BAD", "GONE"], "2023-01-01")
+    # Next day: OK's tail, BAD again after the back-off, GONE again since it had nothing
+    assert provider.calls == calls + 3
+
+
+def test_fixture_provider(tmp_path):
+    fixture_dir = tmp_path / "fixtures"
+    fixture_dir.mkdir()
+    stub = StubHistoryProvider()
+    for sym in ("AAA.NS", "BBB.NS"):
+        stub.fetch_history(sym, date(2023, 1, 1), date(2023, 12, 31)).to_csv(
+            fixture_dir / f"{sym}.csv", index_label="Date")
+    fixtures = FixtureHistoryProvider.from_csv_dir(str(fixture_dir))
+    store = PriceHistoryStore(str(tmp_path / "cache"), fixtures, today=lambda: date(2023, 12, 31))
+    closes = store.closes(["AAA", "BBB"], "2023-03-01")
+    expected = stub.closes("AAA.NS", pd.DatetimeIndex([pd.Timestamp("2023-03-01")]))[0]
+    assert abs(closes['AAA'].iloc[0] - expected) < 1e-9
+    # Saturday carries Friday's close
+    assert closes.loc["2023-03-04", "BBB"] == closes.loc["2023-03-03", "BBB"]
+    # Served from the store afterwards
+    assert store.closes(["AAA"], "2023-03-01").shape[0] == 306
+    assert fixtures.calls == 2
+
+
+def test_offline_store_reads_what_was_stored(tmp_path):
+    store = PriceHistoryStore(str(tmp_path), StubHistoryProvider(), today=lambda: TODAY)
+    online = store.closes(["AAA", "BBB"], "2024-01-01")
+    offline = PriceHistoryStore(str(tmp_path), offline=True, today=lambda: TODAY)
+    assert np.allclose(offline.closes(["AAA", "BBB"], "2024-01-01").to_numpy(), online.to_numpy(), equal_nan=True)
+
+
+def test_market_value_matches_a_day_by_day_loop(tmp_path):
+    df, portfolio, holdings = process_orders(make_orders(3_000, n_symbols=20, start="2022-01-01", years=2, seed=19))
+    store = PriceHistoryStore(str(tmp_path), StubHistoryProvider(missing={"SYM0003.NS"}), today=lambda: TODAY)
+    start = df[DATE_COLUMN].min().normalize()
+    symbols = list(df['Symbol'].unique())
+    series = market_value_daily(df, store.closes(symbols, start))
+    sample = pd.DatetimeIndex(np.sort(np.random.default_rng(0).choice(series.index, 10, replace=False)))
+    expected = naive_market_value(df, store, sample)
+    assert np.allclose(series.loc[sample, 'Market_Value'].to_numpy(), expected, rtol=1e-9)
+
+
+def test_data_context_rebuilds_market_value_only_when_orders_change(tmp_path):
+    data = DataContext(*process_orders(make_orders(500, n_symbols=10, start="2023-01-01", years=1, seed=20)))
+    store = PriceHistoryStore(str(tmp_path), StubHistoryProvider(), today=lambda: TODAY)
+    mv = data.market_value(store)
+    assert data.market_value(store) is mv
+    data.append_orders(make_orders(20, n_symbols=10, start="2024-06-01", years=0.05, seed=21))
+    assert data.market_value(store) is not mv
+
+
+def test_concurrent_updates_fetch_each_symbol_once(tmp_path):
+    provider = StubHistoryProvider(latency=0.05)
+    store = PriceHistoryStore(str(tmp_path), provider, today=lambda: TODAY)
+    symbols = [f"SYM{i:04d}" for i in range(12)]
+    # E.g. the background refresher and two page renders at once
+    threads = [threading.Thread(target=store.update, args=(symbols, "2024-01-01")) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert provider.calls == len(symbols)
+    assert store.stats()["fetches"] == len(symbols)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+    reopened = PriceHistoryStore(str(tmp_path), offline=True, today=lambda: TODAY)
+    assert set(reopened.manifest) == set(store.manifest) and len(reopened.manifest) == len(symbols)
@@ -0,0 +1,139 @@
+import os
+import time
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from synthetic import make_orders, write_order_history_csv
+from stubs import StubPriceProvider, StubHistoryProvider
+from live_market import set_price_provider
+from price_cache import QuoteCache, set_quote_cache, IST
+from price_history import PriceHistoryStore
+from price_refresher import PriceRefresher, seconds_until_open
+
+LATENCY = 0.3
+
+
+def ist(*args):
+    return datetime(*args, tzinfo=IST).timestamp()
+
+
+def test_schedule_follows_market_hours():
+    refresher = PriceRefresher(lambda: None, market_interval=60, off_hours_interval=1800)
+    assert refresher.interval(ist(2024, 6, 3, 10, 0)) == 60                   # Monday, market open
+    assert refresher.interval(ist(2024, 6, 3, 9, 0)) == 15 * 60               # Monday, opens in 15 min
+    assert refresher.interval(ist(2024, 6, 3, 16, 0)) == 1800                 # Monday, after the close
+    assert seconds_until_open(ist(2024, 6, 7, 16, 0)) == (2 * 24 + 17.25) * 3600  # Friday -> Monday 09:15
+    assert seconds_until_open(ist(2024, 6, 8, 12, 0)) == (24 + 21.25) * 3600      # Saturday
+    assert seconds_until_open(ist(2024, 6, 4, 11, 0)) == 0
+    weekend = PriceRefresher(lambda: None, off_hours_interval=10 ** 9)
+    assert weekend.interval(ist(2024, 6, 7, 16, 0)) == (2 * 24 + 17.25) * 3600
+
+
+def test_failed_refresh_keeps_the_previous_snapshot_and_retries():
+    calls = []
+
+    def flaky():
+        calls.append(time.time())
+        if len(calls) == 2:
+            raise ConnectionError("price source down")
+        return len(calls)
+
+    refresher = PriceRefresher(flaky, market_interval=0.05, retry_interval=0.01, is_open=lambda now: True).start()
+    deadline = time.time() + 5
+    while len(calls) < 4 and time.time() < deadline:
+        time.sleep(0.01)
+    refresher.stop(timeout=5)
+    stats = refresher.stats()
+    assert stats["failures"] == 1 and stats["refreshes"] >= 3 and not stats["running"]
+    assert refresher.latest >= 3
+
+
+def test_refresh_now_waits_for_a_new_refresh():
+    values = iter(range(100))
+    refresher = PriceRefresher(lambda: next(values), market_interval=60, is_open=lambda now: True).start()
+    first = refresher.wait_for_first(timeout=5)
+    assert refresher.refresh_now(wait=5) > first
+    refresher.stop(timeout=5)
+
+
+@pytest.fixture
+def slow_prices():
+    # Every valuation is a real round trip to a slow source
+    set_price_provider(StubPriceProvider(latency=LATENCY, batch=True))
+    set_quote_cache(QuoteCache(market_ttl=0, off_hours_ttl=0, stale_ttl=0))
+    yield
+    set_price_provider(None)
+    set_quote_cache(QuoteCache())
+
+
+@pytest.fixture
+def orchestrator(tmp_path, slow_prices):
+    from agents.orchestrator import Orchestrator
+
+    file_path = os.path.join(tmp_path, "orders.csv")
+    write_order_history_csv(make_orders(1_000, n_symbols=20, seed=8), file_path)
+    store = PriceHistoryStore(os.path.join(tmp_path, "prices"), StubHistoryProvider())
+    orchestrator = Orchestrator(file_path=file_path, price_history=store)
+    yield orchestrator
+    orchestrator.close(wait=5)
+
+
+def render(orchestrator):
+    start = time.perf_counter()
+    orchestrator.begin_turn()
+    stats = orchestrator.get_portfolio_stats()
+    return time.perf_counter() - start, stats
+
+
+def test_sidebar_render_does_not_wait_for_a_slow_source(orchestrator):
+    refresher = orchestrator.start_price_refresher(market_interval=2 * LATENCY, is_open=lambda now: True)
+    _, stats = render(orchestrator)
+    assert stats["market_value"] is None          # nothing fetched yet, shown as loading
+    refresher.wait_for_first(timeout=10)
+    for _ in range(5):
+        seconds, stats = render(orchestrator)
+        assert stats["market_value"] is not None
+        assert seconds < LATENCY / 2
+        time.sleep(LATENCY / 3)
+
+
+def test_sidebar_render_reads_stored_closes_only(tmp_path, slow_prices):
+    from agents.orchestrator import Orchestrator
+
+    file_path = os.path.join(tmp_path, "orders.csv")
+    write_order_history_csv(make_orders(500, n_symbols=10, seed=10), file_path)
+    day = [date.today()]
+    provider = StubHistoryProvider()
+    store = PriceHistoryStore(os.path.join(tmp_path, "prices"), provider, today=lambda: day[0])
+    orchestrator = Orchestrator(file_path=file_path, price_history=store)
+    try:
+        refresher = orchestrator.start_price_refresher(market_interval=60, is_open=lambda now: True)
+        refresher.wait_for_first(timeout=10)
+        calls = provider.calls
+        assert calls > 0
+        # A new day's bars are due, but fetching them is the refresher's job
+        day[0] += timedelta(days=1)
+        _, stats = render(orchestrator)
+        assert stats["market_value"] is not None and stats["six_month_growth"] is not None
+        assert provider.calls == calls
+    finally:
+        orchestrator.close(wait=5)
+
+
+def test_explicit_refresh_and_new_orders(orchestrator):
+    refresher = orchestrator.start_price_refresher(market_interval=60, is_open=lambda now: True)
+    before = refresher.wait_for_first(timeout=10)
+    snapshot = orchestrator.refresh_prices(wait=10)
+    assert snapshot is not before and snapshot.taken_at > before.taken_at
+
+    # The old snapshot no longer describes the holdings; a refresh is queued at once
+    orchestrator.ingest_orders(make_orders(20, n_symbols=20, seed=9))
+    _, stats = render(orchestrator)
+    assert stats["market_value"] is None
+    refresher.refresh_now(wait=10)
+    _, stats = render(orchestrator)
+    assert stats["market_value"] is not None
+
+    orchestrator.close(wait=5)
+    assert not refresher.running
@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+from synthetic import make_orders, write_order_history_csv, write_order_history_xlsx
+from data_processor import process_stock_data
+from stream_processor import stream_stock_data
+from data_context import DataContext
+
+
+@pytest.mark.parametrize("fmt", ["xlsx", "csv"])
+def test_streamed_frames_match_the_eager_loader(tmp_path, fmt):
+    path = str(tmp_path / f"orders.{fmt}")
+    writer = write_order_history_xlsx if fmt == "xlsx" else write_order_history_csv
+    writer(make_orders(2_500, n_symbols=20), path)
+
+    df, portfolio_daily, holdings = process_stock_data(path)
+    # Chunks much smaller than the file, so labels, dtypes and same-minute order must carry across them
+    streamed_df, streamed_portfolio, streamed_holdings = stream_stock_data(path, chunk_size=300)
+
+    pd.testing.assert_frame_equal(streamed_df, df)
+    assert streamed_df.index.is_unique
+    pd.testing.assert_frame_equal(streamed_portfolio, portfolio_daily, check_exact=False, check_freq=False)
+    pd.testing.assert_frame_equal(streamed_holdings, holdings, check_exact=False)
+
+
+def test_lazy_streamed_orders_go_through_the_cache(tmp_path):
+    path = str(tmp_path / "orders.csv")
+    write_order_history_csv(make_orders(2_500, n_symbols=20), path)
+    df, portfolio_daily, holdings = process_stock_data(path)
+    cache_dir = str(tmp_path / "cache")
+
+    # Cold (streamed into the cache) and warm (read from it) starts
+    for _ in range(2):
+        data = DataContext.from_file(path, streaming=True, cache_dir=cache_dir)
+        pd.testing.assert_frame_equal(data.holdings, holdings, check_exact=False)
+        pd.testing.assert_frame_equal(data.portfolio, portfolio_daily, check_exact=False, check_freq=False)
+        assert data._load_orders is not None  # orders not read yet
+        pd.testing.assert_frame_equal(data.df, df)
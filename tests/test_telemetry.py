@@ -0,0 +1,20 @@
+import logging
+
+from agents.telemetry import Telemetry
+
+
+def test_disabled_log_goes_to_the_logger_not_stdout(capsys, caplog):
+    telemetry = Telemetry(enabled=False)
+    with caplog.at_level(logging.DEBUG, logger="portfolio"):
+        telemetry.log("route", "Routing 'hi' to CHAT", intent="CHAT")
+    assert capsys.readouterr().out == ""
+    assert caplog.records[-1].levelno == logging.DEBUG
+    assert caplog.records[-1].getMessage() == "route: Routing 'hi' to CHAT"
+
+
+def test_failures_are_logged_as_warnings_while_disabled(caplog):
+    telemetry = Telemetry(enabled=False)
+    with caplog.at_level(logging.WARNING, logger="portfolio"):
+        telemetry.log("route", "Routing 'hi' to CHAT", intent="CHAT")
+        telemetry.log("price_refresh", "Background price refresh failed (timeout)", level=logging.WARNING)
+    assert [r.getMessage() for r in caplog.records] == ["price_refresh: Background price refresh failed (timeout)"]
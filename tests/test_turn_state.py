@@ -0,0 +1,62 @@
+import os
+import threading
+
+from synthetic import make_orders, write_order_history_csv
+from stubs import StubPriceProvider, StubHistoryProvider
+from live_market import set_price_provider
+from price_history import PriceHistoryStore
+from agents.orchestrator import Orchestrator, TurnState
+
+
+def test_sessions_sharing_an_orchestrator_keep_their_own_turns(tmp_path):
+    file_path = os.path.join(tmp_path, "orders.csv")
+    write_order_history_csv(make_orders(500, n_symbols=10, seed=11), file_path)
+    store = PriceHistoryStore(os.path.join(tmp_path, "prices"), StubHistoryProvider())
+    orchestrator = Orchestrator(file_path=file_path, price_history=store)
+    set_price_provider(StubPriceProvider(latency=0.01, batch=True))
+    sessions = {name: TurnState() for name in ("a", "b")}
+    barrier = threading.Barrier(2)
+    seen = {}
+
+    def session(name, turns, query):
+        # One Streamlit script thread per rerun; the session's state comes from st.session_state
+        for _ in range(turns):
+            barrier.wait(5)
+            orchestrator.begin_turn(state=sessions[name])
+            orchestrator.get_portfolio_stats()
+            barrier.wait(5)
+            orchestrator.route_query(query, profile=name == "a")
+        seen[name] = (orchestrator.turn_state is sessions[name], orchestrator.last_turn_stats, orchestrator.last_profile)
+
+    try:
+        threads = [threading.Thread(target=session, args=("a", 3, "What is my XIRR?")),
+                   threading.Thread(target=session, args=("b", 3, "hello"))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        set_price_provider(None)
+        orchestrator.close(wait=5)
+
+    assert seen["a"][0] and seen["b"][0]
+    assert sessions["a"].turn == sessions["b"].turn == 3
+    assert seen["a"][1]["intent"] == "MATH" and seen["b"][1]["intent"] == "CHAT"
+    # Each session reused its own turn's snapshot: one valuation for the sidebar and the answer
+    assert seen["a"][1]["price_fetches"] == 1
+    assert seen["a"][2] and seen["b"][2] is None
+    # The thread that never brought a state still sees the orchestrator's own
+    assert orchestrator.turn_state.turn == 0
+
+
+def test_a_state_follows_one_orchestrator(tmp_path):
+    file_path = os.path.join(tmp_path, "orders.csv")
+    write_order_history_csv(make_orders(200, n_symbols=5, seed=12), file_path)
+    first, second = Orchestrator(file_path=file_path), Orchestrator(file_path=file_path)
+    state = TurnState()
+    first.begin_turn(state=state)
+    first.begin_turn(state=state)
+    assert state.turn == 2
+    # E.g. another account, or the same one rebuilt after an eviction
+    second.begin_turn(state=state)
+    assert state.turn == 1 and first.turn_state is not state